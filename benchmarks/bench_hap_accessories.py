@@ -0,0 +1,85 @@
+"""
+Benchmark: construcción de accesorios de lavadora con y sin plantilla.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_hap_accessories [--devices 100 500 1000]
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from pyhap.accessory import Accessory
+from pyhap.loader import get_loader
+
+from bridges.homekit.LGWasherAccessory import LGWasherAccessory, WASHER_TEMPLATE, _build_washer_services
+
+
+class _NullPipeline:
+    """Sin hilos: solo se mide la construcción"""
+
+    def submit(self, *args, **kwargs):
+        pass
+
+
+def _driver():
+    # Accessory solo usa driver.loader al construirse
+    return SimpleNamespace(loader=get_loader())
+
+
+def _build_from_loader(driver, index: int) -> Accessory:
+    """Construcción sin plantilla: cada servicio se crea desde el loader"""
+    accessory = Accessory(driver, f"Lavadora {index}")
+    accessory.add_service(*_build_washer_services(driver.loader).values())
+    return accessory
+
+
+def _build_from_template(driver, index: int) -> Accessory:
+    accessory = Accessory(driver, f"Lavadora {index}")
+    WASHER_TEMPLATE.apply(accessory)
+    return accessory
+
+
+def _check_same_layout(driver):
+    """Ambos caminos deben producir la misma representación HAP (mismos IIDs)"""
+    a, b = _build_from_loader(driver, 0), _build_from_template(driver, 0)
+    a.aid = b.aid = 2
+    assert a.to_HAP() == b.to_HAP(), "La plantilla no reproduce la disposición de servicios"
+
+
+def bench(devices: int):
+    driver = _driver()
+    pipeline = _NullPipeline()
+
+    start = time.perf_counter()
+    for i in range(devices):
+        _build_from_loader(driver, i)
+    t_loader = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(devices):
+        _build_from_template(driver, i)
+    t_template = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(devices):
+        LGWasherAccessory(driver, f"Lavadora {i}", f"device-{i}", None, command_pipeline=pipeline)
+    t_accessory = time.perf_counter() - start
+
+    print(f"{devices:>6} lavadoras | loader {t_loader * 1e3:8.1f} ms | "
+          f"plantilla {t_template * 1e3:8.1f} ms | "
+          f"LGWasherAccessory {t_accessory * 1e3:8.1f} ms | "
+          f"x{t_loader / t_template:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, nargs='+', default=[100, 500, 1000])
+    args = parser.parse_args()
+
+    _check_same_layout(_driver())
+    for devices in args.devices:
+        bench(devices)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: respuestas discovery/stateRefresh de SmartThings armadas con
+dicts + jsonify vs fragmentos pre-codificados por accesorio.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_smartthings_responses [--devices 10 100 1000] [--changed 0.1]
+"""
+import argparse
+import json
+import random
+import time
+
+from flask import jsonify
+
+from bridges.smartthings.LGWasherAccessory import LGWasherAccessory, MachineState
+from services.smartthings_service import SmartThingsService
+
+
+def _accessories(devices: int):
+    return [
+        LGWasherAccessory(
+            external_device_id=f"device-{i}",
+            friendly_name=f"Lavadora {i}",
+            device_handler_type="c2c-washer",
+            manufacturer_name="LG",
+            model_name="F4V5",
+            hw_version="1.0",
+        )
+        for i in range(devices)
+    ]
+
+
+def _headers(interaction: str):
+    return {"schema": "st-schema", "version": "1.0", "interactionType": interaction, "requestId": "bench"}
+
+
+def _dict_responses(accessories):
+    discovery = jsonify({
+        "headers": _headers("discoveryResponse"),
+        "requestGrantCallbackAccess": True,
+        "devices": [a.to_discovery_dict() for a in accessories],
+    }).get_data()
+    refresh = jsonify({
+        "headers": _headers("stateRefreshResponse"),
+        "deviceState": [a.state_refresh_request() for a in accessories],
+    }).get_data()
+    return discovery, refresh
+
+
+def _fragment_responses(service):
+    return service.handle_device_discovered("bench").get_data(), service.state_refresh_request("bench").get_data()
+
+
+def bench(devices: int, requests: int, changed_ratio: float):
+    service = SmartThingsService()
+    accessories = _accessories(devices)
+    for accessory in accessories:
+        service.accessories[accessory.external_device_id] = accessory
+    rng = random.Random(7)
+    states = list(MachineState)
+
+    def mutate():
+        # Entre petición y petición cambia el estado de parte de la flota
+        for accessory in accessories:
+            if rng.random() < changed_ratio:
+                accessory.machine_state = rng.choice(states)
+
+    with service.app.app_context():
+        # Mismo contenido en ambas formas
+        for old, new in zip(_dict_responses(accessories), _fragment_responses(service)):
+            assert json.loads(old) == json.loads(new)
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            mutate()
+            _dict_responses(accessories)
+        t_dict = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            mutate()
+            _fragment_responses(service)
+        t_fragments = time.perf_counter() - start
+
+    per_request = 1e3 / requests
+    print(f"{devices:>6} dispositivos | dict+jsonify {t_dict * per_request:8.2f} ms | "
+          f"fragmentos {t_fragments * per_request:8.2f} ms | x{t_dict / t_fragments:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--changed', type=float, default=0.1, help="Fracción de dispositivos que cambian por petición")
+    args = parser.parse_args()
+
+    for devices in args.devices:
+        bench(devices, args.requests, args.changed)
+
+
+if __name__ == '__main__':
+    main()
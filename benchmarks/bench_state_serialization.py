@@ -0,0 +1,96 @@
+"""
+Benchmark: asdict() vs IncrementalStateSerializer en flotas grandes.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_state_serialization [--devices 100 1000 10000] [--changed 0.1]
+"""
+import argparse
+import random
+import time
+from dataclasses import asdict, replace
+
+from core.state_serializer import IncrementalStateSerializer
+from models.LG.washer import WasherState
+
+STATES = ['POWER_OFF', 'INITIAL', 'RUNNING', 'RINSING', 'SPINNING', 'END', 'PAUSE']
+
+
+def _random_state(rng: random.Random) -> WasherState:
+    return WasherState(
+        state=rng.choice(STATES),
+        remote_start=rng.random() < 0.5,
+        remain_time_h=rng.randint(0, 3),
+        remain_time_m=rng.randint(0, 59),
+        reserve_time_h=0,
+        reserve_time_m=0,
+        initial_time_h=rng.randint(0, 3),
+        initial_time_m=rng.randint(0, 59),
+        tcl_count=rng.randint(0, 30),
+        current_state='MAIN',
+        error=None,
+    )
+
+
+def _polls(devices: int, polls: int, changed_ratio: float, seed: int = 7):
+    """Generar los estados de cada poll (se cambia solo una fracción de la flota)"""
+    rng = random.Random(seed)
+    current = [_random_state(rng) for _ in range(devices)]
+    rounds = []
+    for _ in range(polls):
+        snapshot = []
+        for state in current:
+            # Cada poll crea un objeto nuevo, como WasherState.from_json
+            if rng.random() < changed_ratio:
+                state = replace(state, remain_time_m=rng.randint(0, 59))
+            else:
+                state = replace(state)
+            snapshot.append(state)
+        current = snapshot
+        rounds.append(snapshot)
+    return rounds
+
+
+def bench(devices: int, polls: int, changed_ratio: float):
+    rounds = _polls(devices, polls, changed_ratio)
+    ids = [f"device-{i}" for i in range(devices)]
+
+    start = time.perf_counter()
+    for snapshot in rounds:
+        for state in snapshot:
+            asdict(state)
+    t_asdict = time.perf_counter() - start
+
+    serializer = IncrementalStateSerializer()
+    start = time.perf_counter()
+    for snapshot in rounds:
+        for device_id, state in zip(ids, snapshot):
+            serializer.serialize(device_id, state)
+    t_incremental = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for snapshot in rounds:
+        for device_id, state in zip(ids, snapshot):
+            serializer.serialize(device_id, state)
+            serializer.to_bytes(device_id)
+    t_bytes = time.perf_counter() - start
+
+    per_poll = 1e3 / polls
+    print(f"{devices:>7} dispositivos | asdict {t_asdict * per_poll:8.2f} ms/poll | "
+          f"incremental {t_incremental * per_poll:8.2f} ms/poll | "
+          f"incremental+bytes {t_bytes * per_poll:8.2f} ms/poll | "
+          f"x{t_asdict / t_incremental:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--polls', type=int, default=20)
+    parser.add_argument('--changed', type=float, default=0.1, help="Fracción de dispositivos que cambian por poll")
+    args = parser.parse_args()
+
+    for devices in args.devices:
+        bench(devices, args.polls, args.changed)
+
+
+if __name__ == '__main__':
+    main()
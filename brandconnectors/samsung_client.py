@@ -0,0 +1,179 @@
+import requests
+import logging
+from typing import List, Optional, Dict, Any, Iterable
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from brandconnectors.base_client import BaseClient
+
+logger = logging.getLogger(__name__)
+
+class SamsungSmartThingsClient(BaseClient):
+    """Cliente para la API REST de Samsung SmartThings"""
+
+    DEFAULT_BASE_URL = 'https://api.smartthings.com/v1'
+
+    def __init__(self, access_token: str, base_url: str = DEFAULT_BASE_URL, bulk_size: int = 25, pool_size: int = 10):
+        """
+        Inicializar cliente.
+
+        Args:
+            access_token: Personal Access Token / OAuth token de SmartThings
+            base_url: URL base de la API (configurable para pruebas locales)
+            bulk_size: Dispositivos por petición de estado masivo
+            pool_size: Conexiones persistentes por host
+        """
+        self.BASE_URL = base_url.rstrip('/')
+        self.bulk_size = max(1, bulk_size)
+        self.session = requests.Session()
+
+        # Pool de conexiones reutilizables (keep-alive) con reintentos en GET
+        retries = Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.session.headers.update({
+            'Authorization': f'Bearer {access_token}',
+            'Accept': 'application/json',
+        })
+
+    def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Any] = None,
+        json_data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Realizar petición HTTP.
+
+        Args:
+            method: GET, POST
+            endpoint: Endpoint de la API (ej: '/devices/123/status') o URL absoluta
+            params: Query parameters
+            json_data: Body JSON
+
+        Returns:
+            Respuesta JSON
+        """
+        url = endpoint if endpoint.startswith('http') else f"{self.BASE_URL}{endpoint}"
+
+        try:
+            response = self.session.request(
+                method=method,
+                url=url,
+                params=params,
+                json=json_data,
+                timeout=(5, 20)
+            )
+            logger.debug(f"Status: {response.status_code}")
+            response.raise_for_status()
+            return response.json() if response.content else {}
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error en petición: {e}")
+            raise
+
+    def get_devices_list(self) -> List[Dict[str, Any]]:
+        """
+        Lista TODOS los dispositivos de la cuenta (sigue la paginación).
+        """
+        devices = []
+        endpoint = '/devices'
+        while endpoint:
+            response = self._make_request('GET', endpoint)
+            devices.extend(response.get('items', []))
+            next_link = (response.get('_links') or {}).get('next') or {}
+            endpoint = next_link.get('href')
+        return devices
+
+    def get_device_state(self, device_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene el estado de un dispositivo.
+
+        Returns:
+            {'main': {capability: {attribute: {'value': ...}}}} o None si falló
+        """
+        try:
+            response = self._make_request('GET', f'/devices/{device_id}/status')
+            return response.get('components') or None
+        except Exception as e:
+            logger.error(f"Error al obtener estado de {device_id}: {e}")
+            return None
+
+    def get_devices_status(self, device_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene el estado de muchos dispositivos con pocas peticiones.
+
+        Usa GET /devices?deviceId=...&includeStatus=true en bloques de
+        bulk_size. Los dispositivos que la respuesta no incluye con estado
+        se consultan individualmente; los que tampoco así tienen estado se
+        omiten del resultado.
+
+        Returns:
+            device_id -> {'main': {capability: {attribute: {'value': ...}}}}
+        """
+        device_ids = list(dict.fromkeys(device_ids))
+        result: Dict[str, Dict[str, Any]] = {}
+
+        for i in range(0, len(device_ids), self.bulk_size):
+            chunk = device_ids[i:i + self.bulk_size]
+            params = [('deviceId', device_id) for device_id in chunk] + [('includeStatus', 'true')]
+            try:
+                response = self._make_request('GET', '/devices', params=params)
+            except Exception as e:
+                logger.warning(f"Estado masivo no disponible, consultando uno a uno: {e}")
+                response = {}
+
+            for item in response.get('items', []):
+                status = self._status_from_item(item)
+                if status is not None:
+                    result[item['deviceId']] = status
+
+        for device_id in device_ids:
+            if device_id not in result:
+                status = self.get_device_state(device_id)
+                if status is not None:
+                    result[device_id] = status
+
+        return result
+
+    @staticmethod
+    def _status_from_item(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Convertir un item de /devices?includeStatus=true al formato de /status"""
+        components = {}
+        has_status = False
+        for component in item.get('components', []):
+            capabilities = {}
+            for capability in component.get('capabilities', []):
+                if 'status' in capability:
+                    has_status = True
+                    capabilities[capability['id']] = capability['status']
+            components[component.get('id', 'main')] = capabilities
+        return components if has_status else None
+
+    def get_device_profile(self, device_id: str) -> Dict[str, Any]:
+        """
+        Obtiene la descripción del dispositivo (componentes y capacidades).
+        """
+        return self._make_request('GET', f'/devices/{device_id}')
+
+    def send_command(self, device_id: str, command_data: Dict[str, Any]) -> bool:
+        """
+        Envía comandos a un dispositivo.
+
+        Args:
+            command_data: {'commands': [{'component', 'capability', 'command', 'arguments'}]}
+        """
+        try:
+            self._make_request('POST', f'/devices/{device_id}/commands', json_data=command_data)
+            return True
+        except Exception as e:
+            logger.error(f"Error al enviar comando a {device_id}: {e}")
+            return False
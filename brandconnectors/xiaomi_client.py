@@ -0,0 +1,472 @@
+import hashlib
+import itertools
+import json
+import logging
+import queue
+import selectors
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Tuple
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from brandconnectors.base_client import BaseClient
+
+logger = logging.getLogger(__name__)
+
+MIIO_PORT = 54321
+HEADER = struct.Struct('>HHIII16s')  # magic, length, unknown, device id, stamp, checksum
+MAGIC = 0x2131
+HELLO_PACKET = bytes.fromhex('21310020' + 'ff' * 28)
+
+
+class MiIOError(Exception):
+    """Error de protocolo miIO (timeout, checksum, respuesta de error)"""
+    pass
+
+
+# ============================================================================
+# PROTOCOLO miIO
+# ============================================================================
+
+class MiIOCipher:
+    """Cifrado AES-128-CBC derivado del token del dispositivo"""
+
+    def __init__(self, token: bytes):
+        self.token = token
+        self.key = hashlib.md5(token).digest()
+        self.iv = hashlib.md5(self.key + token).digest()
+
+    def encrypt(self, plaintext: bytes) -> bytes:
+        padder = padding.PKCS7(128).padder()
+        padded = padder.update(plaintext) + padder.finalize()
+        encryptor = Cipher(algorithms.AES(self.key), modes.CBC(self.iv)).encryptor()
+        return encryptor.update(padded) + encryptor.finalize()
+
+    def decrypt(self, ciphertext: bytes) -> bytes:
+        decryptor = Cipher(algorithms.AES(self.key), modes.CBC(self.iv)).decryptor()
+        padded = decryptor.update(ciphertext) + decryptor.finalize()
+        unpadder = padding.PKCS7(128).unpadder()
+        return unpadder.update(padded) + unpadder.finalize()
+
+
+def build_packet(cipher: MiIOCipher, device_id: int, stamp: int, payload: Dict[str, Any]) -> bytes:
+    """Construir un paquete miIO cifrado"""
+    data = cipher.encrypt(json.dumps(payload, separators=(',', ':')).encode())
+    header = HEADER.pack(MAGIC, HEADER.size + len(data), 0, device_id, stamp, b'\x00' * 16)
+    checksum = hashlib.md5(header[:16] + cipher.token + data).digest()
+    return header[:16] + checksum + data
+
+
+def parse_packet(cipher: Optional[MiIOCipher], packet: bytes) -> Tuple[int, int, Optional[Dict[str, Any]]]:
+    """
+    Parsear un paquete miIO.
+
+    Returns:
+        (device_id, stamp, payload) - payload es None en respuestas a hello
+    """
+    if len(packet) < HEADER.size:
+        raise MiIOError("Paquete demasiado corto")
+
+    magic, length, _, device_id, stamp, checksum = HEADER.unpack_from(packet)
+    if magic != MAGIC:
+        raise MiIOError("Magic inválido")
+
+    data = packet[HEADER.size:length]
+    if not data or cipher is None:
+        return device_id, stamp, None
+
+    if hashlib.md5(packet[:16] + cipher.token + data).digest() != checksum:
+        raise MiIOError("Checksum inválido")
+
+    plaintext = cipher.decrypt(data).rstrip(b'\x00')
+    return device_id, stamp, json.loads(plaintext)
+
+
+# ============================================================================
+# POOL DE SOCKETS UDP NO BLOQUEANTES
+# ============================================================================
+
+class MiIOSocketPool:
+    """
+    Pool de sockets UDP no bloqueantes.
+
+    Un intercambio envía todos los paquetes de una vez y espera las
+    respuestas con un selector, así N dispositivos cuestan ~1 RTT de LAN
+    en lugar de N. Si hacen falta más sockets que `size` se crean
+    temporales y se cierran al devolverlos.
+    """
+
+    def __init__(self, size: int = 4):
+        size = max(1, size)
+        self._free: queue.Queue = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._free.put(self._new_socket())
+
+    @staticmethod
+    def _new_socket() -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        return sock
+
+    def _acquire(self) -> socket.socket:
+        try:
+            return self._free.get(timeout=1)
+        except queue.Empty:
+            return self._new_socket()
+
+    def _release(self, sock: socket.socket):
+        try:
+            self._free.put_nowait(sock)
+        except queue.Full:
+            sock.close()  # Socket temporal: el pool ya está completo
+
+    def exchange(self, requests: List[Tuple[Tuple[str, int], bytes]], timeout: float = 2.0, retries: int = 2) -> List[Optional[bytes]]:
+        """
+        Enviar paquetes y recolectar respuestas.
+
+        Solo hay una petición en vuelo por dispositivo y socket; las
+        peticiones al mismo dispositivo usan sockets distintos.
+
+        Args:
+            requests: [(dirección, paquete), ...]
+            timeout: Segundos por intento
+            retries: Reenvíos de las peticiones sin respuesta
+
+        Returns:
+            Respuesta (bytes) por petición, None si no llegó
+        """
+        results: List[Optional[bytes]] = [None] * len(requests)
+        if not requests:
+            return results
+
+        lanes: Dict[Tuple[str, int], List[int]] = {}
+        for index, (addr, _) in enumerate(requests):
+            lanes.setdefault(addr, []).append(index)
+
+        sockets = [self._acquire() for _ in range(max(len(v) for v in lanes.values()))]
+        pending: Dict[Tuple[int, Tuple[str, int]], int] = {}  # (socket, dirección) -> petición
+        for addr, indexes in lanes.items():
+            for lane, index in enumerate(indexes):
+                pending[(lane, addr)] = index
+
+        selector = selectors.DefaultSelector()
+        try:
+            for lane, sock in enumerate(sockets):
+                self._drain(sock)
+                selector.register(sock, selectors.EVENT_READ, lane)
+
+            for _ in range(retries + 1):
+                for (lane, addr), index in pending.items():
+                    try:
+                        sockets[lane].sendto(requests[index][1], addr)
+                    except OSError as e:
+                        logger.debug(f"Error enviando a {addr}: {e}")
+
+                deadline = time.monotonic() + timeout
+                while pending:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    for key, _ in selector.select(remaining):
+                        self._receive(key.fileobj, key.data, pending, results)
+
+                if not pending:
+                    break
+        finally:
+            selector.close()
+            for sock in sockets:
+                self._release(sock)
+
+        return results
+
+    @staticmethod
+    def _receive(sock: socket.socket, lane: int, pending: Dict, results: List[Optional[bytes]]):
+        while True:
+            try:
+                data, addr = sock.recvfrom(4096)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            index = pending.pop((lane, addr), None)
+            if index is not None:
+                results[index] = data
+
+    @staticmethod
+    def _drain(sock: socket.socket):
+        """Descartar respuestas tardías de intercambios anteriores"""
+        while True:
+            try:
+                sock.recvfrom(4096)
+            except OSError:
+                return
+
+    def close(self):
+        while not self._free.empty():
+            self._free.get_nowait().close()
+
+
+# ============================================================================
+# CLIENTE
+# ============================================================================
+
+@dataclass
+class MiIODeviceConfig:
+    """Dispositivo configurado en config.conf ([XIAOMI:<nombre>])"""
+    name: str
+    host: str
+    token: str
+    port: int = MIIO_PORT
+    model: str = 'Unknown'
+    device_type: str = 'DEVICE_MIIO'
+    # ID miIO conocido: permite listarlo aunque no responda al handshake
+    did: Optional[str] = None
+    # nombre -> (siid, piid) para MIoT; (None, None) para get_prop legado
+    properties: Dict[str, Tuple[Optional[int], Optional[int]]] = field(default_factory=dict)
+
+
+class _MiIOSession:
+    """Estado de la sesión con un dispositivo (tras el handshake)"""
+
+    def __init__(self, device: MiIODeviceConfig):
+        self.device = device
+        # Las respuestas llegan desde la IP: un host configurado por nombre
+        # se resuelve en cada handshake (ver resolve())
+        self.addr = (device.host, device.port)
+        self.cipher = MiIOCipher(bytes.fromhex(device.token))
+        self.device_id: Optional[int] = None  # None = hace falta handshake
+        # Último ID visto (no se borra en un timeout): el dispositivo sigue
+        # listado mientras esté apagado o sin red
+        self.known_id: Optional[str] = device.did
+        self.stamp = 0
+        self.stamp_time = 0.0
+
+    def current_stamp(self) -> int:
+        return self.stamp + int(time.monotonic() - self.stamp_time)
+
+    def resolve(self):
+        """Dirección IPv4 del dispositivo (se conserva la anterior si el nombre no resuelve)"""
+        try:
+            info = socket.getaddrinfo(self.device.host, self.device.port, socket.AF_INET, socket.SOCK_DGRAM)
+            self.addr = info[0][4][:2]
+        except OSError as e:
+            logger.warning(f"No se pudo resolver {self.device.host} ({self.device.name}): {e}")
+
+
+class XiaomiMiIOClient(BaseClient):
+    """Cliente LAN para dispositivos Xiaomi (protocolo miIO sobre UDP)"""
+
+    def __init__(self, devices: List[MiIODeviceConfig], pool_size: int = 4, timeout: float = 2.0, retries: int = 2, max_properties: int = 15):
+        """
+        Inicializar cliente.
+
+        Args:
+            devices: Dispositivos configurados
+            pool_size: Sockets UDP en el pool
+            timeout: Segundos de espera por intento
+            retries: Reintentos por petición
+            max_properties: Propiedades por petición get_properties
+        """
+        self.sessions: Dict[str, _MiIOSession] = {}  # device_id (str) -> sesión
+        self._configured = [_MiIOSession(device) for device in devices]
+        self.pool = MiIOSocketPool(pool_size)
+        self.timeout = timeout
+        self.retries = retries
+        self.max_properties = max(1, max_properties)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Transporte
+    # ------------------------------------------------------------------
+
+    def _handshake(self, sessions: List[_MiIOSession]) -> List[_MiIOSession]:
+        """Hello a varios dispositivos a la vez; devuelve los que respondieron"""
+        for session in sessions:
+            session.resolve()
+        responses = self.pool.exchange([(s.addr, HELLO_PACKET) for s in sessions], self.timeout, self.retries)
+
+        alive = []
+        for session, response in zip(sessions, responses):
+            if response is None:
+                logger.warning(f"Dispositivo Xiaomi sin respuesta: {session.device.name} ({session.device.host})")
+                session.device_id = None  # Se conserva known_id: sigue listado
+                continue
+            device_id, stamp, _ = parse_packet(None, response)
+            session.device_id = device_id
+            session.known_id = str(device_id)
+            session.stamp = stamp
+            session.stamp_time = time.monotonic()
+            alive.append(session)
+        return alive
+
+    def _call_many(self, calls: List[Tuple[_MiIOSession, str, Any]]) -> List[Any]:
+        """
+        Ejecutar varios métodos (en varios dispositivos) en un solo intercambio.
+
+        Returns:
+            Resultado por llamada (MiIOError si falló)
+        """
+        stale = [session for session in {id(s): s for s, _, _ in calls}.values() if session.device_id is None]
+        if stale:
+            self._handshake(stale)
+
+        # Sin handshake no hay a quién enviar: no esperar otro timeout
+        reachable = [call for call in calls if call[0].device_id is not None]
+        responses = iter(self._exchange_calls(reachable))
+        return [next(responses) if session.device_id is not None
+                else MiIOError(f"Sin respuesta al handshake ({session.device.name})")
+                for session, _, _ in calls]
+
+    def _exchange_calls(self, calls: List[Tuple[_MiIOSession, str, Any]]) -> List[Any]:
+        """Enviar llamadas a sesiones con handshake y parsear sus respuestas"""
+        packets, message_ids = [], []
+        for session, method, params in calls:
+            with self._lock:
+                message_id = next(self._ids)
+            message_ids.append(message_id)
+            payload = {'id': message_id, 'method': method, 'params': params if params is not None else []}
+            packets.append((session.addr, build_packet(session.cipher, session.device_id, session.current_stamp() + 1, payload)))
+
+        responses = self.pool.exchange(packets, self.timeout, self.retries)
+
+        results = []
+        for (session, method, _), message_id, response in zip(calls, message_ids, responses):
+            if response is None:
+                # Forzar nuevo handshake en la siguiente llamada
+                session.device_id = None
+                results.append(MiIOError(f"Timeout en {method} ({session.device.name})"))
+                continue
+            try:
+                _, stamp, payload = parse_packet(session.cipher, response)
+                session.stamp, session.stamp_time = stamp, time.monotonic()
+                if payload.get('id') != message_id:
+                    raise MiIOError("Respuesta con id inesperado")
+                if 'error' in payload:
+                    raise MiIOError(payload['error'])
+                results.append(payload.get('result'))
+            except Exception as e:
+                results.append(e if isinstance(e, MiIOError) else MiIOError(str(e)))
+        return results
+
+    def call(self, device_id: str, method: str, params: Any = None) -> Any:
+        """Ejecutar un método miIO en un dispositivo"""
+        result = self._call_many([(self.sessions[device_id], method, params)])[0]
+        if isinstance(result, MiIOError):
+            raise result
+        return result
+
+    # ------------------------------------------------------------------
+    # API BaseClient
+    # ------------------------------------------------------------------
+
+    def get_devices_list(self) -> List[Dict[str, Any]]:
+        """
+        Handshake con todos los dispositivos configurados y miIO.info.
+
+        Se listan todos los configurados con ID conocido, respondan o no
+        ('reachable'); uno apagado un momento no debe desaparecer. Los que
+        nunca respondieron y no tienen 'did' en config.conf no tienen ID y
+        se omiten hasta que respondan.
+        """
+        alive = self._handshake(self._configured)
+        infos = dict(zip(map(id, alive), self._call_many([(session, 'miIO.info', []) for session in alive])))
+
+        devices = []
+        for session in self._configured:
+            if session.known_id is None:
+                logger.warning(f"{session.device.name}: sin ID miIO todavía (no responde y no tiene 'did')")
+                continue
+            self.sessions[session.known_id] = session
+            info = infos.get(id(session))
+            if info is None or isinstance(info, MiIOError):
+                info = {}
+            devices.append({
+                'device_id': session.known_id,
+                'name': session.device.name,
+                'model': info.get('model') or session.device.model,
+                'device_type': session.device.device_type,
+                'firmware': info.get('fw_ver'),
+                'reachable': session.device_id is not None,
+            })
+        return devices
+
+    def get_device_state(self, device_id: str) -> Dict[str, Any]:
+        """Leer las propiedades configuradas de un dispositivo"""
+        return self.get_devices_status([device_id]).get(device_id, {})
+
+    def get_devices_status(self, device_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Leer propiedades de muchos dispositivos en un solo intercambio UDP.
+        Las propiedades MIoT se piden en bloques de max_properties.
+
+        Returns:
+            device_id -> {propiedad: valor}; {} si el dispositivo no respondió
+        """
+        calls, owners = [], []
+        for device_id in device_ids:
+            session = self.sessions.get(device_id)
+            if session is None:
+                continue
+            miot = [(name, s, p) for name, (s, p) in session.device.properties.items() if s is not None]
+            legacy = [name for name, (s, _) in session.device.properties.items() if s is None]
+
+            for i in range(0, len(miot), self.max_properties):
+                chunk = miot[i:i + self.max_properties]
+                params = [{'did': name, 'siid': s, 'piid': p} for name, s, p in chunk]
+                calls.append((session, 'get_properties', params))
+                owners.append((device_id, None))
+            if legacy:
+                calls.append((session, 'get_prop', legacy))
+                owners.append((device_id, legacy))
+
+        status: Dict[str, Dict[str, Any]] = {device_id: {} for device_id in device_ids}
+        failed = set()
+        for (device_id, legacy), result in zip(owners, self._call_many(calls)):
+            if isinstance(result, MiIOError):
+                logger.debug(f"Error leyendo {device_id}: {result}")
+                failed.add(device_id)
+                continue
+            if legacy is not None:
+                status[device_id].update(zip(legacy, result))
+            else:
+                for prop in result:
+                    if prop.get('code', 0) == 0:
+                        status[device_id][prop['did']] = prop.get('value')
+
+        for device_id in failed:
+            status[device_id] = {}
+        return status
+
+    def get_device_profile(self, device_id: str) -> Dict[str, Any]:
+        """miIO.info del dispositivo"""
+        return self.call(device_id, 'miIO.info')
+
+    def send_command(self, device_id: str, command_data: Dict[str, Any]) -> bool:
+        """
+        Envía comando a un dispositivo.
+
+        Args:
+            command_data: {'method': ..., 'params': [...]} o
+                          {'properties': {nombre: valor}} (set_properties MIoT)
+        """
+        try:
+            session = self.sessions[device_id]
+            if 'properties' in command_data:
+                params = []
+                for name, value in command_data['properties'].items():
+                    siid, piid = session.device.properties[name]
+                    params.append({'did': name, 'siid': siid, 'piid': piid, 'value': value})
+                result = self.call(device_id, 'set_properties', params)
+                return all(prop.get('code', 0) == 0 for prop in result)
+
+            self.call(device_id, command_data['method'], command_data.get('params', []))
+            return True
+        except Exception as e:
+            logger.error(f"Error al enviar comando a {device_id}: {e}")
+            return False
@@ -0,0 +1,124 @@
+"""
+Tipos de dispositivo soportados por los bridges.
+
+Para agregar un tipo nuevo basta con registrar aquí su DeviceMapping.
+"""
+from datetime import datetime, timedelta
+
+from bridges.homekit.LGWasherAccessory import LGWasherAccessory as HAPLGWasherAccessory
+from bridges.mapping import DeviceMapping, FieldMap, MappingRegistry
+from bridges.smartthings.LGWasherAccessory import (
+    HealthStatus,
+    LGWasherAccessory as STLGWasherAccessory,
+    MachineState,
+    WasherJobState,
+)
+
+DEVICE_MAPPINGS = MappingRegistry()
+
+
+# ----------------------------------------------------------------------
+# Lavadora LG
+# ----------------------------------------------------------------------
+
+LG_WASHER_RUN_STATES = (
+    'INITIAL', 'DETECTING', 'SOAKING', 'RUNNING', 'DRYING', 'RINSING', 'SPINNING', 'COOL_DOWN',
+    'REFRESHING', 'STEAM_SOFTENING', 'SMART_GRID_RUN', 'ADD_DRAIN', 'DETERGENT_AMOUNT', 'PREWASH',
+    'SHOES_MODULE', 'PROOFING', 'DISPENSING', 'SOFTENING', 'CHECKING_TURBIDITY', 'CHANGE_CONDITION',
+    'DISPLAY_LOADSIZE', 'FROZEN_PREVENT_INITIAL', 'FROZEN_PREVENT_RUNNING',
+)
+LG_WASHER_PAUSE_STATES = ('PAUSE', 'RESERVED', 'RINSE_HOLD', 'ERROR', 'FROZEN_PREVENT_PAUSE')
+
+# Estado LG -> washerJobState de SmartThings
+LG_WASHER_JOB_STATES = {
+    "COOL_DOWN": WasherJobState.COOLING,
+    "DRYING": WasherJobState.DRYING,
+    "FINISH": WasherJobState.FINISH,
+    "END": WasherJobState.FINISH,
+    "PREWASH": WasherJobState.PRE_WASH,
+    "RINSING": WasherJobState.RINSE,
+    "SPINNING": WasherJobState.SPIN,
+    "RUNNING": WasherJobState.WASH,
+    "DETECTING": WasherJobState.WEIGHT_SENSING,
+    "INITIAL": WasherJobState.WEIGHT_SENSING,
+    "SOAKING": WasherJobState.WASH,
+    "REFRESHING": WasherJobState.AIR_WASH,
+    "STEAM_SOFTENING": WasherJobState.AIR_WASH,
+    "SMART_GRID_RUN": WasherJobState.WASH,
+    "ADD_DRAIN": WasherJobState.WASH,
+    "DETERGENT_AMOUNT": WasherJobState.WASH,
+    "SHOES_MODULE": WasherJobState.WASH,
+    "PROOFING": WasherJobState.WASH,
+    "DISPENSING": WasherJobState.WASH,
+    "SOFTENING": WasherJobState.WASH,
+    "CHECKING_TURBIDITY": WasherJobState.WEIGHT_SENSING,
+    "CHANGE_CONDITION": WasherJobState.WASH,
+    "DISPLAY_LOADSIZE": WasherJobState.WEIGHT_SENSING,
+    "FROZEN_PREVENT_INITIAL": WasherJobState.FREEZE_PROTECTION,
+    "FROZEN_PREVENT_RUNNING": WasherJobState.FREEZE_PROTECTION,
+    "FROZEN_PREVENT_PAUSE": WasherJobState.FREEZE_PROTECTION,
+}
+
+
+def _washer_running(state) -> int:
+    running = state.get('state') not in ('POWER_OFF', 'PAUSE') and state.get('remote_start')
+    return 1 if running else 0
+
+
+def _completion_time(remain_minutes) -> str:
+    # timedelta maneja el cambio de día (23:59 + 2 min = 00:01)
+    completion = datetime.now() + timedelta(minutes=remain_minutes or 0)
+    # ISO 8601: YYYY-MM-DDTHH:MM:SS.sssZ; al minuto (la API reporta minutos),
+    # así el valor no cambia en cada sync si el tiempo restante es el mismo
+    return completion.strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+
+WASHER_HAP_FIELDS = (
+    FieldMap('encendido', table={'POWER_OFF': 0}, default=1),
+    # Notificación de enjuague
+    FieldMap('char_status_ocupancy_detected', table={'RINSING': 1}, default=0),
+    FieldMap('char_status_ocupancy_status_tampered', table={'RINSING': 1}, default=0),
+    FieldMap('char_on', source=None, convert=_washer_running),
+    FieldMap('char_timer_value', source='remain_time_m', convert=lambda minutes: min(minutes or 0, 100)),
+)
+
+WASHER_SMARTTHINGS_FIELDS = (
+    FieldMap('health_status', table={'POWER_OFF': HealthStatus.OFFLINE}, default=HealthStatus.ONLINE,
+             normalize=str.upper, missing='POWER_OFF'),
+    FieldMap('machine_state',
+             table={**{s: MachineState.RUN for s in LG_WASHER_RUN_STATES},
+                    **{s: MachineState.PAUSE for s in LG_WASHER_PAUSE_STATES}},
+             default=MachineState.STOP, normalize=str.upper, missing='POWER_OFF'),
+    FieldMap('washer_job_state', table=LG_WASHER_JOB_STATES, default=WasherJobState.NONE,
+             normalize=str.upper, missing='POWER_OFF'),
+    FieldMap('completion_time', source='remain_time_m', convert=_completion_time, skip_missing=True),
+)
+
+DEVICE_MAPPINGS.register(DeviceMapping(
+    brand='lg',
+    device_type='washer',
+    hap_factory=HAPLGWasherAccessory.from_bridge,
+    smartthings_factory=STLGWasherAccessory.from_bridge,
+    hap_fields=WASHER_HAP_FIELDS,
+    smartthings_fields=WASHER_SMARTTHINGS_FIELDS,
+))
+
+
+# ----------------------------------------------------------------------
+# Lavadora Samsung
+# ----------------------------------------------------------------------
+
+# SamsungWasherState usa el vocabulario de estados LG y el plugin traduce
+# los WasherCommand de los accesorios a comandos SmartThings: mismos
+# accesorios y mismos campos que la lavadora LG
+DEVICE_MAPPINGS.register(DeviceMapping(
+    brand='samsung',
+    device_type='washer',
+    hap_factory=HAPLGWasherAccessory.from_bridge,
+    smartthings_factory=STLGWasherAccessory.from_bridge,
+    hap_fields=WASHER_HAP_FIELDS,
+    smartthings_fields=WASHER_SMARTTHINGS_FIELDS,
+))
+
+
+DEVICE_MAPPINGS.compile()
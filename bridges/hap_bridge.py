@@ -3,7 +3,8 @@ HAP Bridge - Traduce entre DeviceManager y HAP Service
 """
 import logging
 from typing import Dict
-from bridges.homekit.LGWasherAccessory import LGWasherAccessory
+from bridges.device_mappings import DEVICE_MAPPINGS
+from bridges.homekit.command_pipeline import CommandPipeline
 from core.device_manager import DeviceManager, DeviceState
 from services.hap_service import HAPService
 
@@ -21,6 +22,9 @@ class HAPBridge:
         
         # Mapeo: device_id -> accessory HAP
         self.accessories: Dict[str, object] = {}
+        
+        # Comandos desde HomeKit: fuera del loop de HAP, en orden por dispositivo
+        self.command_pipeline = CommandPipeline(device_manager)
     
     def add_device(self, device_state: DeviceState):
         """
@@ -51,6 +55,20 @@ class HAPBridge:
             
             logger.info(f"Dispositivo {device_state.name} agregado a HAP")
     
+    def remove_device(self, device_id: str):
+        """
+        Retirar un dispositivo del bridge HAP.
+        
+        Args:
+            device_id: ID del dispositivo
+        """
+        accessory = self.accessories.pop(device_id, None)
+        if not accessory:
+            return
+        
+        self.hap_service.remove_accessory(device_id)
+        logger.info(f"Dispositivo {device_id} retirado de HAP")
+    
     def _create_accessory(self, device_state: DeviceState):
         """
         Factory para crear accessory HAP según tipo de dispositivo.
@@ -61,22 +79,11 @@ class HAPBridge:
         Returns:
             Accessory HAP o None
         """
-        brand = device_state.brand.lower()
-        device_type = device_state.device_type.lower()
-        
-        # Importar el accessory correspondiente
-        if brand == 'lg' and 'washer' in device_type:
-            
-            return LGWasherAccessory(
-                driver=self.hap_service.driver,
-                display_name=device_state.name,
-                device_id=device_state.device_id,
-                device_manager=self.device_manager  # ✅ Pasa el manager
-            )
+        mapping = DEVICE_MAPPINGS.resolve(device_state.brand, device_state.device_type)
+        if mapping is not None and mapping.hap_factory is not None:
+            return mapping.hap_factory(self, device_state, mapping)
         
-        # Agregar más tipos de dispositivos aquí
-        
-        logger.warning(f"No hay accessory HAP para {brand} {device_type}")
+        logger.warning(f"No hay accessory HAP para {device_state.brand} {device_state.device_type}")
         return None
     
     def _on_device_state_changed(self, device_state: DeviceState):
@@ -90,6 +97,10 @@ class HAPBridge:
         device_id = device_state.device_id
         accessory = self.accessories.get(device_id)
         
+        # Nada cambió desde la última sincronización: no hay nada que pintar
+        if not device_state.changed_fields:
+            return
+        
         if accessory and hasattr(accessory, 'update_from_device_state'):
             try:
                 accessory.update_from_device_state(device_state) # Esta es la funcion que se llmam a que le dice al servicio hap que en telefono pinte el estado del dispositivo
@@ -1,111 +1,159 @@
 from pyhap.accessory import Accessory
 from pyhap.const import CATEGORY_OTHER
-import requests
-import configparser
+from bridges.homekit.char_batch import CharacteristicBatch
+from bridges.homekit.command_pipeline import CommandPipeline, OptimisticWrites
+from bridges.homekit.templates import AccessoryTemplate
+from models.LG.washer import WasherCommand
+
+DELAY_HOURS = [i for i in range(0, 20)]  # Tiempo de retardo de 1 a 19 Horas
+
+
+def _preload_service(loader, name, chars):
+    service = loader.get_service(name)
+    for char_name in chars:
+        service.add_characteristic(loader.get_char(char_name))
+    return service
+
+
+def _build_washer_services(loader):
+    """Disposición de servicios de la lavadora (se clona por dispositivo)"""
+    # --- 1. SERVICIO DE CONTROL PRINCIPAL (Usamos Television para el menú) ---
+    # El servicio 'Television' es el que permite tener la lista de selección
+    serv_main = _preload_service(loader, 'Television', ['ConfiguredName', 'ActiveIdentifier'])
+    serv_main.configure_char('Active', value=0)
+    serv_main.configure_char('ConfiguredName', value="LG Controller")
+    serv_main.configure_char('ActiveIdentifier', value=0)
+
+    # --- 2. SWITCH DE INICIAR LAVADO ---
+    # Lo añadimos como un servicio vinculado
+    serv_power = _preload_service(loader, 'Switch', ['Name'])
+    serv_power.configure_char('Name', value="Iniciar Pausar")
+    serv_power.configure_char('On', value=0)
+    serv_main.linked_services.append(serv_power)
+
+    services = {'main': serv_main, 'power': serv_power}
+
+    # --- 3. DEFINICIÓN DE TIEMPO DE RETARDO (Input Sources) ---
+    for index, time in enumerate(DELAY_HOURS):
+        input_serv = _preload_service(loader, 'InputSource', ['ConfiguredName', 'IsConfigured', 'InputSourceType', 'Identifier', 'Name'])
+        input_serv.configure_char('ConfiguredName', value=time)
+        input_serv.configure_char('IsConfigured', value=1)
+        input_serv.configure_char('InputSourceType', value=10) # 10 = Application / Modo
+        input_serv.configure_char('Identifier', value=index) # ID que recibirá el callback
+
+        # Vinculamos cada ciclo al servicio principal
+        serv_main.linked_services.append(input_serv)
+        services[f'input_{index}'] = input_serv
+
+    # 5. MOSTRAR EL TIEMPO RESTANTE
+    serv_timer = _preload_service(loader, 'HumiditySensor', ['Name', 'CurrentRelativeHumidity'])
+    serv_timer.configure_char('Name', value="Minutos Restantes")
+    services['timer'] = serv_timer
+
+    # 6. # Creamos un servicio de ocupación (que solo sirve para mostrar texto)
+    serv_status = _preload_service(loader, 'OccupancySensor', ['Name', 'StatusActive', 'StatusTampered'])
+    # Este es el objeto que cambiaremos para "pintar" texto
+    serv_status.configure_char('OccupancyDetected', value=0)
+    serv_status.configure_char('StatusActive', value=True)
+    serv_status.configure_char('StatusTampered', value=1)
+    serv_status.configure_char('Name', value="Estado: Enjuagando")
+    services['status'] = serv_status
+
+    return services
+
+
+WASHER_TEMPLATE = AccessoryTemplate('LGWasher', _build_washer_services)
+
 
 class LGWasherAccessory(Accessory):
     """Accessory to turn on/off the LG Washer."""
     category = CATEGORY_OTHER
 
-    CONFIG_DIR = './.smarthome/'
-    CONFIG_FILE = CONFIG_DIR + 'config.conf'
-    config_vars = configparser.ConfigParser()
-    config_vars.read(CONFIG_FILE, encoding='utf-8')
-    telegram_url = config_vars.get('TELEGRAM','base_url')
-    telegram_chatid = config_vars.getint('TELEGRAM','chat_id')
-    telegram_trigger = False
+    # Características que se muestran antes de que el dispositivo confirme
+    OPTIMISTIC_CHARS = ('encendido', 'char_on')
 
-    def __init__(self, driver, display_name, device_id, device_manager):
+    def __init__(self, driver, display_name, device_id, device_manager, command_pipeline=None, state_map=None):
         super().__init__(driver=driver, display_name=display_name)
 
         self.device_id = device_id
         self.device_manager = device_manager
+        # Traducción estado -> características (bridges.device_mappings)
+        self.state_map = state_map
+        # Los comandos salen del loop de HAP; la UI se actualiza de inmediato
+        self.commands = command_pipeline or CommandPipeline(device_manager)
+        self.optimistic = OptimisticWrites()
 
         self.is_paused = True
         self.delay = 0
 
-        # --- 1. SERVICIO DE CONTROL PRINCIPAL (Usamos Television para el menú) ---
-        # El servicio 'Television' es el que permite tener la lista de selección
-        self.serv_main = self.add_preload_service('Television', chars=['ConfiguredName', 'ActiveIdentifier'])
-        self.encendido = self.serv_main.configure_char('Active', setter_callback=self.set_power, value=0)
-        self.serv_main.configure_char('ConfiguredName', value="LG Controller")
-        self.char_active_input = self.serv_main.configure_char('ActiveIdentifier', setter_callback=self.set_delay_time, value=0)
-
-        # --- 2. SWITCH DE INICIAR LAVADO ---
-        # Lo añadimos como un servicio vinculado
-        self.serv_power = self.add_preload_service('Switch', chars=['Name'])
-        self.serv_power.configure_char('Name', value="Iniciar Pausar")
-        self.char_on = self.serv_power.configure_char('On', setter_callback=self.set_pause_resume, value=0)
-        self.serv_main.add_linked_service(self.serv_power)
-
-        # --- 3. DEFINICIÓN DE TIEMPO DE RETRASO (Input Sources) ---
-        self.tiempo_retardo = [i for i in range(0, 20)]  # Tiempo de retardo de 1 a 19 Horas
-
-        for index, time in enumerate(self.tiempo_retardo):
-            input_serv = self.add_preload_service('InputSource', chars=['ConfiguredName', 'IsConfigured', 'InputSourceType', 'Identifier', 'Name'])
-            input_serv.configure_char('ConfiguredName', value=time)
-            input_serv.configure_char('IsConfigured', value=1)
-            input_serv.configure_char('InputSourceType', value=10) # 10 = Application / Modo
-            input_serv.configure_char('Identifier', value=index) # ID que recibirá el callback
-            
-            # Vinculamos cada ciclo al servicio principal
-            self.serv_main.add_linked_service(input_serv)
-
-        # 5. MOSTRAR EL TIEMPO RESTANTE
-        self.serv_timer = self.add_preload_service('HumiditySensor', chars=['Name', 'CurrentRelativeHumidity'])
-        self.serv_timer.configure_char('Name', value="Minutos Restantes")
+        # Servicios clonados de la plantilla (se construye una vez por tipo)
+        services = WASHER_TEMPLATE.apply(self)
+        self.serv_main = services['main']
+        self.serv_power = services['power']
+        self.serv_timer = services['timer']
+        self.serv_status = services['status']
+
+        self.encendido = self.serv_main.get_characteristic('Active')
+        self.encendido.setter_callback = self.set_power
+        self.char_active_input = self.serv_main.get_characteristic('ActiveIdentifier')
+        self.char_active_input.setter_callback = self.set_delay_time
+        self.char_on = self.serv_power.get_characteristic('On')
+        self.char_on.setter_callback = self.set_pause_resume
+
+        self.tiempo_retardo = DELAY_HOURS
         self.char_timer_value = self.serv_timer.get_characteristic('CurrentRelativeHumidity')
-        self.char_timer_value.set_value(0) # Inicia en 0 minutos
-        
-        # 6. # Creamos un servicio de ocupación (que solo sirve para mostrar texto)
-        self.serv_status = self.add_preload_service('OccupancySensor', chars=['Name', 'StatusActive', 'StatusTampered'])
-        # Este es el objeto que cambiaremos para "pintar" texto
-        self.char_status_ocupancy_detected = self.serv_status.configure_char('OccupancyDetected', value=0)  
-        self.serv_status.configure_char('StatusActive', value=True)
-        self.char_status_ocupancy_status_tampered = self.serv_status.configure_char('StatusTampered', value=1)
-        self.serv_status.configure_char('Name', value="Estado: Enjuagando")
+        self.char_status_ocupancy_detected = self.serv_status.get_characteristic('OccupancyDetected')
+        self.char_status_ocupancy_status_tampered = self.serv_status.get_characteristic('StatusTampered')
+
+    @classmethod
+    def from_bridge(cls, bridge, device_state, mapping):
+        """Fábrica usada por el registro de mapeos"""
+        return cls(
+            driver=bridge.hap_service.driver_for(device_state.device_id),
+            display_name=device_state.name,
+            device_id=device_state.device_id,
+            device_manager=bridge.device_manager,
+            command_pipeline=bridge.command_pipeline,
+            state_map=mapping.hap
+        )
 
     def set_power(self, value):
-        command = {
-            'location': {
-                'locationName': 'MAIN',
-            },
-            'operation': {
-                'washerOperationMode': 'POWER_OFF'
-            }
-        }
-        self.device_manager.send_command(self.device_id, command)
+        command = WasherCommand(location_name='MAIN', operation_mode='POWER_OFF')
         self.encendido.set_value(0)
+        self._send_optimistic(command, self.encendido, 0, 1 - value)
 
     def set_pause_resume(self, value):
         if self.is_paused:
-            command = {
-                'location': {
-                    'locationName': 'MAIN',
-                },
-                'operation': {
-                    'washerOperationMode': 'START'
-                },
-                'timer': {
-                    'relativeHourToStart': self.delay
-                }
-            }
+            command = WasherCommand(location_name='MAIN', operation_mode='START', reserve_time_h=self.delay)
             print("LG Washer is turned ON")
-            self.device_manager.send_command(self.device_id, command)
             self.char_on.set_value(1)
+            self.is_paused = False
+            self._send_optimistic(command, self.char_on, 1, 0)
         else:
-            command = {
-                'location': {
-                    'locationName': 'MAIN',
-                },
-                'operation': {
-                    'washerOperationMode': 'STOP'
-                }
-            }
+            command = WasherCommand(location_name='MAIN', operation_mode='STOP')
             print("LG Washer is turned OFF")
-            self.device_manager.send_command(self.device_id, command)
             self.char_on.set_value(0)
-            
+            self.is_paused = True
+            self._send_optimistic(command, self.char_on, 0, 1)
+
+    def _send_optimistic(self, command, char, expected, previous):
+        """Encolar el comando; si falla, revertir la característica"""
+        self.optimistic.expect(char, expected, previous)
+
+        def on_done(ok):
+            if not ok:
+                self._rollback(char)
+
+        self.commands.submit(self.device_id, command, on_done)
+
+    def _rollback(self, char):
+        previous = self.optimistic.fail(char)
+        if previous is None:
+            return
+        with CharacteristicBatch(self.driver) as batch:
+            batch.set(char, previous)
+        if char is self.char_on:
+            self.is_paused = not previous
 
     def set_delay_time(self, value):
         # 'value' será el número (index) que seleccionaste
@@ -120,26 +168,20 @@ class LGWasherAccessory(Accessory):
         Args:
             state: WasherState obtenido del plugin
         """
-        # Actualizar estado de encendido
-        self.encendido.set_value(1 if state.state.get('state') != "POWER_OFF" else 0)
-        # Actualiza notificacion para centrifugado
-        if state.state.get('state') == "RINSING":
-            self.char_status_ocupancy_detected.set_value(1)
-            self.char_status_ocupancy_status_tampered.set_value(1)
-            if self.telegram_trigger == False:
-                requests.get(url=self.telegram_url, json={"chat_id": self.telegram_chatid, "text": "La lavadora termino de lavar y ahora va a enjuagar"})
-                self.telegram_trigger = True
-        else:
-            self.char_status_ocupancy_detected.set_value(0)
-            self.char_status_ocupancy_status_tampered.set_value(0)
-            self.telegram_trigger = False
+        # Solo se escriben los valores que cambiaron y se notifican en un solo bloque
+        with CharacteristicBatch(self.driver) as batch:
+            self._apply_device_state(batch, state)
 
-        # Actualizar estado de boton iniciar/pausar
-        if state.state.get('state') != "POWER_OFF" and state.state.get('state') != "PAUSE" and state.state.get('remote_start'):
-            self. is_paused = False
-            self.char_on.set_value(1)
-        else:
-            self.is_paused = True
-            self.char_on.set_value(0)
-        # Actualizar tiempo restante
-        self.char_timer_value.set_value(min(state.state.get('remain_time_m', 0), 100))
+    def _apply_device_state(self, batch: CharacteristicBatch, state):
+        if self.state_map is None:
+            from bridges.device_mappings import DEVICE_MAPPINGS
+            self.state_map = DEVICE_MAPPINGS.resolve('lg', 'washer').hap
+
+        for target, value in self.state_map.apply(state.state).items():
+            char = getattr(self, target)
+            if target in self.OPTIMISTIC_CHARS:
+                # Respetar un comando en curso
+                value = self.optimistic.reconcile(char, value)
+            batch.set(char, value)
+
+        self.is_paused = not self.char_on.value
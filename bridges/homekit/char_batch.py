@@ -0,0 +1,69 @@
+"""
+Actualización en bloque de características HAP.
+
+Compara cada valor con el actual de la característica y descarta las
+escrituras que no cambian nada; las que sí cambian se notifican a los
+controladores iOS en una sola llamada al loop del driver.
+"""
+import logging
+import threading
+from typing import Any, List
+
+from pyhap.characteristic import Characteristic
+
+logger = logging.getLogger(__name__)
+
+
+def _notify_all(chars: List[Characteristic]):
+    for char in chars:
+        if char.broker is not None:
+            char.notify()
+
+
+class CharacteristicBatch:
+    """
+    Uso:
+        with CharacteristicBatch(self.driver) as batch:
+            batch.set(self.char_on, 1)
+            batch.set(self.char_timer_value, 42)
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.changed: List[Characteristic] = []
+
+    def set(self, char: Characteristic, value: Any) -> bool:
+        """
+        Escribir un valor sin notificar todavía.
+
+        Returns:
+            True si el valor cambió
+        """
+        value = char.to_valid_value(value)
+        if value == char.value:
+            return False
+
+        char.set_value(value, should_notify=False)
+        self.changed.append(char)
+        return True
+
+    def flush(self):
+        """Notificar todos los cambios acumulados"""
+        changed, self.changed = self.changed, []
+        if not changed:
+            return
+
+        loop = getattr(self.driver, 'loop', None)
+        if loop is None or loop.is_closed() or threading.current_thread() == getattr(self.driver, 'tid', None):
+            _notify_all(changed)
+        else:
+            # Un solo salto al loop del driver para todos los eventos
+            loop.call_soon_threadsafe(_notify_all, changed)
+        logger.debug(f"{len(changed)} características notificadas")
+
+    def __enter__(self) -> 'CharacteristicBatch':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
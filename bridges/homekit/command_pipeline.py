@@ -0,0 +1,129 @@
+"""
+Comandos HomeKit fuera del loop de HAP.
+
+Los setters de pyhap corren en el loop del driver: una llamada HTTP ahí
+congela a todos los accesorios. CommandPipeline envía los comandos desde un
+pool de hilos (en orden por dispositivo) y OptimisticWrites recuerda el
+valor que se mostró de inmediato en Home para reconciliarlo con el estado
+real, o revertirlo si el comando falla o el dispositivo no lo refleja.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from pyhap.characteristic import Characteristic
+
+logger = logging.getLogger(__name__)
+
+
+class CommandPipeline:
+    """
+    Cola de comandos por dispositivo sobre un pool de hilos compartido.
+    Los comandos de un mismo dispositivo se ejecutan en el orden de llegada;
+    los de dispositivos distintos, en paralelo.
+    """
+
+    def __init__(self, device_manager, max_workers: int = 4):
+        self.device_manager = device_manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="HAPCommand")
+        self._queues: Dict[str, Deque[Tuple[Any, Optional[Callable[[bool], None]]]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, device_id: str, command: Any, callback: Optional[Callable[[bool], None]] = None):
+        """
+        Encolar un comando sin bloquear.
+
+        Args:
+            device_id: ID del dispositivo
+            command: Comando para DeviceManager.send_command
+            callback: callback(ok) al terminar (se ejecuta en el pool)
+        """
+        with self._lock:
+            queue = self._queues.get(device_id)
+            if queue is not None:
+                # Ya hay un hilo vaciando la cola de este dispositivo
+                queue.append((command, callback))
+                return
+            self._queues[device_id] = deque([(command, callback)])
+        self._executor.submit(self._drain, device_id)
+
+    def _drain(self, device_id: str):
+        while True:
+            with self._lock:
+                queue = self._queues[device_id]
+                if not queue:
+                    del self._queues[device_id]
+                    return
+                command, callback = queue.popleft()
+
+            try:
+                ok = self.device_manager.send_command(device_id, command)
+            except Exception as e:
+                logger.error(f"Error enviando comando a {device_id}: {e}")
+                ok = False
+
+            if callback:
+                try:
+                    callback(ok)
+                except Exception as e:
+                    logger.error(f"Error en callback de comando: {e}")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class OptimisticWrites:
+    """
+    Valores mostrados en Home antes de que el dispositivo los confirme.
+
+    Mientras dure la ventana de gracia el estado leído del dispositivo no
+    pisa el valor optimista (la API suele tardar en reflejar el comando);
+    al coincidir se da por confirmado y al vencer gana el estado real.
+    """
+
+    def __init__(self, grace: float = 20.0):
+        self.grace = grace
+        self._pending: Dict[int, Tuple[Any, Any, float]] = {}  # id(char) -> (esperado, anterior, límite)
+        self._lock = threading.Lock()
+
+    def expect(self, char: Characteristic, expected: Any, previous: Any):
+        """Registrar el valor optimista de una característica"""
+        with self._lock:
+            self._pending[id(char)] = (expected, previous, time.monotonic() + self.grace)
+
+    def reconcile(self, char: Characteristic, actual: Any) -> Any:
+        """
+        Valor a mostrar dado el estado real del dispositivo.
+
+        Returns:
+            El valor optimista si sigue pendiente; el real en otro caso
+        """
+        with self._lock:
+            pending = self._pending.get(id(char))
+            if pending is None:
+                return actual
+
+            expected, _, deadline = pending
+            if actual == expected:
+                del self._pending[id(char)]  # Confirmado por el dispositivo
+                return actual
+            if time.monotonic() < deadline:
+                return expected
+
+            del self._pending[id(char)]
+        logger.warning(f"{char.display_name}: el dispositivo no reflejó {expected}, se muestra {actual}")
+        return actual
+
+    def fail(self, char: Characteristic) -> Optional[Any]:
+        """
+        El comando falló: descartar el valor optimista.
+
+        Returns:
+            Valor anterior a restaurar (None si no había nada pendiente)
+        """
+        with self._lock:
+            pending = self._pending.pop(id(char), None)
+        return pending[1] if pending else None
@@ -0,0 +1,104 @@
+"""
+Plantillas de accesorios HAP.
+
+Crear un servicio con add_preload_service copia su definición JSON, crea
+cada característica desde el loader y valida sus propiedades; en accesorios
+con muchos servicios (la lavadora tiene 24) eso se repite por dispositivo.
+AccessoryTemplate construye la disposición de servicios y características
+una sola vez por tipo de accesorio y la clona para cada dispositivo copiando
+solo los atributos de cada objeto.
+"""
+import logging
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from pyhap.characteristic import Characteristic
+from pyhap.service import Service
+
+logger = logging.getLogger(__name__)
+
+# Construye los servicios de la plantilla: {etiqueta: servicio}, en el orden
+# en que se agregan al accesorio (el orden define los IIDs)
+TemplateBuilder = Callable[[object], Dict[str, Service]]
+
+
+def _clone_char(char: Characteristic, service: Service) -> Characteristic:
+    clone = Characteristic.__new__(type(char))
+    for slot in Characteristic.__slots__:
+        setattr(clone, slot, getattr(char, slot))
+    # override_properties modifica el dict en sitio: cada copia tiene el suyo
+    clone._properties = dict(char._properties)
+    clone.broker = None
+    clone.service = service
+    clone.getter_callback = None
+    clone.setter_callback = None
+    clone._to_hap_cache = None
+    clone._to_hap_cache_with_value = None
+    return clone
+
+
+def _clone_service(service: Service) -> Service:
+    clone = Service.__new__(type(service))
+    for slot in Service.__slots__:
+        setattr(clone, slot, getattr(service, slot))
+    clone.broker = None
+    clone.setter_callback = None
+    clone.characteristics = [_clone_char(char, clone) for char in service.characteristics]
+    clone.linked_services = []
+    return clone
+
+
+class AccessoryTemplate:
+    """
+    Disposición de servicios compartida por todos los accesorios de un tipo.
+
+    Uso:
+        WASHER_TEMPLATE = AccessoryTemplate('LGWasher', _build_washer)
+
+        services = WASHER_TEMPLATE.apply(self)
+        self.serv_main = services['main']
+    """
+
+    def __init__(self, name: str, builder: TemplateBuilder):
+        self.name = name
+        self.builder = builder
+        self._layouts: Dict[int, Tuple[object, List[Tuple[str, Service]]]] = {}
+        self._lock = threading.Lock()
+
+    def _layout(self, loader) -> List[Tuple[str, Service]]:
+        """Servicios de referencia para un loader (se construyen una vez)"""
+        entry = self._layouts.get(id(loader))
+        if entry is not None and entry[0] is loader:
+            return entry[1]
+
+        with self._lock:
+            entry = self._layouts.get(id(loader))
+            if entry is None or entry[0] is not loader:
+                layout = list(self.builder(loader).items())
+                entry = (loader, layout)
+                self._layouts[id(loader)] = entry
+                logger.debug(f"Plantilla {self.name}: {len(layout)} servicios")
+        return entry[1]
+
+    def apply(self, accessory) -> Dict[str, Service]:
+        """
+        Agregar al accesorio una copia de los servicios de la plantilla.
+
+        Los valores y propiedades se copian; los callbacks no (cada
+        accesorio asigna los suyos sobre las características devueltas).
+
+        Args:
+            accessory: Accesorio recién creado
+
+        Returns:
+            {etiqueta: servicio} con los servicios ya agregados al accesorio
+        """
+        layout = self._layout(accessory.driver.loader)
+
+        clones = {id(service): _clone_service(service) for _, service in layout}
+        for _, service in layout:
+            clones[id(service)].linked_services = [clones[id(linked)] for linked in service.linked_services]
+
+        services = {label: clones[id(service)] for label, service in layout}
+        accessory.add_service(*services.values())
+        return services
@@ -0,0 +1,171 @@
+"""
+Mapeo declarativo dispositivo -> accesorio.
+
+Cada tipo de dispositivo se declara una vez (marca, tipo, clases de
+accesorio y cómo se traducen los campos de su estado a características HAP
+y atributos SmartThings). MappingRegistry.compile() convierte esas
+declaraciones en tablas de despacho: crear un accesorio o traducir un
+estado es una búsqueda en dict, y un tipo nuevo no requiere tocar los
+bridges.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FieldMap:
+    """
+    Un atributo destino calculado a partir del estado del dispositivo.
+
+    Args:
+        target: Atributo del accesorio que recibe el valor
+        source: Campo del estado (None = convert recibe el estado completo)
+        table: Valor del campo -> valor destino
+        default: Valor destino si el valor del campo no está en table
+        convert: Función del valor del campo (alternativa a table)
+        normalize: Se aplica a los valores str antes de buscar en table
+        missing: Valor del campo cuando no viene en el estado
+        skip_missing: Si el campo no viene, no tocar el atributo
+    """
+    target: str
+    source: Optional[str] = 'state'
+    table: Optional[Mapping[Any, Any]] = None
+    default: Any = None
+    convert: Optional[Callable[[Any], Any]] = None
+    normalize: Optional[Callable[[str], str]] = None
+    missing: Any = None
+    skip_missing: bool = False
+
+    def compile(self) -> Callable[[Dict], Any]:
+        """Función estado -> valor destino especializada para esta declaración"""
+        source, missing, default = self.source, self.missing, self.default
+        normalize, convert = self.normalize, self.convert
+
+        if source is None:
+            if convert is None:
+                raise ValueError(f"{self.target}: sin source se requiere convert")
+            return convert
+
+        if self.table is not None:
+            table = dict(self.table)
+            if normalize is not None:
+                def lookup(state: Dict) -> Any:
+                    value = state.get(source, missing)
+                    if isinstance(value, str):
+                        value = normalize(value)
+                    return table.get(value, default)
+                return lookup
+            return lambda state: table.get(state.get(source, missing), default)
+
+        if convert is not None:
+            return lambda state: convert(state.get(source, missing))
+        return lambda state: state.get(source, missing)
+
+
+class CompiledFields:
+    """Lista de FieldMap lista para aplicar sobre cada estado"""
+
+    def __init__(self, fields: Tuple[FieldMap, ...]):
+        self._fields: List[Tuple[str, Optional[str], bool, Callable[[Dict], Any]]] = [
+            (field.target, field.source, field.skip_missing, field.compile()) for field in fields
+        ]
+        self.targets: Tuple[str, ...] = tuple(field.target for field in fields)
+
+    def apply(self, state: Dict) -> Dict[str, Any]:
+        """
+        Traducir un estado.
+
+        Returns:
+            {atributo destino: valor}
+        """
+        values = {}
+        for target, source, skip_missing, getter in self._fields:
+            if skip_missing and source not in state:
+                continue
+            values[target] = getter(state)
+        return values
+
+
+@dataclass(frozen=True)
+class DeviceMapping:
+    """
+    Declaración de un tipo de dispositivo.
+
+    Las fábricas reciben (bridge, device_state, mapping compilado) y
+    devuelven el accesorio o None.
+
+    Args:
+        brand: Marca del plugin (en minúsculas)
+        device_type: Se busca como subcadena del tipo reportado (p. ej. 'washer')
+    """
+    brand: str
+    device_type: str
+    hap_factory: Optional[Callable] = None
+    smartthings_factory: Optional[Callable] = None
+    hap_fields: Tuple[FieldMap, ...] = ()
+    smartthings_fields: Tuple[FieldMap, ...] = ()
+
+
+class CompiledMapping:
+    """DeviceMapping con sus tablas de campos compiladas"""
+
+    def __init__(self, mapping: DeviceMapping):
+        self.mapping = mapping
+        self.brand = mapping.brand.lower()
+        self.device_type = mapping.device_type.lower()
+        self.hap_factory = mapping.hap_factory
+        self.smartthings_factory = mapping.smartthings_factory
+        self.hap = CompiledFields(mapping.hap_fields)
+        self.smartthings = CompiledFields(mapping.smartthings_fields)
+
+
+class MappingRegistry:
+    """Registro (marca, tipo de dispositivo) -> mapeo compilado"""
+
+    def __init__(self):
+        self._mappings: List[DeviceMapping] = []
+        self._compiled: List[CompiledMapping] = []
+        self._table: Dict[Tuple[str, str], Optional[CompiledMapping]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, mapping: DeviceMapping) -> DeviceMapping:
+        """Registrar un tipo de dispositivo (llamar a compile() después)"""
+        with self._lock:
+            self._mappings.append(mapping)
+        return mapping
+
+    def compile(self):
+        """Compilar las declaraciones y vaciar la tabla de despacho"""
+        with self._lock:
+            self._compiled = [CompiledMapping(mapping) for mapping in self._mappings]
+            self._table = {}
+        logger.debug(f"{len(self._compiled)} mapeos de dispositivos compilados")
+
+    def resolve(self, brand: str, device_type: str) -> Optional[CompiledMapping]:
+        """
+        Mapeo de un dispositivo.
+
+        La primera consulta de cada (marca, tipo) recorre las declaraciones;
+        las siguientes son una búsqueda en la tabla.
+
+        Returns:
+            Mapeo compilado o None si el tipo no está declarado
+        """
+        key = (brand.lower(), device_type.lower())
+        try:
+            return self._table[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            match = next(
+                (compiled for compiled in self._compiled
+                 if compiled.brand == key[0] and compiled.device_type in key[1]),
+                None
+            )
+            self._table[key] = match
+        return match
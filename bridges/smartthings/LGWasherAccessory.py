@@ -2,11 +2,26 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional
 import logging
-from datetime import datetime, timedelta
 import time
 
+import orjson
+
+from models.LG.washer import WasherCommand
+
 logger = logging.getLogger(__name__)
 
+# Campos que aparecen en cada respuesta (ver to_discovery_dict / state_refresh_request)
+DISCOVERY_FIELDS = frozenset({
+    'external_device_id', 'device_cookie', 'friendly_name', 'device_handler_type',
+    'manufacturer_name', 'model_name', 'hw_version', 'sw_version',
+    'room_name', 'groups', 'categories',
+})
+STATE_FIELDS = frozenset({
+    'external_device_id', 'device_cookie',
+    'health_status', 'completion_time', 'machine_state', 'washer_job_state',
+})
+_MISSING = object()
+
 
 class MachineState(str, Enum):
     PAUSE = "pause"
@@ -68,6 +83,56 @@ class LGWasherAccessory:
     # SmartThings service (inyectado desde el bridge)
     smartthings_service: Optional[object] = field(default=None, repr=False, init=False)
 
+    # Traducción estado -> atributos (bridges.device_mappings)
+    state_map: Optional[object] = field(default=None, repr=False, init=False)
+
+    # Fragmentos JSON ya codificados: (generación, bytes). La generación sube
+    # cuando cambia un campo del fragmento (asignar, no mutar listas/dicts)
+    _discovery_generation: int = field(default=0, repr=False, init=False, compare=False)
+    _state_generation: int = field(default=0, repr=False, init=False, compare=False)
+    _discovery_cache: Optional[tuple] = field(default=None, repr=False, init=False, compare=False)
+    _state_cache: Optional[tuple] = field(default=None, repr=False, init=False, compare=False)
+
+    def __setattr__(self, name, value):
+        if name in DISCOVERY_FIELDS or name in STATE_FIELDS:
+            if getattr(self, name, _MISSING) == value:
+                return
+            object.__setattr__(self, name, value)
+            if name in DISCOVERY_FIELDS:
+                object.__setattr__(self, '_discovery_generation', getattr(self, '_discovery_generation', 0) + 1)
+            if name in STATE_FIELDS:
+                object.__setattr__(self, '_state_generation', getattr(self, '_state_generation', 0) + 1)
+            return
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_bridge(cls, bridge, device_state, mapping):
+        """
+        Fábrica usada por el registro de mapeos.
+
+        Returns:
+            Accesorio o None si el dispositivo no está en el archivo de dispositivos
+        """
+        device = bridge.device_config(device_state.device_id)
+        if device is None:
+            return None
+        access = cls(
+            external_device_id=device["externalDeviceId"],
+            friendly_name=device["friendlyName"],
+            device_handler_type=device["deviceHandlerType"],
+            manufacturer_name=device["manufacturerName"],
+            model_name=device["modelName"],
+            hw_version=device["hwVersion"],
+            sw_version=device["swVersion"],
+            room_name=device["roomName"],
+            groups=device["groups"],
+            categories=device["categories"]
+        )
+        access.state_map = mapping.smartthings
+        access.set_device_manager(bridge.device_manager)
+        access.set_smartthings_service(bridge.smartthings_service)
+        return access
+
 
     def to_discovery_dict(self) -> Dict:
         """
@@ -127,6 +192,22 @@ class LGWasherAccessory:
             ]
         }
     
+    def discovery_fragment(self) -> bytes:
+        """to_discovery_dict() codificado; se recalcula solo si cambian los metadatos"""
+        generation = self._discovery_generation
+        cached = self._discovery_cache
+        if cached is None or cached[0] != generation:
+            cached = self._discovery_cache = (generation, orjson.dumps(self.to_discovery_dict()))
+        return cached[1]
+
+    def state_fragment(self) -> bytes:
+        """state_refresh_request() codificado; se recalcula solo si cambia el estado"""
+        generation = self._state_generation
+        cached = self._state_cache
+        if cached is None or cached[0] != generation:
+            cached = self._state_cache = (generation, orjson.dumps(self.state_refresh_request()))
+        return cached[1]
+
     def to_command_request(self) -> Dict:
         """
         Send device info formated to function command_request()
@@ -199,97 +280,17 @@ class LGWasherAccessory:
             logger.warning(f"DeviceState inválido para {self.external_device_id}")
             return
         
-        state = device_state.state.get("state", "POWER_OFF").upper()
-
-        # Actualizar health_status según conectividad del dispositivo
-        if state == "POWER_OFF":
-            self.health_status = HealthStatus.OFFLINE
-        else:
-            self.health_status = HealthStatus.ONLINE
-
-        # Mapear estado del dispositivo a machine_state
-        device_operation_state = device_state.state.get("state").upper()  # Ejemplo: MAIN, WASH, RINSING, etc.
-        if device_operation_state in ('INITIAL', 'DETECTING', 'SOAKING','RUNNING', 'DRYING', 'RINSING', 'SPINNING', 'COOL_DOWN', 'REFRESHING', 'STEAM_SOFTENING', 'SMART_GRID_RUN', 'ADD_DRAIN', 'DETERGENT_AMOUNT', 'PREWASH', 'SHOES_MODULE', 'PROOFING', 'DISPENSING', 'SOFTENING', 'CHECKING_TURBIDITY', 'CHANGE_CONDITION', 'DISPLAY_LOADSIZE', 'FROZEN_PREVENT_INITIAL', 'FROZEN_PREVENT_RUNNING'):
-            self.machine_state = MachineState.RUN
-        elif device_operation_state in ('PAUSE', 'RESERVED', 'RINSE_HOLD', 'ERROR', 'FROZEN_PREVENT_PAUSE'):
-            self.machine_state = MachineState.PAUSE
-        else:  # POWER_OFF, STOP, etc.
-            self.machine_state = MachineState.STOP
-
-        # Mapear estado específico del lavado a washer_job_state
-        # LG devuelve: "COOL_DOWN", "DRYING", "FINISH", "PREWASH", "RINSING", "SPINNING", "RUNNING", "DETECTING"
-        # Estos nombres coinciden con los nombres de las variables en WasherJobState
-        job_state_str = device_state.state.get("state", "POWER_OFF").upper()
-        
-        # Mapeo directo de estado LG a nombre de enum WasherJobState
-        lg_to_enum_name = {
-            "COOL_DOWN": "COOLING",
-            "DRYING": "DRYING",
-            "FINISH": "FINISH",
-            "END": "FINISH",
-            "PREWASH": "PRE_WASH",
-            "RINSING": "RINSE",
-            "SPINNING": "SPIN",
-            "RUNNING": "WASH",
-            "DETECTING": "WEIGHT_SENSING",
-            "INITIAL": "WEIGHT_SENSING",
-            "SOAKING": "WASH",
-            "REFRESHING": "AIR_WASH",
-            "STEAM_SOFTENING": "AIR_WASH",
-            "SMART_GRID_RUN": "WASH",
-            "ADD_DRAIN": "WASH",
-            "DETERGENT_AMOUNT": "WASH",
-            "SHOES_MODULE": "WASH",
-            "PROOFING": "WASH",
-            "DISPENSING": "WASH",
-            "SOFTENING": "WASH",
-            "CHECKING_TURBIDITY": "WEIGHT_SENSING",
-            "CHANGE_CONDITION": "WASH",
-            "DISPLAY_LOADSIZE": "WEIGHT_SENSING",
-            "FROZEN_PREVENT_INITIAL": "FREEZE_PROTECTION",
-            "FROZEN_PREVENT_RUNNING": "FREEZE_PROTECTION",
-            "FROZEN_PREVENT_PAUSE": "FREEZE_PROTECTION",
-            "PAUSE": "NONE",
-            "RESERVED": "NONE",
-            "RINSE_HOLD": "NONE",
-            "ERROR": "NONE",
-            "POWER_OFF": "NONE",
-            "STOP": "NONE",
-        }
-        
-        try:
-            enum_name = lg_to_enum_name.get(job_state_str, "NONE")
-            self.washer_job_state = WasherJobState[enum_name]  # ✅ Acceso por nombre
-            #logger.info(f"LG state '{job_state_str}' → Enum name '{enum_name}' → SmartThings value '{self.washer_job_state.value}'")
-        except KeyError:
-            self.washer_job_state = WasherJobState.NONE
-            logger.warning(f"Estado de trabajo desconocido: {job_state_str}")
-
-        # Actualizar tiempo de completación (si está disponible)
-        if 'remain_time_m' in device_state.state:
-            remain_minutes = device_state.state.get('remain_time_m', 0)
-            
-            # Obtener hora actual
-            now = datetime.now()
-            
-            # Calcular la hora de finalización: ahora + remain_minutes
-            # datetime.timedelta maneja automáticamente el cambio de día
-            # Ejemplo: 23:59 + 2 minutos = 00:01 del siguiente día
-            completion_datetime = now + timedelta(minutes=remain_minutes)
-            
-            # Convertir a formato ISO 8601: YYYY-MM-DDTHH:MM:SS.sssZ
-            self.completion_time = completion_datetime.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
-
-        # Notificar a SmartThings del cambio de estado
+        if self.state_map is None:
+            from bridges.device_mappings import DEVICE_MAPPINGS
+            self.state_map = DEVICE_MAPPINGS.resolve('lg', 'washer').smartthings
+
+        # health_status, machine_state, washer_job_state y completion_time
+        for target, value in self.state_map.apply(device_state.state).items():
+            setattr(self, target, value)
+
+        # Notificar a SmartThings del cambio de estado (agrupado con otros dispositivos)
         if self.smartthings_service:
-            try:
-                self.smartthings_service.send_device_status([self])
-            except Exception as e:
-                logger.error(f"Error sending device status: {e}")
-                try:
-                    self.smartthings_service.refresh_token()
-                except Exception as e2:
-                    logger.error(f"Error refreshing token: {e2}")
+            self.smartthings_service.queue_device_status(self)
 
     def set_device_manager(self, device_manager):
         """
@@ -323,12 +324,12 @@ class LGWasherAccessory:
             }
 
         Returns:
-            Dict con comando en formato LG API o None si no se puede traducir
+            WasherCommand (validado y compilado por el plugin LG) o None si no se puede traducir
 
         Ejemplos de traducción:
-        - ST: {attribute: "machineState", value: "run"} → LG: {operation: {washerOperationMode: "START"}}
-        - ST: {attribute: "machineState", value: "pause"} → LG: {operation: {washerOperationMode: "STOP"}}
-        - ST: {attribute: "machineState", value: "stop"} → LG: {operation: {washerOperationMode: "POWER_OFF"}}
+        - ST: {attribute: "machineState", value: "run"} → WasherCommand(operation_mode="START")
+        - ST: {attribute: "machineState", value: "pause"} → WasherCommand(operation_mode="STOP")
+        - ST: {attribute: "machineState", value: "stop"} → WasherCommand(operation_mode="POWER_OFF")
         """
         if not st_command:
             return None
@@ -339,20 +340,15 @@ class LGWasherAccessory:
         # Mapeo: machineState → operation/washerOperationMode
         if attribute == 'machinestate':
             if value == 'run':
-                return {'operation': {'washerOperationMode': 'START'}}
+                return WasherCommand(operation_mode='START')
             elif value == 'pause':
-                return {'operation': {'washerOperationMode': 'STOP'}}
+                return WasherCommand(operation_mode='STOP')
             elif value == 'stop':
-                return {'operation': {'washerOperationMode': 'POWER_OFF'}}
+                return WasherCommand(operation_mode='POWER_OFF')
 
-        # Mapeo: completionTime → délai de inicio
+        # Mapeo: completionTime → horas de retraso de inicio (el rango lo valida el perfil)
         elif attribute == 'completiontime' and value.isdigit():
-            try:
-                hours = int(value) // 60
-                if 0 <= hours <= 19:
-                    return {'reserveTime_H': hours}
-            except (ValueError, ZeroDivisionError):
-                pass
+            return WasherCommand(reserve_time_h=int(value) // 60)
 
         logger.warning(f"No se puede traducir comando SmartThings: {st_command}")
         return None
@@ -385,17 +381,19 @@ class LGWasherAccessory:
 
             logger.info(f"Comando traducido: {lg_command}")
 
-            # Enviar comando al dispositivo via device_manager
+            # Enviar comando al dispositivo via device_manager; el estado nuevo
+            # llega por stateCallback cuando termine la resincronización
             result = self.device_manager.send_command(
                 self.external_device_id,
-                lg_command
+                lg_command,
+                sync=False
             )
 
             if result:
                 logger.info(f"Comando enviado exitosamente a {self.external_device_id}")
             else:
                 logger.error(f"Error enviando comando a {self.external_device_id}")
-            self.to_command_request()
+                return False
             return self.to_command_request()
 
         except Exception as e:
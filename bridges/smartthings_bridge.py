@@ -2,10 +2,10 @@
 SMARTTHINGS Bridge - Traduce entre DeviceManager y SMARTTHINGS Service
 """
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from core.device_manager import DeviceManager, DeviceState
 from services.smartthings_service import SmartThingsService
-from bridges.smartthings.LGWasherAccessory import LGWasherAccessory
+from bridges.device_mappings import DEVICE_MAPPINGS
 from json import loads
 
 logger = logging.getLogger(__name__)
@@ -52,6 +52,20 @@ class SmartThingsBridge:
             
             logger.info(f"Dispositivo {device_state.name} agregado a HAP")
 
+    def remove_device(self, device_id: str):
+        """
+        Retirar un dispositivo del bridge SmartThings.
+        
+        Args:
+            device_id: ID del dispositivo
+        """
+        accessory = self.accessories.pop(device_id, None)
+        if not accessory:
+            return
+        
+        self.smartthings_service.remove_accessory(device_id)
+        logger.info(f"Dispositivo {device_id} retirado de SmartThings")
+
     def _create_accessory(self, device_state: DeviceState):
         """
         Factory para crear accessory HAP según tipo de dispositivo.
@@ -62,38 +76,32 @@ class SmartThingsBridge:
         Returns:
             Accessory HAP o None
         """
-        brand = device_state.brand.lower()
-        device_type = device_state.device_type.lower()
+        mapping = DEVICE_MAPPINGS.resolve(device_state.brand, device_state.device_type)
+        if mapping is not None and mapping.smartthings_factory is not None:
+            accessory = mapping.smartthings_factory(self, device_state, mapping)
+            if accessory:
+                return accessory
         
-        # Importar el accessory correspondiente
-        if brand == 'lg' and 'washer' in device_type:
-            print("Device id de LG para coincidir con del del accesorio para smartthings " + device_state.device_id)
-            smartthings_device_conf = open(self.smartthings_service.devies_config_file, "r")
-            dat_file = smartthings_device_conf.read()
-            smartthings_device_conf.close()
-            dat_file = loads(dat_file)
-            for device in dat_file["devices"]:
-                if device["externalDeviceId"] == device_state.device_id:
-                    print("Device id de LG coincide con el del accesorio para smartthings " + device_state.device_id)
-                    access = LGWasherAccessory(
-                        external_device_id=device["externalDeviceId"],
-                        friendly_name=device["friendlyName"],
-                        device_handler_type=device["deviceHandlerType"],
-                        manufacturer_name=device["manufacturerName"],
-                        model_name=device["modelName"],
-                        hw_version=device["hwVersion"],
-                        sw_version=device["swVersion"],
-                        room_name=device["roomName"],
-                        groups=device["groups"],
-                        categories=device["categories"]
-                    )
-                    access.set_device_manager(self.device_manager)  # ✅ Inyectar el manager
-                    access.set_smartthings_service(self.smartthings_service)  # ✅ Inyectar el servicio
-                    return access
+        logger.warning(f"No hay accessory SmartThings para {device_state.brand} {device_state.device_type}")
+        return None
+    
+    def device_config(self, device_id: str) -> Optional[Dict]:
+        """
+        Entrada del dispositivo en el archivo de dispositivos SmartThings.
         
-        # Agregar más tipos de dispositivos aquí
+        Args:
+            device_id: ID del dispositivo (externalDeviceId)
+        """
+        try:
+            with open(self.smartthings_service.devies_config_file, "r") as smartthings_device_conf:
+                dat_file = loads(smartthings_device_conf.read())
+        except (OSError, ValueError) as e:
+            logger.error(f"Error leyendo {self.smartthings_service.devies_config_file}: {e}")
+            return None
         
-        logger.warning(f"No hay accessory HAP para {brand} {device_type}")
+        for device in dat_file.get("devices", []):
+            if device.get("externalDeviceId") == device_id:
+                return device
         return None
     
     def _on_device_state_changed(self, device_state: DeviceState):
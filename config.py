@@ -1,8 +1,163 @@
 from pathlib import Path
 from dataclasses import dataclass
+from configparser import ConfigParser, Error as ConfigParserError, SectionProxy
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _optional(value: Optional[str]) -> Optional[str]:
+    """Los valores vacíos cuentan como no definidos"""
+    value = (value or '').strip()
+    return value or None
+
+
+# ============================================================================
+# SECCIONES TIPADAS
+# ============================================================================
+
+@dataclass(frozen=True)
+class HAPSettings:
+    """[HAPCONFIG]"""
+    port: int = 51827
+    persist_file_name: str = 'homekit.json'
+    bridge_name: str = 'Mi Raspberry Hub'
+    address: Optional[str] = None
+    listen_address: Optional[str] = None
+    pincode: str = '031-45-154'
+    # Con más accesorios se crean bridges adicionales
+    max_accessories_per_bridge: int = 149
+
+    @classmethod
+    def from_section(cls, section: SectionProxy) -> 'HAPSettings':
+        max_accessories = section.getint('max_accessories_per_bridge', fallback=cls.max_accessories_per_bridge)
+        if max_accessories < 1:
+            raise ValueError("max_accessories_per_bridge debe ser al menos 1")
+        return cls(
+            port=section.getint('port', fallback=cls.port),
+            persist_file_name=section.get('persist_file_name', fallback=cls.persist_file_name),
+            bridge_name=section.get('bridge_name', fallback=cls.bridge_name),
+            address=_optional(section.get('address')),
+            listen_address=_optional(section.get('listen_address')),
+            pincode=section.get('pincode', fallback=cls.pincode),
+            max_accessories_per_bridge=max_accessories,
+        )
+
+
+@dataclass(frozen=True)
+class SmartThingsSettings:
+    """[SMARTTHINGS]"""
+    host: str = '0.0.0.0'
+    port: int = 5001
+    my_client_id: str = ''
+    my_client_secret: str = ''
+    endpoint_app_id: str = ''
+    st_client_id: str = ''
+    st_client_secret: str = ''
+    credentials_file: str = 'smartthingsSettings.json'
+    devices_config_file: str = './.smarthome/smartthingsDevices.json'
+    # Servidor HTTP
+    threads: int = 8
+    connection_limit: int = 100
+    keepalive_timeout: int = 30
+    max_request_body_size: int = 1048576
+    shutdown_timeout: float = 10.0
+
+    @classmethod
+    def from_section(cls, section: SectionProxy) -> 'SmartThingsSettings':
+        return cls(
+            host=section.get('host', fallback=cls.host),
+            port=section.getint('port', fallback=cls.port),
+            my_client_id=section.get('my_client_id', fallback=cls.my_client_id),
+            my_client_secret=section.get('my_client_secret', fallback=cls.my_client_secret),
+            endpoint_app_id=section.get('endpoint_app_id', fallback=cls.endpoint_app_id),
+            st_client_id=section.get('st_client_id', fallback=cls.st_client_id),
+            st_client_secret=section.get('st_client_secret', fallback=cls.st_client_secret),
+            credentials_file=section.get('credentials_file', fallback=cls.credentials_file),
+            # 'devies_conmfig_file' es el nombre histórico de la opción
+            devices_config_file=section.get(
+                'devices_config_file',
+                fallback=section.get('devies_conmfig_file', fallback=cls.devices_config_file)
+            ),
+            threads=section.getint('threads', fallback=cls.threads),
+            connection_limit=section.getint('connection_limit', fallback=cls.connection_limit),
+            keepalive_timeout=section.getint('keepalive_timeout', fallback=cls.keepalive_timeout),
+            max_request_body_size=section.getint('max_request_body_size', fallback=cls.max_request_body_size),
+            shutdown_timeout=section.getfloat('shutdown_timeout', fallback=cls.shutdown_timeout),
+        )
+
+
+@dataclass(frozen=True)
+class LGSettings:
+    """[LG]"""
+    base_url: str = 'https://api-aic.lgthinq.com'
+    access_token: str = ''
+    message_id: str = ''
+    client_id: str = ''
+
+    @classmethod
+    def from_section(cls, section: SectionProxy) -> 'LGSettings':
+        return cls(
+            base_url=section.get('base_url', fallback=cls.base_url),
+            access_token=section.get('access_token', fallback=cls.access_token),
+            message_id=section.get('message_id', fallback=cls.message_id),
+            client_id=section.get('client_id', fallback=cls.client_id),
+        )
+
+
+@dataclass(frozen=True)
+class TelegramSettings:
+    """[TELEGRAM]"""
+    base_url: Optional[str] = None
+    chat_id: Optional[int] = None
+
+    @classmethod
+    def from_section(cls, section: SectionProxy) -> 'TelegramSettings':
+        chat_id = _optional(section.get('chat_id'))
+        return cls(
+            base_url=_optional(section.get('base_url')),
+            chat_id=int(chat_id) if chat_id else None,
+        )
+
+
+@dataclass(frozen=True)
+class SyncSettings:
+    """[SYNC] y [DISCOVERY]"""
+    interval: float = 10.0
+    rediscovery_interval: int = 300
+    # Redescubrimientos seguidos sin un dispositivo antes de retirarlo
+    retire_after_misses: int = 3
+
+    @classmethod
+    def from_parser(cls, parser: ConfigParser) -> 'SyncSettings':
+        retire_after_misses = parser.getint('DISCOVERY', 'retire_after_misses', fallback=cls.retire_after_misses)
+        if retire_after_misses < 1:
+            raise ValueError(f"retire_after_misses debe ser al menos 1 (es {retire_after_misses})")
+        return cls(
+            interval=parser.getfloat('SYNC', 'interval', fallback=cls.interval),
+            rediscovery_interval=parser.getint('DISCOVERY', 'rediscovery_interval', fallback=cls.rediscovery_interval),
+            retire_after_misses=retire_after_misses,
+        )
+
+
+# Firma: callback(config, secciones_que_cambiaron)
+ConfigCallback = Callable[['Config', FrozenSet[str]], None]
+
 
 @dataclass
 class Config:
+    """
+    Configuración compartida por todos los módulos.
+
+    config.conf se lee una sola vez; las secciones principales se exponen
+    tipadas (config.hap, config.smartthings, config.lg, config.telegram,
+    config.sync) y el resto con get/getint/getfloat/getboolean. watch()
+    vigila el archivo y, si cambia, recarga y avisa a los suscriptores de
+    las secciones modificadas (rotación de credenciales, intervalos...).
+    """
     CONFIG_DIR = Path('./.smarthome/')
     CONFIG_FILE = CONFIG_DIR / 'config.conf'
     SMARTTHINGS_CONFIG_FILE = CONFIG_DIR / 'smartthings_device_conf.json'
@@ -14,6 +169,163 @@ class Config:
         if not self.CONFIG_FILE.exists():
             self._create_credentials_template()
 
+        self._lock = threading.RLock()
+        self._parser = ConfigParser()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        self._subscribers: List[Tuple[ConfigCallback, Optional[FrozenSet[str]]]] = []
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self.reload(notify=False)
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.CONFIG_FILE)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def reload(self, notify: bool = True) -> FrozenSet[str]:
+        """
+        Volver a leer config.conf.
+
+        Args:
+            notify: Avisar a los suscriptores de las secciones que cambiaron
+
+        Returns:
+            Secciones que cambiaron
+        """
+        with self._lock:
+            signature = self._file_signature()
+            parser = ConfigParser()
+            try:
+                read = parser.read(self.CONFIG_FILE, encoding='utf-8')
+                views = self._build_views(parser)
+            except (ConfigParserError, ValueError) as e:
+                if not self._loaded:
+                    raise  # Primera carga: no hay configuración anterior
+                # Archivo a medio editar: conservar la configuración anterior
+                logger.error(f"Error leyendo {self.CONFIG_FILE}, se conserva la configuración anterior: {e}")
+                self._signature = signature
+                return frozenset()
+
+            if not read and self._loaded:
+                # Borrado o sin permisos: read() no falla y todas las secciones quedarían vacías
+                logger.error(f"No se pudo leer {self.CONFIG_FILE}, se conserva la configuración anterior")
+                self._signature = signature
+                return frozenset()
+
+            old = {name: dict(self._parser[name]) for name in self._parser.sections()}
+            new = {name: dict(parser[name]) for name in parser.sections()}
+            changed = frozenset(name for name in set(old) | set(new) if old.get(name) != new.get(name))
+
+            self._parser = parser
+            self._signature = signature
+            self._loaded = True
+            self.hap, self.smartthings, self.lg, self.telegram, self.sync = views
+            subscribers = list(self._subscribers)
+
+        if notify and changed:
+            logger.info(f"Configuración recargada: {', '.join(sorted(changed))}")
+            for callback, sections in subscribers:
+                if sections is None or any(self._matches(name, sections) for name in changed):
+                    try:
+                        callback(self, changed)
+                    except Exception as e:
+                        logger.error(f"Error aplicando configuración: {e}")
+        return changed
+
+    @staticmethod
+    def _build_views(parser: ConfigParser):
+        empty = ConfigParser()
+        empty.add_section('EMPTY')
+
+        def section(name: str) -> SectionProxy:
+            return parser[name] if parser.has_section(name) else empty['EMPTY']
+
+        return (
+            HAPSettings.from_section(section('HAPCONFIG')),
+            SmartThingsSettings.from_section(section('SMARTTHINGS')),
+            LGSettings.from_section(section('LG')),
+            TelegramSettings.from_section(section('TELEGRAM')),
+            SyncSettings.from_parser(parser),
+        )
+
+    @staticmethod
+    def _matches(changed: str, sections: FrozenSet[str]) -> bool:
+        """'XIAOMI:lampara' cuenta como cambio de 'XIAOMI'"""
+        return changed in sections or changed.split(':', 1)[0] in sections
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def has_section(self, section: str) -> bool:
+        return self._parser.has_section(section)
+
+    def sections(self) -> List[str]:
+        return self._parser.sections()
+
+    def section(self, section: str) -> Dict[str, str]:
+        """Copia de una sección completa ({} si no existe)"""
+        parser = self._parser
+        return dict(parser[section]) if parser.has_section(section) else {}
+
+    def get(self, section: str, option: str, fallback: Optional[str] = None) -> Optional[str]:
+        return self._parser.get(section, option, fallback=fallback)
+
+    def getint(self, section: str, option: str, fallback: Optional[int] = None) -> Optional[int]:
+        return self._parser.getint(section, option, fallback=fallback)
+
+    def getfloat(self, section: str, option: str, fallback: Optional[float] = None) -> Optional[float]:
+        return self._parser.getfloat(section, option, fallback=fallback)
+
+    def getboolean(self, section: str, option: str, fallback: Optional[bool] = None) -> Optional[bool]:
+        return self._parser.getboolean(section, option, fallback=fallback)
+
+    # ------------------------------------------------------------------
+    # Recarga en vivo
+    # ------------------------------------------------------------------
+
+    def subscribe(self, callback: ConfigCallback, sections: Optional[Iterable[str]] = None):
+        """
+        Registrar un callback para cuando cambie la configuración.
+
+        Args:
+            callback: callback(config, secciones_que_cambiaron)
+            sections: Secciones de interés (None = cualquiera)
+        """
+        with self._lock:
+            self._subscribers.append((callback, frozenset(sections) if sections is not None else None))
+
+    def unsubscribe(self, callback: ConfigCallback):
+        with self._lock:
+            self._subscribers = [(cb, s) for cb, s in self._subscribers if cb != callback]
+
+    def watch(self, interval: float = 5.0):
+        """Vigilar config.conf en segundo plano y recargar al cambiar"""
+        with self._lock:
+            if self._watch_thread and self._watch_thread.is_alive():
+                return
+            self._watch_stop.clear()
+            self._watch_thread = threading.Thread(
+                target=self._watch_loop, args=(interval,), daemon=True, name="ConfigWatcher"
+            )
+            self._watch_thread.start()
+        logger.info(f"Vigilando cambios en {self.CONFIG_FILE} (cada {interval}s)")
+
+    def stop_watch(self):
+        self._watch_stop.set()
+
+    def _watch_loop(self, interval: float):
+        while not self._watch_stop.wait(interval):
+            if self._file_signature() != self._signature:
+                self.reload()
+
     def _create_credentials_template(self):
         """Crear plantilla de credenciales"""
         template = """
@@ -24,6 +336,8 @@ bridge_name = Mi Raspberry Hub
 address =
 listen_address =
 pincode = 031-45-154
+# Con más accesorios se crean bridges adicionales (port + 1, port + 2, ...)
+max_accessories_per_bridge = 149
 
 [SMARTTHINGS]
 host = 0.0.0.0
@@ -34,11 +348,55 @@ endpoint_app_id = TU_ENDPOINT_ID
 st_client_id = TU_ST_CLIENT_ID
 st_client_secret = TU_ST_CLIENT_SECRET
 credentials_file = smartthingsSettings.json
+# Servidor HTTP (requiere reiniciar): hilos, conexiones simultáneas,
+# segundos de keep-alive, tamaño máximo de petición y espera al detener
+threads = 8
+connection_limit = 100
+keepalive_timeout = 30
+max_request_body_size = 1048576
+shutdown_timeout = 10
+
+[SYNC]
+# Segundos entre sincronizaciones (se aplica sin reiniciar)
+interval = 10
+
+[DISCOVERY]
+rediscovery_interval = 300
+# Un dispositivo se retira tras faltar en este número de redescubrimientos seguidos
+retire_after_misses = 3
+
+[PLUGINS]
+# none: plugins en el proceso principal | process: un proceso por plugin
+isolation = none
+
+[RUNTIME]
+# threads: HAP, SmartThings y sync en hilos separados
+# unified: un solo loop asyncio para los tres (requiere reiniciar)
+mode = threads
+# Usar uvloop si está instalado (solo en modo unified)
+uvloop = false
 
 [LG]
+base_url = https://api-aic.lgthinq.com
 access_token = TU_ACCESS_TOKEN_AQUI
 message_id = TU_MESSAGE_ID
 client_id = TU_CLIENT_ID
+
+[SAMSUNG]
+access_token = TU_SAMSUNG_TOKEN
+base_url = https://api.smartthings.com/v1
+bulk_size = 25
+status_ttl = 5
+
+[XIAOMI]
+# Nombres separados por coma; cada uno con su sección [XIAOMI:<nombre>]
+# (host, token, properties = power:2.1, mode:2.4)
+# did = <id miIO> (opcional) lo lista aunque no responda al arrancar
+devices =
+
+[TELEGRAM]
+base_url =
+chat_id =
 """
         with open(self.CONFIG_FILE, 'w') as f:
             f.write(template)
@@ -1,27 +1,67 @@
 from asyncio.log import logger
+import asyncio
+import queue
 import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+from config import config
 from core.plugin_manager import PluginManager
 from core.device_manager import DeviceManager
+from core.fleet_store import FleetStateStore
+from core.runtime import UnifiedRuntime
 from services.hap_service import HAPService
 from services.smartthings_service import SmartThingsService
+from services.notification_service import NotificationService, TelegramChannel
 from bridges.hap_bridge import HAPBridge
 from bridges.smartthings_bridge import SmartThingsBridge
+from plugins.base_plugin import BasePlugin
 
 class AppManager:
     """Gestor principal de la aplicación"""
 
     def __init__(self):
         self.plugin_manager = PluginManager()
-        self.device_manager = DeviceManager(self.plugin_manager)
+        self.device_manager = DeviceManager(
+            self.plugin_manager,
+            fleet_store=FleetStateStore() if FleetStateStore.is_available() else None
+        )
 
         # Servicios
         self.hap_service = HAPService()
         self.smartthings_service = SmartThingsService()
+        self.notification_service = NotificationService()
+        self.notification_service.add_channel(TelegramChannel())
 
         # Bridges
         self.hap_bridge = None
         self.smartthings_bridge = None
 
+        # Redescubrimiento periódico (0 = desactivado)
+        self.rediscovery_interval = config.sync.rediscovery_interval
+        self._rediscovery_thread = None
+        # device_id -> redescubrimientos seguidos en los que faltó
+        self._missed: Dict[str, int] = {}
+        # brand -> hilo de su último descubrimiento (puede seguir colgado tras su timeout)
+        self._discovery_threads: Dict[str, threading.Thread] = {}
+        # Interrumpe la espera del redescubrimiento (intervalo nuevo o stop)
+        self._rediscovery_wakeup = threading.Event()
+        self._stop_event = threading.Event()
+
+        # Runtime unificado ([RUNTIME] mode = unified); None = un hilo por servicio
+        self.runtime: Optional[UnifiedRuntime] = None
+
+        # Intervalos de sync/redescubrimiento se aplican sin reiniciar
+        config.subscribe(self._on_config_changed, sections=['SYNC', 'DISCOVERY'])
+
+    def _on_config_changed(self, conf, changed):
+        """Aplicar intervalos nuevos de config.conf"""
+        self.device_manager.set_sync_interval(conf.sync.interval)
+        if conf.sync.rediscovery_interval != self.rediscovery_interval:
+            self.rediscovery_interval = conf.sync.rediscovery_interval
+            logger.info(f"Redescubrimiento cada {self.rediscovery_interval}s")
+            self._rediscovery_wakeup.set()
+            self._start_rediscovery()
+
     def _homekit(self):
         """Ejecutar HomeKit en un hilo separado con manejo de errores"""
         try:
@@ -75,7 +115,7 @@ class AppManager:
         logger.info("INICIALIZANDO HOMEBRIDGE HAP + SMARTTHINGS")
         logger.info("=" * 60)
 
-        # 1. Descubrir dispositivos
+        # 1 y 2. Descubrir dispositivos (en paralelo) y agregarlos al Device Manager
         logger.info("\n1. Descubriendo dispositivos...")
         discovered = self._discover_all_devices()
 
@@ -85,41 +125,223 @@ class AppManager:
 
         logger.info(f"Encontrados {len(discovered)} dispositivos")
 
-        # 2. Agregar dispositivos al Device Manager
-        logger.info("\n2. Agregando dispositivos al Device Manager...")
-        for device_info in discovered:
-            self.device_manager.add_device(device_info)
-
         logger.info("\nINICIALIZACIÓN COMPLETADA")
         return True
 
-    def _discover_all_devices(self):
-        """Descubrir dispositivos de todos los plugins"""
+    def _discover_all_devices(self) -> List[dict]:
+        """
+        Descubrir dispositivos de todos los plugins en paralelo.
+        Cada dispositivo se agrega al Device Manager en cuanto llega su plugin.
+        """
         all_discovered = []
 
-        for plugin in self.plugin_manager.get_all_plugins():
+        for plugin, discovered in self._run_discovery(self.plugin_manager.get_all_plugins()):
+            if discovered is None:
+                continue
+            logger.info(f"  {plugin.brand.upper()}: {len(discovered)} dispositivos")
+            for device_info in discovered:
+                self.device_manager.add_device(device_info)
+                self.notification_service.watch_device(self.device_manager, device_info['device_id'])
+            all_discovered.extend(discovered)
+
+        return all_discovered
+
+    def _run_discovery(self, plugins: List[BasePlugin]) -> Iterator[Tuple[BasePlugin, Optional[List[dict]]]]:
+        """
+        Ejecutar el descubrimiento de varios plugins a la vez.
+
+        Cada plugin corre en su propio hilo (daemon) con su timeout y
+        reintentos; un plugin colgado no bloquea a los demás ni al cierre.
+        Mientras el hilo de un descubrimiento anterior siga vivo no se lanza
+        otro para esa marca (cuenta como fallido).
+
+        Yields:
+            (plugin, dispositivos) en orden de llegada; dispositivos es None
+            si el plugin falló o excedió su timeout
+        """
+        results: queue.Queue = queue.Queue()
+        deadlines = {}
+        start = time.monotonic()
+
+        pending = {}
+        for plugin in plugins:
+            previous = self._discovery_threads.get(plugin.brand)
+            if previous is not None and previous.is_alive():
+                logger.warning(f"El descubrimiento anterior de {plugin.brand} sigue en curso, se omite")
+                yield plugin, None
+                continue
+            deadlines[plugin.brand] = start + plugin.discovery_timeout
+            pending[plugin.brand] = plugin
+            thread = threading.Thread(
+                target=self._discover_plugin,
+                args=(plugin, results, deadlines[plugin.brand]),
+                daemon=True,
+                name=f"Discovery-{plugin.brand}"
+            )
+            self._discovery_threads[plugin.brand] = thread
+            thread.start()
+
+        while pending:
+            timeout = min(deadlines[brand] for brand in pending) - time.monotonic()
+            try:
+                brand, discovered = results.get(timeout=max(timeout, 0))
+            except queue.Empty:
+                now = time.monotonic()
+                for brand in [b for b in pending if deadlines[b] <= now]:
+                    logger.error(f"Timeout descubriendo {brand} ({pending[brand].discovery_timeout}s)")
+                    yield pending.pop(brand), None
+                continue
+
+            plugin = pending.pop(brand, None)
+            if plugin is not None:  # None = llegó después de su timeout
+                yield plugin, discovered
+
+    def _discover_plugin(self, plugin: BasePlugin, results: queue.Queue, deadline: float):
+        """
+        Descubrir un plugin con reintentos (corre en su propio hilo).
+
+        Los reintentos y sus esperas no pasan de deadline (time.monotonic()):
+        después de su timeout el resultado ya no se usa.
+        """
+        attempts = plugin.discovery_retries + 1
+        for attempt in range(1, attempts + 1):
             try:
                 plugin.get_api_client()
-                discovered = plugin.discover_devices()
-                logger.info(f"  {plugin.brand.upper()}: {len(discovered)} dispositivos")
-                all_discovered.extend(discovered)
+                results.put((plugin.brand, plugin.discover_devices()))
+                return
             except Exception as e:
-                logger.error(f"Error con {plugin.brand}: {e}")
+                logger.error(f"Error con {plugin.brand} (intento {attempt}/{attempts}): {e}")
+                if attempt == attempts:
+                    break
+                delay = min(2 ** (attempt - 1), 10)
+                if time.monotonic() + delay >= deadline:
+                    logger.warning(f"Sin tiempo para reintentar {plugin.brand} antes de su timeout")
+                    break
+                time.sleep(delay)
 
-        return all_discovered
+        results.put((plugin.brand, None))
+
+    def rediscover(self) -> Dict[str, int]:
+        """
+        Redescubrir dispositivos y aplicar solo las diferencias.
+
+        Los dispositivos nuevos se agregan en caliente a DeviceManager y a
+        los bridges. Los que ya no reporta su plugin se retiran solo tras
+        faltar en retire_after_misses redescubrimientos seguidos: retirarlo
+        lo borra de la app de SmartThings, y un dispositivo de la LAN
+        apagado un momento no debe perder su configuración. Si el
+        descubrimiento de un plugin falla no cuenta como falta.
+
+        Returns:
+            {'added': n, 'removed': n}
+        """
+        added = removed = 0
+
+        for plugin, discovered in self._run_discovery(self.plugin_manager.get_all_plugins()):
+            if discovered is None:
+                continue
+
+            found = {device_info['device_id']: device_info for device_info in discovered}
+            known = {
+                device.device_id for device in self.device_manager.get_all_devices()
+                if device.brand == plugin.brand
+            }
+
+            for device_id in found.keys() - known:
+                self._hot_add_device(found[device_id])
+                added += 1
+
+            for device_id in known & found.keys():
+                self._missed.pop(device_id, None)
+
+            retire_after = config.sync.retire_after_misses
+            for device_id in known - found.keys():
+                misses = self._missed.get(device_id, 0) + 1
+                if misses < retire_after:
+                    self._missed[device_id] = misses
+                    logger.info(f"{device_id} no apareció en el redescubrimiento ({misses}/{retire_after})")
+                    continue
+                self._missed.pop(device_id, None)
+                self._retire_device(device_id)
+                removed += 1
+
+        if added or removed:
+            logger.info(f"Redescubrimiento: {added} agregados, {removed} retirados")
+        return {'added': added, 'removed': removed}
+
+    def _hot_add_device(self, device_info: dict):
+        """Agregar un dispositivo nuevo sin reiniciar los servicios"""
+        device_state = self.device_manager.add_device(device_info)
+        self.notification_service.watch_device(self.device_manager, device_state.device_id)
+
+        if self.hap_bridge:
+            self.hap_bridge.add_device(device_state)
+
+        if self.smartthings_bridge:
+            self.smartthings_bridge.add_device(device_state)
+            accessory = self.smartthings_bridge.accessories.get(device_state.device_id)
+            if accessory:
+                self.smartthings_service.discovery_callback([accessory])
+
+        # Primer estado sin esperar al siguiente ciclo de sync
+        self.device_manager.sync_device(device_state.device_id)
+
+    def _retire_device(self, device_id: str):
+        """Retirar un dispositivo que ya no existe en la cuenta de su marca"""
+        if self.hap_bridge:
+            self.hap_bridge.remove_device(device_id)
+        if self.smartthings_bridge:
+            accessory = self.smartthings_bridge.accessories.get(device_id)
+            self.smartthings_bridge.remove_device(device_id)
+            # Sin este aviso el dispositivo seguiría en la app de SmartThings
+            if accessory:
+                self.smartthings_service.notify_devices_deleted([accessory.external_device_id])
+        self.device_manager.remove_device(device_id)
+
+    def _rediscovery_loop(self):
+        """Loop de redescubrimiento en segundo plano"""
+        while not self._stop_event.is_set():
+            interval = self.rediscovery_interval
+            # 0 = desactivado: se espera hasta que config.conf lo reactive
+            if self._rediscovery_wakeup.wait(interval if interval > 0 else None):
+                # Intervalo nuevo (se aplica de inmediato) o stop
+                self._rediscovery_wakeup.clear()
+                continue
+            try:
+                self.rediscover()
+            except Exception as e:
+                logger.error(f"Error en redescubrimiento: {e}")
+
+    def _start_rediscovery(self):
+        """Iniciar el hilo de redescubrimiento"""
+        if self.rediscovery_interval <= 0 or self._rediscovery_thread:
+            return
+
+        self._rediscovery_thread = threading.Thread(
+            target=self._rediscovery_loop, daemon=True, name="Rediscovery"
+        )
+        self._rediscovery_thread.start()
+        logger.info(f"Redescubrimiento iniciado (cada {self.rediscovery_interval}s)")
 
     def start(self):
         """Iniciar aplicación"""
         if not self.initialize():
             return False
 
+        if config.get('RUNTIME', 'mode', fallback='threads') == 'unified':
+            self.runtime = UnifiedRuntime(use_uvloop=config.getboolean('RUNTIME', 'uvloop', fallback=False))
+            self.runtime.run(self._run_unified)
+            return True
+
         # Crear hilos para HAP y SmartThings
         hap_thread = threading.Thread(target=self._homekit, daemon=False, name="HomeKit")
         smartthings_thread = threading.Thread(target=self._smartthings, daemon=False, name="SmartThings")
 
         # Iniciar sincronización
         logger.info("\n5. Iniciando sincronización...")
-        self.device_manager.start_sync(interval=10)
+        self.notification_service.start()
+        self.device_manager.start_sync(interval=config.sync.interval)
+        config.watch()
 
         # Iniciar HAP en hilo separado
         logger.info("\n6. Iniciando HomeKit en hilo separado...")
@@ -128,6 +350,9 @@ class AppManager:
         # Iniciar SmartThings en hilo separado
         smartthings_thread.start()
 
+        # Redescubrir dispositivos en segundo plano
+        self._start_rediscovery()
+
         # Mantener vivos los programas principales
         try:
             while True:
@@ -143,8 +368,57 @@ class AppManager:
         except KeyboardInterrupt:
             logger.info("Interrupción del usuario")
 
+    async def _run_unified(self, runtime: UnifiedRuntime):
+        """HAP, SmartThings y sync en el loop del runtime (hasta request_stop)"""
+        logger.info("\n3. Inicializando HAP Service (runtime unificado)...")
+        self.hap_service.initialize(loop=runtime.loop)
+        self.hap_bridge = HAPBridge(self.device_manager, self.hap_service)
+        for device_state in self.device_manager.get_all_devices():
+            self.hap_bridge.add_device(device_state)
+
+        # initialize() hace llamadas HTTP: fuera del loop
+        logger.info("\n4. Inicializando SmartThings Service...")
+        await runtime.run_blocking(self.smartthings_service.initialize)
+        self.smartthings_bridge = SmartThingsBridge(self.device_manager, self.smartthings_service)
+        for device_state in self.device_manager.get_all_devices():
+            self.smartthings_bridge.add_device(device_state)
+
+        logger.info("\n5. Iniciando servicios...")
+        await self.hap_service.async_start()
+        await self.smartthings_service.async_start(executor=runtime.executor)
+        self.notification_service.start()
+        sync_task = runtime.loop.create_task(self.device_manager.run_sync_async(config.sync.interval))
+        config.watch()
+        self._start_rediscovery()
+
+        try:
+            await runtime.wait_stopped()
+        finally:
+            logger.info("Deteniendo runtime unificado...")
+            self._stop_event.set()
+            self._rediscovery_wakeup.set()
+            config.stop_watch()
+            self.device_manager.stop_sync()
+            try:
+                await asyncio.wait_for(sync_task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            await self.smartthings_service.async_stop()
+            await self.hap_service.async_stop()
+            self.plugin_manager.shutdown()
+            self.notification_service.stop()
+
     def stop(self):
         """Detener aplicación"""
+        if self.runtime is not None:
+            # El propio _run_unified detiene los servicios
+            self.runtime.request_stop()
+            return
+        self._stop_event.set()
+        self._rediscovery_wakeup.set()
+        config.stop_watch()
         self.device_manager.stop_sync()
+        self.plugin_manager.shutdown()
+        self.notification_service.stop()
         self.hap_service.stop()
         self.smartthings_service.stop()
\ No newline at end of file
@@ -2,13 +2,17 @@
 Device Manager - Núcleo central del sistema.
 Mantiene el estado de todos los dispositivos y coordina entre plugins y servicios.
 """
+import asyncio
 import logging
 import threading
-import time
-from typing import Dict, List, Optional, Callable
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, FrozenSet, List, Optional, Callable
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from core.state_serializer import IncrementalStateSerializer
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -27,6 +31,9 @@ class DeviceState:
     online: bool = True
     last_update: datetime = field(default_factory=datetime.now)
     
+    # Campos del estado que cambiaron en la última actualización
+    changed_fields: FrozenSet[str] = frozenset()
+    
     # Callbacks cuando cambia el estado
     callbacks: List[Callable] = field(default_factory=list)
 
@@ -36,13 +43,21 @@ class DeviceManager:
     Mantiene el estado de todos los dispositivos y coordina comunicación.
     """
     
-    def __init__(self, plugin_manager):
+    def __init__(self, plugin_manager, fleet_store=None):
         self.plugin_manager = plugin_manager
         self.devices: Dict[str, DeviceState] = {}  # device_id -> DeviceState
+        self.serializer = IncrementalStateSerializer()
+        
+        # Almacén columnar opcional (core.fleet_store.FleetStateStore)
+        self.fleet_store = fleet_store
         
         self._sync_thread = None
         self._running = False
         self._sync_interval = 10  # segundos
+        self._sync_wakeup = threading.Event()
+        # Loop y evento del sync asíncrono (runtime unificado)
+        self._sync_loop_ref: Optional[asyncio.AbstractEventLoop] = None
+        self._async_wakeup: Optional[asyncio.Event] = None
         
         self._lock = threading.Lock()
     
@@ -77,6 +92,29 @@ class DeviceManager:
             
             return device_state
     
+    def remove_device(self, device_id: str) -> bool:
+        """
+        Retirar un dispositivo del manager.
+        
+        Args:
+            device_id: ID del dispositivo
+            
+        Returns:
+            True si existía y se eliminó
+        """
+        with self._lock:
+            device_state = self.devices.pop(device_id, None)
+            if not device_state:
+                return False
+            
+            device_state.callbacks.clear()
+            self.serializer.forget(device_id)
+            if self.fleet_store is not None:
+                self.fleet_store.remove(device_id)
+            
+            logger.info(f"Dispositivo retirado: {device_state.name}")
+            return True
+    
     def get_device(self, device_id: str) -> Optional[DeviceState]:
         """Obtener un dispositivo por ID"""
         return self.devices.get(device_id)
@@ -98,7 +136,7 @@ class DeviceManager:
         if device:
             device.callbacks.append(callback)
     
-    def update_device_state(self, device_id: str, new_state: Dict):
+    def update_device_state(self, device_id: str, new_state: Dict, changed_fields: Optional[FrozenSet[str]] = None):
         """
         Actualizar el estado de un dispositivo.
         Notifica a todos los callbacks suscritos.
@@ -106,6 +144,7 @@ class DeviceManager:
         Args:
             device_id: ID del dispositivo
             new_state: Nuevo estado (dict parseado del plugin)
+            changed_fields: Campos que cambiaron (None = todos)
         """
         with self._lock:
             device = self.get_device(device_id)
@@ -115,7 +154,7 @@ class DeviceManager:
             
             # Actualizar estado
             device.state = new_state
-            #print(device.state)
+            device.changed_fields = frozenset(new_state) if changed_fields is None else changed_fields
             device.last_update = datetime.now()
             
             # Notificar a callbacks
@@ -124,14 +163,23 @@ class DeviceManager:
                     callback(device)
                 except Exception as e:
                     logger.error(f"Error en callback: {e}")
+            
+            # El almacén de flota es solo analítica: nunca bloquea la entrega del estado
+            if self.fleet_store is not None:
+                try:
+                    self.fleet_store.update(device_id, new_state, device.last_update.timestamp(), device.device_type)
+                except Exception as e:
+                    logger.error(f"Error actualizando el almacén de flota: {e}")
     
-    def send_command(self, device_id: str, command_data: Dict) -> bool:
+    def send_command(self, device_id: str, command_data: Any, sync: bool = True) -> bool:
         """
         Enviar comando a un dispositivo.
         
         Args:
             device_id: ID del dispositivo
-            command_data: Datos del comando (formato genérico)
+            command_data: Datos del comando (dict crudo o comando tipado del plugin)
+            sync: Resincronizar antes de retornar; si es False la
+                resincronización corre en segundo plano
             
         Returns:
             True si se envió correctamente
@@ -157,7 +205,11 @@ class DeviceManager:
             if success:
                 logger.info(f"Comando enviado a {device.name}")
                 # Sincronizar estado inmediatamente
-                self._sync_device(device_id)
+                if sync:
+                    self.sync_device(device_id)
+                else:
+                    threading.Thread(target=self.sync_device, args=(device_id,), daemon=True,
+                                     name=f"Resync-{device_id}").start()
             else:
                 logger.error(f"Error enviando comando a {device.name}")
             
@@ -179,6 +231,7 @@ class DeviceManager:
             return
         
         self._sync_interval = interval
+        self._sync_wakeup.clear()
         self._running = True
         self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
         self._sync_thread.start()
@@ -188,6 +241,7 @@ class DeviceManager:
     def stop_sync(self):
         """Detener sincronización"""
         self._running = False
+        self._wake_sync()
         if self._sync_thread:
             self._sync_thread.join(timeout=5)
         logger.info("Sincronización detenida")
@@ -200,15 +254,127 @@ class DeviceManager:
             except Exception as e:
                 logger.error(f"Error en sync loop: {e}")
             
-            time.sleep(self._sync_interval)
+            # Espera interrumpible: un intervalo nuevo se aplica de inmediato
+            self._sync_wakeup.wait(self._sync_interval)
+            self._sync_wakeup.clear()
+    
+    async def run_sync_async(self, interval: float = 10):
+        """
+        Sincronización en el loop del runtime unificado.
+        Las consultas a los plugins son bloqueantes: cada marca se sincroniza
+        en el executor del loop y la espera entre ciclos no ocupa hilos.
+        
+        Args:
+            interval: Intervalo en segundos
+        """
+        if self._running:
+            logger.warning("Sync ya está ejecutándose")
+            return
+        
+        loop = asyncio.get_running_loop()
+        self._sync_interval = interval
+        self._sync_loop_ref = loop
+        self._async_wakeup = asyncio.Event()
+        self._running = True
+        logger.info(f"Sincronización asíncrona iniciada (cada {interval}s)")
+        
+        try:
+            while self._running:
+                groups = self._group_by_brand()
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(None, self._sync_brand, brand, devices)
+                    for brand, devices in groups.items()
+                ), return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.error(f"Error en sync loop: {result}")
+                
+                try:
+                    await asyncio.wait_for(self._async_wakeup.wait(), self._sync_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._async_wakeup.clear()
+        finally:
+            self._running = False
+            self._sync_loop_ref = None
+            self._async_wakeup = None
+    
+    def _wake_sync(self):
+        """Interrumpir la espera del loop de sync (hilo o asyncio)"""
+        self._sync_wakeup.set()
+        loop, wakeup = self._sync_loop_ref, self._async_wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+    
+    def set_sync_interval(self, interval: float):
+        """
+        Cambiar el intervalo de sincronización sin reiniciar.
+        
+        Args:
+            interval: Intervalo en segundos
+        """
+        if interval == self._sync_interval:
+            return
+        self._sync_interval = interval
+        self._wake_sync()
+        logger.info(f"Intervalo de sincronización: {interval}s")
     
     def _sync_all_devices(self):
-        """Sincronizar todos los dispositivos"""
-        for device_id in list(self.devices.keys()):
-            self._sync_device(device_id)
+        """
+        Sincronizar todos los dispositivos.
+        Agrupa por marca para que cada plugin reciba una sola consulta
+        (get_devices_state); las marcas se consultan en paralelo.
+        """
+        groups = self._group_by_brand()
+        
+        if len(groups) <= 1:
+            for brand, devices in groups.items():
+                self._sync_brand(brand, devices)
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(groups), thread_name_prefix="Sync") as executor:
+            for brand, devices in groups.items():
+                executor.submit(self._sync_brand, brand, devices)
+    
+    def _group_by_brand(self) -> Dict[str, List[DeviceState]]:
+        groups: Dict[str, List[DeviceState]] = defaultdict(list)
+        for device in self.get_all_devices():
+            groups[device.brand].append(device)
+        return groups
     
-    def _sync_device(self, device_id: str):
-        """Sincronizar un dispositivo específico"""
+    def _sync_brand(self, brand: str, devices: List[DeviceState]):
+        """Sincronizar los dispositivos de una marca con una consulta masiva"""
+        plugin = self.plugin_manager.get_plugin(brand)
+        if not plugin:
+            return
+        
+        try:
+            states = plugin.get_devices_state(
+                [device.device_id for device in devices],
+                {device.device_id: device.device_type for device in devices}
+            )
+        except Exception as e:
+            logger.error(f"Error sincronizando dispositivos {brand}: {e}")
+            return
+        
+        for device in devices:
+            state = states.get(device.device_id)
+            if state:
+                self._apply_state(device, state)
+    
+    def _apply_state(self, device: DeviceState, state: Any):
+        """Serializar el estado leído del plugin y publicarlo"""
+        try:
+            # Convertir estado a dict reconstruyendo solo los campos que cambiaron
+            state_dict, changed = self.serializer.serialize(device.device_id, state)
+            
+            # Actualizar estado (esto notificará a los callbacks)
+            self.update_device_state(device.device_id, state_dict, changed)
+        except Exception as e:
+            logger.error(f"Error sincronizando {device.name}: {e}")
+    
+    def sync_device(self, device_id: str):
+        """Sincronizar un dispositivo específico (p. ej. recién agregado o tras un comando)"""
         device = self.get_device(device_id)
         if not device:
             return
@@ -225,16 +391,7 @@ class DeviceManager:
             )
             #rint(state)
             if state:
-                # Convertir estado a dict
-                if hasattr(state, 'to_dict'):
-                    state_dict = state.to_dict()
-                elif hasattr(state, '__dict__'):
-                    state_dict = state.__dict__
-                else:
-                    state_dict = state
-                
-                # Actualizar estado (esto notificará a los callbacks)
-                self.update_device_state(device_id, state_dict)
+                self._apply_state(device, state)
                 
         except Exception as e:
             logger.error(f"Error sincronizando {device.name}: {e}")
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""
+Fleet State Store - Almacén columnar (NumPy) del estado de toda la flota.
+Opcional: solo se activa si NumPy está instalado. Se actualiza en sitio en
+cada sincronización y permite consultas vectorizadas (ETA, lavadoras que
+terminan pronto, promedios por estado) sin recorrer los dicts de Python.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Valor para campos desconocidos (None en el estado)
+UNKNOWN = -1
+
+# Estados en los que la lavadora no avanza hacia el final del ciclo
+IDLE_STATES = ('POWER_OFF', 'END', 'FINISH', 'PAUSE', 'RESERVED', 'ERROR', 'STOP', 'RINSE_HOLD')
+
+# Tipos de dispositivo que modelan las columnas (subcadena del tipo reportado)
+MODELED_TYPES = ('washer',)
+
+
+class FleetStateStore:
+    """
+    Estado de la flota en arreglos columnares.
+
+    Cada dispositivo ocupa una fila fija; las columnas crecen al doble
+    cuando se llenan. Los estados (strings) se guardan como códigos enteros.
+    """
+
+    # columna -> (campo del estado, dtype)
+    COLUMNS = {
+        'remain_time_h': ('remain_time_h', 'int16'),
+        'remain_time_m': ('remain_time_m', 'int16'),
+        'initial_time_h': ('initial_time_h', 'int16'),
+        'initial_time_m': ('initial_time_m', 'int16'),
+        'tcl_count': ('tcl_count', 'int32'),
+    }
+
+    def __init__(self, capacity: int = 64):
+        if np is None:
+            raise RuntimeError("FleetStateStore requiere NumPy (pip install numpy)")
+
+        self._capacity = max(1, capacity)
+        self._columns: Dict[str, 'np.ndarray'] = {
+            name: np.full(self._capacity, UNKNOWN, dtype=dtype)
+            for name, (_, dtype) in self.COLUMNS.items()
+        }
+        self.state_code = np.full(self._capacity, UNKNOWN, dtype=np.int16)
+        self.last_update = np.zeros(self._capacity, dtype=np.float64)
+        self.active = np.zeros(self._capacity, dtype=bool)
+
+        self._index: Dict[str, int] = {}  # device_id -> fila
+        self._ids: List[Optional[str]] = [None] * self._capacity
+        self._free_rows: List[int] = []
+        self._size = 0
+
+        self._state_codes: Dict[str, int] = {}  # estado -> código
+        self._state_names: List[str] = []
+        self._idle_mask = np.zeros(0, dtype=bool)  # código -> es estado inactivo
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """True si NumPy está instalado"""
+        return np is not None
+
+    @staticmethod
+    def models(device_type: Optional[str]) -> bool:
+        """True si el almacén registra este tipo de dispositivo"""
+        device_type = (device_type or '').lower()
+        return any(modeled in device_type for modeled in MODELED_TYPES)
+
+    @staticmethod
+    def _coerce(value, dtype) -> int:
+        """Valor entero dentro del rango de la columna o UNKNOWN"""
+        if value is None or isinstance(value, bool):
+            return UNKNOWN
+        try:
+            value = int(value)
+        except (TypeError, ValueError, OverflowError):
+            return UNKNOWN
+        limits = np.iinfo(dtype)
+        return value if limits.min <= value <= limits.max else UNKNOWN
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getattr__(self, name):
+        # Acceso directo a columnas: store.remain_time_m, store.tcl_count, ...
+        columns = self.__dict__.get('_columns', {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def update(self, device_id: str, state: Dict, timestamp: Optional[float] = None,
+               device_type: Optional[str] = None) -> bool:
+        """
+        Escribir el estado de un dispositivo en su fila (en sitio).
+
+        Los valores que no son enteros o no caben en la columna se guardan
+        como UNKNOWN; un estado mal formado nunca lanza excepción.
+
+        Args:
+            device_id: ID del dispositivo
+            state: Dict del estado (como DeviceState.state)
+            timestamp: Epoch del estado (por defecto ahora)
+            device_type: Tipo del dispositivo; se ignoran los que no modela el almacén
+
+        Returns:
+            True si el estado quedó registrado
+        """
+        if device_type is not None and not self.models(device_type):
+            return False
+
+        try:
+            with self._lock:
+                row = self._index.get(device_id)
+                if row is None:
+                    row = self._allocate_row(device_id)
+
+                for name, (field_name, dtype) in self.COLUMNS.items():
+                    self._columns[name][row] = self._coerce(state.get(field_name), dtype)
+
+                state_name = state.get('state')
+                self.state_code[row] = UNKNOWN if state_name is None else self._code_for(str(state_name).upper())
+                self.last_update[row] = time.time() if timestamp is None else timestamp
+                self.active[row] = True
+            return True
+        except Exception as e:
+            logger.warning(f"Estado de {device_id} no registrado en el almacén de flota: {e}")
+            return False
+
+    def remove(self, device_id: str):
+        """Liberar la fila de un dispositivo"""
+        with self._lock:
+            row = self._index.pop(device_id, None)
+            if row is None:
+                return
+            self.active[row] = False
+            self._ids[row] = None
+            self._free_rows.append(row)
+
+    def _allocate_row(self, device_id: str) -> int:
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            if self._size == self._capacity:
+                self._grow()
+            row = self._size
+            self._size += 1
+
+        self._index[device_id] = row
+        self._ids[row] = device_id
+        return row
+
+    def _grow(self):
+        new_capacity = self._capacity * 2
+        for name, column in self._columns.items():
+            self._columns[name] = self._resize(column, new_capacity, UNKNOWN)
+        self.state_code = self._resize(self.state_code, new_capacity, UNKNOWN)
+        self.last_update = self._resize(self.last_update, new_capacity, 0)
+        self.active = self._resize(self.active, new_capacity, False)
+        self._ids.extend([None] * (new_capacity - self._capacity))
+        self._capacity = new_capacity
+
+    @staticmethod
+    def _resize(column: 'np.ndarray', capacity: int, fill) -> 'np.ndarray':
+        resized = np.full(capacity, fill, dtype=column.dtype)
+        resized[:len(column)] = column
+        return resized
+
+    def _code_for(self, state_name: str) -> int:
+        code = self._state_codes.get(state_name)
+        if code is None:
+            code = len(self._state_names)
+            self._state_codes[state_name] = code
+            self._state_names.append(state_name)
+            self._idle_mask = np.append(self._idle_mask, state_name in IDLE_STATES)
+        return code
+
+    # ------------------------------------------------------------------
+    # Consultas vectorizadas
+    # ------------------------------------------------------------------
+
+    def remaining_minutes(self) -> 'np.ndarray':
+        """Minutos restantes por fila (UNKNOWN si no se conoce)"""
+        h = self._columns['remain_time_h'][:self._size].astype(np.int32)
+        m = self._columns['remain_time_m'][:self._size].astype(np.int32)
+        total = np.maximum(h, 0) * 60 + np.maximum(m, 0)
+        return np.where((h == UNKNOWN) & (m == UNKNOWN), UNKNOWN, total)
+
+    def cycle_minutes(self) -> 'np.ndarray':
+        """Duración total del ciclo por fila (UNKNOWN si no se conoce)"""
+        h = self._columns['initial_time_h'][:self._size].astype(np.int32)
+        m = self._columns['initial_time_m'][:self._size].astype(np.int32)
+        total = np.maximum(h, 0) * 60 + np.maximum(m, 0)
+        return np.where((h == UNKNOWN) & (m == UNKNOWN), UNKNOWN, total)
+
+    def running_mask(self) -> 'np.ndarray':
+        """Filas activas con un ciclo en marcha"""
+        codes = self.state_code[:self._size]
+        known = codes != UNKNOWN
+        idle = np.zeros(self._size, dtype=bool)
+        idle[known] = self._idle_mask[codes[known]]
+        return self.active[:self._size] & known & ~idle
+
+    def eta(self) -> Dict[str, float]:
+        """
+        Hora estimada de fin (epoch) de cada lavadora en marcha.
+
+        Returns:
+            device_id -> epoch de finalización
+        """
+        with self._lock:
+            remaining = self.remaining_minutes()
+            mask = self.running_mask() & (remaining != UNKNOWN)
+            finish = self.last_update[:self._size] + remaining * 60.0
+            rows = np.flatnonzero(mask)
+            return {self._ids[row]: float(finish[row]) for row in rows}
+
+    def finishing_within(self, minutes: float, now: Optional[float] = None) -> List[str]:
+        """
+        Lavadoras en marcha que terminan en los próximos `minutes` minutos.
+
+        Args:
+            minutes: Ventana en minutos
+            now: Epoch de referencia (por defecto ahora)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            remaining = self.remaining_minutes()
+            finish = self.last_update[:self._size] + remaining * 60.0
+            mask = (self.running_mask() & (remaining != UNKNOWN)
+                    & (finish >= now) & (finish <= now + minutes * 60.0))
+            return [self._ids[row] for row in np.flatnonzero(mask)]
+
+    def mean_by_state(self, column: str = 'cycle_minutes') -> Dict[str, float]:
+        """
+        Promedio de una columna agrupado por estado.
+
+        Args:
+            column: 'cycle_minutes', 'remaining_minutes' o una columna de COLUMNS
+        """
+        with self._lock:
+            if column == 'cycle_minutes':
+                values = self.cycle_minutes()
+            elif column == 'remaining_minutes':
+                values = self.remaining_minutes()
+            else:
+                values = self._columns[column][:self._size]
+
+            codes = self.state_code[:self._size]
+            mask = self.active[:self._size] & (codes != UNKNOWN) & (values != UNKNOWN)
+            if not mask.any():
+                return {}
+
+            n_states = len(self._state_names)
+            sums = np.bincount(codes[mask], weights=values[mask], minlength=n_states)
+            counts = np.bincount(codes[mask], minlength=n_states)
+            return {
+                self._state_names[code]: float(sums[code] / counts[code])
+                for code in np.flatnonzero(counts)
+            }
+
+    def count_by_state(self) -> Dict[str, int]:
+        """Número de dispositivos activos por estado"""
+        with self._lock:
+            codes = self.state_code[:self._size]
+            mask = self.active[:self._size] & (codes != UNKNOWN)
+            counts = np.bincount(codes[mask], minlength=len(self._state_names))
+            return {self._state_names[code]: int(counts[code]) for code in np.flatnonzero(counts)}
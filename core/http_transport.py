@@ -0,0 +1,241 @@
+"""
+Transporte HTTP saliente compartido.
+
+Las llamadas salientes que no son de los clientes de marca (callbacks de
+SmartThings, tokens, avisos de Telegram) pasan por un único HTTPTransport:
+pools de conexiones por host con keep-alive, un SSLContext compartido,
+caché de DNS, timeouts por destino y estadísticas de latencia por host.
+"""
+import logging
+import socket
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from ipaddress import ip_address
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+Timeout = Tuple[float, float]  # (conexión, lectura) en segundos
+
+
+class DNSCache:
+    """Resolución de nombres con TTL (evita un getaddrinfo por conexión nueva)"""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> str:
+        """
+        Dirección IP de host (o host tal cual si ya es una IP).
+
+        Raises:
+            socket.gaierror: Si el nombre no se puede resolver
+        """
+        try:
+            ip_address(host.strip('[]'))
+            return host
+        except ValueError:
+            pass
+
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4][0]
+        with self._lock:
+            self._entries[key] = (address, now + self.ttl)
+        return address
+
+    def invalidate(self, host: str, port: int):
+        """Olvidar una entrada (p. ej. si la conexión a esa IP falló)"""
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+
+DNS_CACHE = DNSCache()
+
+
+class _CachedDNSMixin:
+    """Conexión urllib3 que resuelve con DNS_CACHE; SNI y certificado siguen usando el nombre"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        self._dns_host = DNS_CACHE.resolve(host, self.port)
+        try:
+            return super()._new_conn()
+        except Exception:
+            DNS_CACHE.invalidate(host, self.port)
+            raise
+        finally:
+            self._dns_host = host
+
+
+class _CachedHTTPConnection(_CachedDNSMixin, HTTPConnection):
+    pass
+
+
+class _CachedHTTPSConnection(_CachedDNSMixin, HTTPSConnection):
+    pass
+
+
+class _CachedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CachedHTTPConnection
+
+
+class _CachedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedHTTPSConnection
+
+
+class _TransportAdapter(HTTPAdapter):
+    """HTTPAdapter con SSLContext compartido y conexiones con caché de DNS"""
+
+    def __init__(self, ssl_context: ssl.SSLContext, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CachedHTTPConnectionPool,
+            'https': _CachedHTTPSConnectionPool,
+        }
+
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        if verify is True:
+            # Los certificados ya están en ssl_context: no recargarlos en cada conexión
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+
+
+@dataclass
+class HostStats:
+    """Latencia acumulada de un host"""
+    requests: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_ms': round(self.avg_ms, 1),
+            'max_ms': round(self.max_ms, 1),
+            'last_ms': round(self.last_ms, 1),
+        }
+
+
+class HTTPTransport:
+    """
+    Sesión HTTP saliente compartida.
+
+    Uso:
+        transport = get_transport()
+        transport.set_timeout('api.telegram.org', connect=3, read=10)
+        response = transport.post(url, json=message)
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 default_timeout: Timeout = (5.0, 15.0)):
+        self.default_timeout = default_timeout
+        self._timeouts: Dict[str, Timeout] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+        # Un solo contexto TLS: certificados cargados una vez para todas las conexiones
+        self.ssl_context = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+        adapter = _TransportAdapter(self.ssl_context, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def set_timeout(self, host: str, connect: float, read: float):
+        """Timeout para un destino (host sin puerto)"""
+        with self._lock:
+            self._timeouts[host.lower()] = (connect, read)
+
+    def timeout_for(self, host: str) -> Timeout:
+        return self._timeouts.get(host.lower(), self.default_timeout)
+
+    def request(self, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+        """
+        Petición HTTP por el pool compartido.
+
+        Args:
+            method: GET, POST, ...
+            url: URL absoluta
+            timeout: Sobrescribe el timeout del destino
+            **kwargs: Argumentos de requests (json, headers, params, ...)
+        """
+        host = (urlsplit(url).hostname or '').lower()
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=timeout or self.timeout_for(host), **kwargs)
+        except requests.exceptions.RequestException:
+            self._record(host, time.perf_counter() - start, error=True)
+            raise
+        self._record(host, time.perf_counter() - start, error=response.status_code >= 500)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def _record(self, host: str, elapsed: float, error: bool):
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._stats.get(host)
+            if stats is None:
+                stats = self._stats[host] = HostStats()
+            stats.requests += 1
+            stats.errors += int(error)
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.last_ms = elapsed_ms
+        if error:
+            logger.debug(f"Petición a {host} falló ({elapsed_ms:.0f} ms)")
+
+    def stats(self) -> Dict[str, Dict]:
+        """Latencia por host: {host: {requests, errors, avg_ms, max_ms, last_ms}}"""
+        with self._lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+    def close(self):
+        self.session.close()
+
+
+_transport: Optional[HTTPTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Transporte compartido del proceso (se crea en el primer uso)"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
@@ -0,0 +1,315 @@
+"""
+Plugin Host - Ejecuta cada plugin en su propio proceso.
+
+El proceso principal usa PluginProcessProxy, que implementa la misma API de
+BasePlugin y reenvía cada llamada al proceso del plugin con un protocolo
+binario compacto:
+
+    frame = cabecera (>IB: id de llamada, opcode) + payload pickle (protocolo 5)
+
+Un plugin que se bloquea, fuga memoria o truena solo afecta a su proceso: el
+proxy lo reinicia (con límite de reinicios) y vuelve a ejecutar las llamadas
+de preparación (get_api_client, discover_devices).
+"""
+import importlib
+import logging
+import multiprocessing
+import pickle
+import struct
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+from plugins.base_plugin import BasePlugin
+
+logger = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct('>IB')
+
+OP_CALL = 1
+OP_RESULT = 3
+OP_ERROR = 4
+OP_SHUTDOWN = 5
+
+# Métodos cuyo resultado no cruza el proceso (p. ej. el cliente HTTP)
+LOCAL_RESULT_METHODS = frozenset(['get_api_client'])
+# Métodos que se vuelven a ejecutar tras reiniciar el proceso
+REPLAY_METHODS = ('get_api_client', 'discover_devices')
+
+
+class PluginUnavailableError(RuntimeError):
+    """El proceso del plugin murió o superó el límite de reinicios"""
+    pass
+
+
+def _encode(call_id: int, opcode: int, payload: Any) -> bytes:
+    return FRAME_HEADER.pack(call_id, opcode) + pickle.dumps(payload, protocol=5)
+
+
+def _decode(frame: bytes) -> Tuple[int, int, Any]:
+    call_id, opcode = FRAME_HEADER.unpack_from(frame)
+    return call_id, opcode, pickle.loads(frame[FRAME_HEADER.size:])
+
+
+def _picklable_error(error: Exception) -> Exception:
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+# ============================================================================
+# PROCESO DEL PLUGIN
+# ============================================================================
+
+def _worker_main(conn, module_name: str, class_name: str, log_level: int, max_workers: int):
+    """Punto de entrada del proceso que hospeda un plugin"""
+    logging.basicConfig(
+        level=log_level,
+        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    plugin = getattr(importlib.import_module(module_name), class_name)()
+    # Cada proceso tiene su propia copia de la configuración
+    from config import config
+    config.watch()
+    send_lock = threading.Lock()
+
+    def invoke(method: str, args, kwargs):
+        if method == '__describe__':
+            return {
+                'discovery_timeout': plugin.discovery_timeout,
+                'discovery_retries': plugin.discovery_retries,
+            }
+        result = getattr(plugin, method)(*args, **kwargs)
+        return None if method in LOCAL_RESULT_METHODS else result
+
+    def handle(call_id: int, opcode: int, payload):
+        try:
+            frame = _encode(call_id, OP_RESULT, invoke(*payload))
+        except Exception as e:
+            frame = _encode(call_id, OP_ERROR, _picklable_error(e))
+
+        with send_lock:
+            conn.send_bytes(frame)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=class_name) as executor:
+        while True:
+            try:
+                call_id, opcode, payload = _decode(conn.recv_bytes())
+            except (EOFError, OSError):
+                break
+            if opcode == OP_SHUTDOWN:
+                break
+            executor.submit(handle, call_id, opcode, payload)
+
+
+# ============================================================================
+# PROXY EN EL PROCESO PRINCIPAL
+# ============================================================================
+
+class PluginProcessProxy(BasePlugin):
+    """
+    BasePlugin que delega en un plugin hospedado en otro proceso.
+    """
+
+    def __init__(self, brand: str, module_name: str, class_name: str,
+                 call_timeout: float = 60.0, max_restarts: int = 5, restart_window: float = 300.0,
+                 max_workers: int = 8):
+        self.brand = brand
+        self.module_name = module_name
+        self.class_name = class_name
+        self.call_timeout = call_timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.max_workers = max_workers
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._process = None
+        self._conn = None
+        self._reader = None
+        self._pending: Dict[int, Future] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()  # proceso, ids y envío
+        self._restarts: List[float] = []
+        self._replay: Dict[str, Tuple[tuple, dict]] = {}
+        self._closed = False
+
+        self._start()
+        # Atributos de clase del plugin real (timeouts de descubrimiento, etc.)
+        attrs = self._call('__describe__')
+        self.discovery_timeout = attrs['discovery_timeout']
+        self.discovery_retries = attrs['discovery_retries']
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida del proceso
+    # ------------------------------------------------------------------
+
+    def _start(self):
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.module_name, self.class_name, logging.getLogger().level, self.max_workers),
+            name=f"plugin-{self.brand}",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._reader = threading.Thread(
+            target=self._read_loop, args=(parent_conn,), daemon=True, name=f"PluginHost-{self.brand}"
+        )
+        self._reader.start()
+        logger.info(f"Plugin {self.brand} hospedado en proceso {self._process.pid}")
+
+    def _read_loop(self, conn):
+        """Resolver futuros con las respuestas del proceso"""
+        while True:
+            try:
+                call_id, opcode, payload = _decode(conn.recv_bytes())
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(call_id, None)
+            if future is None:
+                continue  # Respuesta a una llamada que ya expiró
+            if opcode == OP_ERROR:
+                future.set_exception(payload)
+            else:
+                future.set_result(payload)
+
+        # El proceso terminó: fallar las llamadas en vuelo de esta conexión
+        with self._lock:
+            if conn is not self._conn:
+                return
+            self._conn = None  # La siguiente llamada reinicia el proceso
+            pending, self._pending = self._pending, {}
+        conn.close()
+        for future in pending.values():
+            future.set_exception(PluginUnavailableError(f"El proceso del plugin {self.brand} terminó"))
+
+    def _restart(self, reason: str, process=None):
+        """Reiniciar el proceso (supervisión)"""
+        with self._lock:
+            if process is not None and process is not self._process:
+                return  # Otro hilo ya lo reinició
+            now = time.monotonic()
+            self._restarts = [t for t in self._restarts if now - t < self.restart_window]
+            if len(self._restarts) >= self.max_restarts:
+                raise PluginUnavailableError(
+                    f"Plugin {self.brand} superó {self.max_restarts} reinicios en {self.restart_window}s"
+                )
+            self._restarts.append(now)
+
+            logger.warning(f"Reiniciando plugin {self.brand}: {reason}")
+            old_process, old_conn = self._process, self._conn
+            self._conn = None
+            pending, self._pending = self._pending, {}
+
+        for future in pending.values():
+            future.set_exception(PluginUnavailableError(reason))
+        self._stop_process(old_process, old_conn)
+
+        with self._lock:
+            self._start()
+
+        # Recuperar el estado del plugin (cliente API, mapa de dispositivos)
+        for method in REPLAY_METHODS:
+            if method in self._replay:
+                args, kwargs = self._replay[method]
+                try:
+                    self._call(method, *args, _replay=False, **kwargs)
+                except Exception as e:
+                    logger.error(f"Error restaurando {self.brand}.{method}: {e}")
+
+    @staticmethod
+    def _stop_process(process, conn, timeout: float = 2.0):
+        try:
+            if conn is not None:
+                conn.send_bytes(_encode(0, OP_SHUTDOWN, None))
+        except Exception:
+            pass
+        if process is not None:
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join(timeout)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        """Detener el proceso del plugin"""
+        self._closed = True
+        with self._lock:
+            process, conn = self._process, self._conn
+            self._conn = None
+        self._stop_process(process, conn)
+
+    # ------------------------------------------------------------------
+    # Llamadas
+    # ------------------------------------------------------------------
+
+    def _submit(self, opcode: int, payload: Any) -> Future:
+        if self._closed:
+            raise PluginUnavailableError(f"Plugin {self.brand} cerrado")
+
+        process = self._process
+        if process is None or self._conn is None or not process.is_alive():
+            self._restart("el proceso no está vivo", process)
+
+        future: Future = Future()
+        frame_payload = pickle.dumps(payload, protocol=5)
+        with self._lock:
+            self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+            call_id = self._next_id
+            self._pending[call_id] = future
+            try:
+                self._conn.send_bytes(FRAME_HEADER.pack(call_id, opcode) + frame_payload)
+            except (OSError, AttributeError) as e:
+                self._pending.pop(call_id, None)
+                raise PluginUnavailableError(f"No se pudo enviar al plugin {self.brand}: {e}")
+        return future
+
+    def _wait(self, future: Future, what: str, timeout: Optional[float]):
+        process = self._process
+        try:
+            return future.result(timeout=timeout or self.call_timeout)
+        except FutureTimeoutError:
+            # Un plugin colgado no debe retener al resto: se recicla el proceso
+            self._restart(f"timeout en {what}", process)
+            raise TimeoutError(f"Timeout en {self.brand}.{what}")
+
+    def _call(self, method: str, *args, _replay: bool = True, _timeout: Optional[float] = None, **kwargs):
+        if _replay and method in REPLAY_METHODS:
+            self._replay[method] = (args, kwargs)
+        future = self._submit(OP_CALL, (method, args, kwargs))
+        return self._wait(future, method, _timeout)
+
+    # ------------------------------------------------------------------
+    # API BasePlugin
+    # ------------------------------------------------------------------
+
+    def get_supported_devices(self) -> List[str]:
+        return self._call('get_supported_devices')
+
+    def get_api_client(self) -> object:
+        """El cliente vive en el proceso del plugin; aquí solo se inicializa"""
+        return self._call('get_api_client')
+
+    def create_device(self, device_type: str, device_data: dict) -> object:
+        return self._call('create_device', device_type, device_data)
+
+    def discover_devices(self) -> List[dict]:
+        return self._call('discover_devices')
+
+    def get_device_state(self, device_id: str, device_type: str) -> Dict:
+        return self._call('get_device_state', device_id, device_type)
+
+    def get_devices_state(self, device_ids: List[str], device_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Estado de varios dispositivos: una sola ida y vuelta al proceso"""
+        return self._call('get_devices_state', list(device_ids), device_types)
+
+    def send_command(self, device_id: str, command_data: Dict[str, Any], credentials: Dict[str, Any] | None = None) -> bool:
+        return self._call('send_command', device_id, command_data, credentials)
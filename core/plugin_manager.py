@@ -1,54 +1,128 @@
 from asyncio.log import logger
 import importlib
-import inspect
-from pathlib import Path
+import threading
+import time
 from typing import Dict, List, Optional
+from config import Config, config
 from plugins.base_plugin import BasePlugin
+from plugins.manifest import PluginSpec, load_manifest
 
 
 class PluginManager:
-    """Gestor central de plugins - Descubre y registra plugins automáticamente"""
-    
+    """
+    Gestor central de plugins.
+    Usa el manifiesto de plugins (marca -> módulo) y solo importa los plugins
+    de marcas con credenciales en config.conf, cada uno en su primer uso.
+
+    Con [PLUGINS] isolation = process cada plugin corre en su propio proceso
+    (ver core.plugin_host).
+    """
+
     def __init__(self):
-        self.plugins: Dict[str, BasePlugin] = {}
+        self.plugins: Dict[str, BasePlugin] = {}  # Plugins ya cargados
+        self.manifest: Dict[str, PluginSpec] = {}  # Plugins configurados (sin importar)
+        self.load_times: Dict[str, float] = {}  # brand -> segundos de importación
+        self.isolation = 'none'  # 'none' | 'process'
+        self._lock = threading.Lock()
         self._discover_plugins()
-    
+
     def _discover_plugins(self):
         """
-        Descubre automáticamente todos los plugins en la carpeta plugins/
-        Esto permite agregar nuevas marcas sin modificar código existente
+        Lee el manifiesto y se queda con las marcas configuradas.
+        No importa ningún módulo: la carga es perezosa (ver get_plugin).
         """
-        
-        plugin_dir = Path(__file__).parent.parent / 'plugins'
-        
-        # Buscar todos los archivos *_plugin.py
-        for plugin_file in plugin_dir.glob('*_plugin.py'):
-            if plugin_file.name == 'base_plugin.py':
-                continue
-            
-            # Importar módulo dinámicamente
-            module_name = f"plugins.{plugin_file.stem}"
-            module = importlib.import_module(module_name)
-            
-            # Buscar clases que hereden de BasePlugin
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isclass(obj) and 
-                    issubclass(obj, BasePlugin) and 
-                    obj != BasePlugin):
-                    
-                    # Instanciar y registrar plugin
-                    plugin = obj()
-                    self.register_plugin(plugin)
-    
+        self.isolation = config.get('PLUGINS', 'isolation', fallback='none').strip().lower()
+
+        for brand, spec in load_manifest().items():
+            if self._is_configured(config, spec):
+                self.manifest[brand] = spec
+                logger.info(f"Plugin configurado: {brand} ({spec.module})")
+            else:
+                logger.debug(f"Plugin omitido (sin credenciales): {brand}")
+
+    @staticmethod
+    def _is_configured(conf: Config, spec: PluginSpec) -> bool:
+        """True si la sección de la marca existe y tiene sus credenciales"""
+        if not conf.has_section(spec.config_section):
+            return False
+
+        for key in spec.required_keys:
+            value = conf.get(spec.config_section, key, fallback='').strip()
+            # Los valores de la plantilla ("TU_...") cuentan como vacíos
+            if not value or value.upper().startswith('TU_'):
+                return False
+        return True
+
+    def _load_plugin(self, brand: str) -> Optional[BasePlugin]:
+        """Importar e instanciar el plugin de una marca (una sola vez)"""
+        with self._lock:
+            plugin = self.plugins.get(brand)
+            if plugin is not None:
+                return plugin
+
+            spec = self.manifest.get(brand)
+            if spec is None:
+                return None
+
+            start = time.perf_counter()
+            try:
+                if self.isolation == 'process':
+                    from core.plugin_host import PluginProcessProxy
+                    plugin = PluginProcessProxy(spec.brand, spec.module, spec.class_name)
+                else:
+                    module = importlib.import_module(spec.module)
+                    plugin_class = getattr(module, spec.class_name)
+                    if not issubclass(plugin_class, BasePlugin):
+                        raise TypeError(f"{spec.class_name} no hereda de BasePlugin")
+                    plugin = plugin_class()
+            except Exception as e:
+                logger.error(f"Error cargando plugin {brand} ({spec.module}): {e}")
+                # No reintentar en cada llamada
+                self.manifest.pop(brand, None)
+                return None
+
+            elapsed = time.perf_counter() - start
+            self.load_times[brand] = elapsed
+            logger.info(f"Plugin {brand} cargado en {elapsed * 1000:.1f} ms")
+
+            # Dentro del lock: otro get_plugin() concurrente no debe crear un segundo plugin
+            self.plugins[brand] = plugin
+        logger.info(f"Plugin registrado: {brand}")
+        return plugin
+
     def register_plugin(self, plugin: BasePlugin):
         """Registrar un plugin manualmente"""
-        self.plugins[plugin.brand] = plugin
+        with self._lock:
+            self.plugins[plugin.brand] = plugin
         logger.info(f"Plugin registrado: {plugin.brand}")
-    
+
     def get_plugin(self, brand: str) -> Optional[BasePlugin]:
-        """Obtener plugin por marca"""
-        return self.plugins.get(brand.lower())
-    
+        """Obtener plugin por marca (lo importa en el primer uso)"""
+        brand = brand.lower()
+        plugin = self.plugins.get(brand)
+        if plugin is None and brand in self.manifest:
+            plugin = self._load_plugin(brand)
+        return plugin
+
+    def get_configured_brands(self) -> List[str]:
+        """Marcas con credenciales (cargadas o no)"""
+        return sorted(set(self.manifest) | set(self.plugins))
+
     def get_all_plugins(self) -> List[BasePlugin]:
-        """Obtener todos los plugins registrados"""
-        return list(self.plugins.values())
\ No newline at end of file
+        """Obtener todos los plugins configurados (cargándolos si hace falta)"""
+        plugins = [self.get_plugin(brand) for brand in self.get_configured_brands()]
+        return [plugin for plugin in plugins if plugin is not None]
+
+    def get_load_report(self) -> Dict[str, float]:
+        """Tiempo de importación por plugin (segundos)"""
+        return dict(self.load_times)
+
+    def shutdown(self):
+        """Detener los procesos de plugins aislados"""
+        for plugin in list(self.plugins.values()):
+            close = getattr(plugin, 'close', None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.error(f"Error deteniendo plugin {plugin.brand}: {e}")
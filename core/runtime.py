@@ -0,0 +1,93 @@
+"""
+Runtime unificado: un solo loop asyncio para HAP, SmartThings y la sincronización.
+
+En modo "threads" cada servicio corre en su propio hilo (el loop de pyhap,
+el servidor de Flask y el hilo de sync) y se coordinan con locks. En modo
+"unified" los drivers HAP, el endpoint HTTP de SmartThings y el loop de
+sincronización comparten este loop; las llamadas bloqueantes (plugins,
+handlers de Flask) se ejecutan en el executor del runtime.
+"""
+import asyncio
+import logging
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UnifiedRuntime:
+    """
+    Loop asyncio compartido y executor para el trabajo bloqueante.
+
+    Uso:
+        runtime = UnifiedRuntime(use_uvloop=True)
+        runtime.run(app._run_unified)  # bloqueante hasta request_stop()
+    """
+
+    def __init__(self, use_uvloop: bool = False, max_workers: Optional[int] = None):
+        self.loop = self._new_loop(use_uvloop)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Runtime")
+        self.loop.set_default_executor(self.executor)
+        self.thread: Optional[threading.Thread] = None
+        self._stop_event = asyncio.Event()
+
+    @staticmethod
+    def _new_loop(use_uvloop: bool) -> asyncio.AbstractEventLoop:
+        if use_uvloop:
+            try:
+                import uvloop
+                logger.info("Runtime unificado con uvloop")
+                return uvloop.new_event_loop()
+            except ImportError:
+                logger.warning("uvloop no está instalado, se usa el loop de asyncio")
+        return asyncio.new_event_loop()
+
+    def run(self, main: Callable[['UnifiedRuntime'], Awaitable[Any]]):
+        """
+        Ejecutar main(runtime) en el loop (bloqueante).
+
+        Args:
+            main: Corrutina principal; debe terminar tras wait_stopped()
+        """
+        asyncio.set_event_loop(self.loop)
+        self.thread = threading.current_thread()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                self.loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass  # Windows o fuera del hilo principal
+
+        try:
+            self.loop.run_until_complete(main(self))
+        finally:
+            try:
+                # Tareas que quedaron en vuelo (p. ej. anuncios mDNS)
+                pending = asyncio.all_tasks(self.loop)
+                for task in pending:
+                    task.cancel()
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            finally:
+                self.executor.shutdown(wait=False)
+                self.loop.close()
+                logger.info("Runtime unificado detenido")
+
+    def request_stop(self):
+        """Pedir la detención (se puede llamar desde cualquier hilo)"""
+        if self.loop.is_closed():
+            return
+        if threading.current_thread() is self.thread:
+            self._stop_event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._stop_event.set)
+
+    async def wait_stopped(self):
+        """Esperar a que se pida la detención"""
+        await self._stop_event.wait()
+
+    def run_blocking(self, func: Callable, *args) -> Awaitable[Any]:
+        """Ejecutar una llamada bloqueante en el executor del runtime"""
+        return self.loop.run_in_executor(self.executor, func, *args)
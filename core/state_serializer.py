@@ -0,0 +1,122 @@
+"""
+Serialización incremental de estados.
+Mantiene por dispositivo el dict (y su forma en bytes) del último estado y
+solo reconstruye los campos que cambiaron, en lugar de llamar a asdict()
+en cada poll.
+"""
+import copy
+import threading
+from dataclasses import fields, is_dataclass, asdict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+import orjson
+
+_MISSING = object()
+_SCALARS = (str, int, float, bool, type(None))
+
+
+class _CachedState:
+    """Entrada de caché de un dispositivo"""
+    __slots__ = ('state_type', 'data', 'snapshot', 'encoded')
+
+    def __init__(self, state_type: type):
+        self.state_type = state_type
+        # data es interno (se modifica en cada poll); snapshot es la copia
+        # que se entrega y no se vuelve a tocar
+        self.data: Dict[str, Any] = {}
+        self.snapshot: Dict[str, Any] = {}
+        self.encoded: Optional[bytes] = None
+
+
+class IncrementalStateSerializer:
+    """
+    Serializador con caché por dispositivo.
+
+    Cada poll con cambios devuelve un dict nuevo; el de un poll anterior
+    no se modifica, así los callbacks pueden comparar estado viejo y nuevo.
+    Los consumidores no deben modificar el dict devuelto.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, _CachedState] = {}
+        self._field_names: Dict[type, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def serialize(self, device_id: str, state: Any) -> Tuple[Dict[str, Any], FrozenSet[str]]:
+        """
+        Actualizar la forma serializada de un dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            state: Estado del plugin (dataclass, dict u objeto)
+
+        Returns:
+            (estado, campos que cambiaron)
+        """
+        with self._lock:
+            entry = self._cache.get(device_id)
+            if entry is None or entry.state_type is not type(state):
+                entry = _CachedState(type(state))
+                self._cache[device_id] = entry
+
+            data = entry.data
+            changed = []
+            seen = 0
+            for name, value in self._iter_fields(state):
+                seen += 1
+                if not isinstance(value, _SCALARS):
+                    value = _copy_value(value)
+                current = data.get(name, _MISSING)
+                if current is _MISSING or current != value:
+                    data[name] = value
+                    changed.append(name)
+
+            # Campos que desaparecieron (estados tipo dict)
+            if seen < len(data):
+                current_names = {name for name, _ in self._iter_fields(state)}
+                for name in [n for n in data if n not in current_names]:
+                    del data[name]
+                    changed.append(name)
+
+            if changed:
+                entry.snapshot = dict(data)
+                entry.encoded = None
+
+            return entry.snapshot, frozenset(changed)
+
+    def to_bytes(self, device_id: str) -> Optional[bytes]:
+        """Forma JSON (bytes) del último estado, codificada solo si cambió"""
+        with self._lock:
+            entry = self._cache.get(device_id)
+            if entry is None:
+                return None
+            if entry.encoded is None:
+                entry.encoded = orjson.dumps(entry.data, default=str)
+            return entry.encoded
+
+    def forget(self, device_id: str):
+        """Eliminar la caché de un dispositivo"""
+        with self._lock:
+            self._cache.pop(device_id, None)
+
+    def _iter_fields(self, state: Any):
+        """Iterar (nombre, valor) de primer nivel sin copiar"""
+        if isinstance(state, dict):
+            return state.items()
+
+        if is_dataclass(state):
+            state_type = type(state)
+            names = self._field_names.get(state_type)
+            if names is None:
+                names = tuple(f.name for f in fields(state_type))
+                self._field_names[state_type] = names
+            return ((name, getattr(state, name)) for name in names)
+
+        return vars(state).items()
+
+
+def _copy_value(value: Any) -> Any:
+    """Copiar un valor no escalar para que la caché no comparta referencias"""
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    return copy.deepcopy(value)
@@ -0,0 +1,122 @@
+"""
+Compilador de comandos LG.
+Valida comandos contra el WasherProfile cacheado por modelo y memoiza el
+payload de la API por cada par (comando, modelo).
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from models.LG.washer import WasherCommand, WasherProfile
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCommandError(ValueError):
+    """Comando rechazado localmente (no cumple el perfil del dispositivo)"""
+    pass
+
+
+class LGCommandCompiler:
+    """
+    Compila comandos tipados (WasherCommand) al payload de la API LG.
+
+    - El perfil se descarga una sola vez por modelo; si falla no se
+      reintenta hasta PROFILE_RETRY_TTL (mientras tanto se valida con los
+      valores DEFAULT_*).
+    - Los comandos inválidos se rechazan antes de llamar a LG.
+    - El payload compilado se cachea por (comando, modelo).
+    """
+
+    # Segundos antes de volver a pedir un perfil que no se pudo obtener
+    PROFILE_RETRY_TTL = 300.0
+
+    def __init__(self, profile_loader: Callable[[str], Dict[str, Any]]):
+        """
+        Args:
+            profile_loader: Función device_id -> JSON crudo del perfil
+        """
+        self._profile_loader = profile_loader
+        self._profiles: Dict[str, WasherProfile] = {}  # model -> WasherProfile
+        self._failed: Dict[str, float] = {}  # model -> monotonic hasta el que no se reintenta
+        self._compiled: Dict[Tuple[WasherCommand, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_profile(self, device_id: str, model: str) -> Optional[WasherProfile]:
+        """
+        Obtener el perfil del modelo (descargándolo la primera vez).
+
+        Returns:
+            WasherProfile o None si no se pudo obtener
+        """
+        profile = self._profiles.get(model)
+        if profile is not None:
+            return profile
+
+        retry_at = self._failed.get(model)
+        if retry_at is not None and time.monotonic() < retry_at:
+            return None
+
+        try:
+            raw_profile = self._profile_loader(device_id)
+            if not raw_profile:
+                raise ValueError("perfil vacío")
+            profile = WasherProfile.from_json(raw_profile)
+        except Exception as e:
+            logger.warning(f"No se pudo obtener el perfil de {model}, "
+                           f"se usan valores por defecto durante {self.PROFILE_RETRY_TTL:.0f}s: {e}")
+            with self._lock:
+                self._failed[model] = time.monotonic() + self.PROFILE_RETRY_TTL
+            return None
+
+        with self._lock:
+            self._profiles[model] = profile
+            self._failed.pop(model, None)
+        return profile
+
+    def compile(self, command: WasherCommand, device_id: str, model: str) -> Dict[str, Any]:
+        """
+        Validar y compilar un comando.
+
+        Args:
+            command: Comando tipado
+            device_id: ID del dispositivo (para descargar el perfil)
+            model: Modelo del dispositivo (llave de la caché)
+
+        Returns:
+            Payload listo para la API LG (no modificar, es compartido)
+
+        Raises:
+            InvalidCommandError: Si el comando no cumple el perfil
+        """
+        key = (command, model)
+        payload = self._compiled.get(key)
+        if payload is not None:
+            return payload
+
+        profile = self.get_profile(device_id, model)
+        valid, error = command.validate(profile)
+        if not valid:
+            raise InvalidCommandError(error)
+
+        payload = command.to_api_format()
+
+        # Solo se memoiza lo validado contra el perfil real
+        if profile is not None:
+            with self._lock:
+                self._compiled[key] = payload
+        return payload
+
+    def invalidate(self, model: Optional[str] = None):
+        """Invalidar perfiles y payloads (de un modelo o todos)"""
+        with self._lock:
+            if model is None:
+                self._profiles.clear()
+                self._failed.clear()
+                self._compiled.clear()
+                return
+            self._profiles.pop(model, None)
+            self._failed.pop(model, None)
+            for key in [k for k in self._compiled if k[1] == model]:
+                del self._compiled[key]
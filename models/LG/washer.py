@@ -29,7 +29,10 @@ class EnumValue:
     label: List[str] = field(default_factory=list)
     
     @classmethod
-    def from_json(cls, json_data: Dict[str, Any]) -> 'EnumValue':
+    def from_json(cls, json_data) -> 'EnumValue':
+        # ThinQ Connect lista los valores como strings sueltos
+        if isinstance(json_data, str):
+            return cls(label=[json_data])
         return cls(label=json_data.get('label', []))
 
 
@@ -46,10 +49,11 @@ class PropertyValue:
         r_values = None
         w_values = None
         
-        if 'r' in json_data:
+        # Si r/w es un dict es un rango (lo toma Property), no un enum
+        if isinstance(json_data.get('r'), list):
             r_values = [EnumValue.from_json(item) for item in json_data['r']]
         
-        if 'w' in json_data:
+        if isinstance(json_data.get('w'), list):
             w_values = [EnumValue.from_json(item) for item in json_data['w']]
         
         return cls(r=r_values, w=w_values)
@@ -99,6 +103,13 @@ class Property:
         prop_range = None
         if 'range' in json_data:
             prop_range = RangeValue.from_json(json_data['range'])
+        else:
+            # ThinQ Connect: "value": {"w": {"min": .., "max": .., "step": ..}}
+            value = json_data.get('value')
+            if isinstance(value, dict):
+                bounds = value.get('w') if isinstance(value.get('w'), dict) else value.get('r')
+                if isinstance(bounds, dict):
+                    prop_range = RangeValue.from_json(bounds)
         
         return cls(
             type=json_data.get('type', 'string'),
@@ -107,6 +118,23 @@ class Property:
             range=prop_range
         )
 
+    def merge(self, other: 'Property'):
+        """Sumar los valores de la misma propiedad declarada en otra ubicación"""
+        if self.range is None:
+            self.range = other.range
+        if other.value is None:
+            return
+        if self.value is None:
+            self.value = other.value
+            return
+        for mode in ('r', 'w'):
+            current = getattr(self.value, mode) or []
+            known = {label for enum_value in current for label in enum_value.label}
+            extra = [enum_value for enum_value in getattr(other.value, mode) or []
+                     if not known.issuperset(enum_value.label)]
+            if extra:
+                setattr(self.value, mode, current + extra)
+
 
 @dataclass
 class Notification:
@@ -141,8 +169,37 @@ class WasherProfile(LGDeviceProfile):
         "push": [...]
       }
     }
+
+    En ThinQ Connect las propiedades vienen agrupadas por recurso
+    ("timer": {"relativeHourToStart": {...}}) y se indexan como
+    "timer.relativeHourToStart". Las lavadoras con varias ubicaciones
+    (MAIN/MINI) traen "property" como lista, un bloque por ubicación.
     """
     device_type: str = "WASHER"
+
+    # Nombre en la API -> atributo
+    KNOWN_PROPERTIES = {
+        'state': 'state',
+        'course': 'course',
+        'smartCourse': 'smart_course',
+        'initialTime_H': 'initial_time_h',
+        'initialTime_M': 'initial_time_m',
+        'remainTime_H': 'remain_time_h',
+        'remainTime_M': 'remain_time_m',
+        'reserveTime_H': 'reserve_time_h',
+        'reserveTime_M': 'reserve_time_m',
+        'currentState': 'current_state',
+        'preState': 'pre_state',
+        'TCLCount': 'tcl_count',
+        'tempControl': 'temp_control',
+        'spinSpeed': 'spin_speed',
+        'rinseOption': 'rinse_option',
+        'dryLevel': 'dry_level',
+        'error': 'error',
+        'doorLock': 'door_lock',
+        'childLock': 'child_lock',
+        'remoteStart': 'remote_start',
+    }
     
     # Propiedades del dispositivo
     # Según el schema, estas son las propiedades principales:
@@ -185,125 +242,62 @@ class WasherProfile(LGDeviceProfile):
             Instancia de WasherProfile
         """
         properties = json_data.get('property', {})
+        blocks = properties if isinstance(properties, list) else [properties]
         
-        # Mapear propiedades conocidas
         profile = cls(
             device_type=json_data.get('deviceType', 'WASHER')
         )
         
-        # Parsear cada propiedad
-        if 'state' in properties:
-            profile.state = Property.from_json(properties['state'])
-        
-        if 'course' in properties:
-            profile.course = Property.from_json(properties['course'])
-        
-        if 'smartCourse' in properties:
-            profile.smart_course = Property.from_json(properties['smartCourse'])
-        
-        if 'initialTime_H' in properties:
-            profile.initial_time_h = Property.from_json(properties['initialTime_H'])
-        
-        if 'initialTime_M' in properties:
-            profile.initial_time_m = Property.from_json(properties['initialTime_M'])
-        
-        if 'remainTime_H' in properties:
-            profile.remain_time_h = Property.from_json(properties['remainTime_H'])
-        
-        if 'remainTime_M' in properties:
-            profile.remain_time_m = Property.from_json(properties['remainTime_M'])
-        
-        if 'reserveTime_H' in properties:
-            profile.reserve_time_h = Property.from_json(properties['reserveTime_H'])
-        
-        if 'reserveTime_M' in properties:
-            profile.reserve_time_m = Property.from_json(properties['reserveTime_M'])
-        
-        if 'currentState' in properties:
-            profile.current_state = Property.from_json(properties['currentState'])
-        
-        if 'preState' in properties:
-            profile.pre_state = Property.from_json(properties['preState'])
-        
-        if 'TCLCount' in properties:
-            profile.tcl_count = Property.from_json(properties['TCLCount'])
-        
-        if 'tempControl' in properties:
-            profile.temp_control = Property.from_json(properties['tempControl'])
-        
-        if 'spinSpeed' in properties:
-            profile.spin_speed = Property.from_json(properties['spinSpeed'])
-        
-        if 'rinseOption' in properties:
-            profile.rinse_option = Property.from_json(properties['rinseOption'])
-        
-        if 'dryLevel' in properties:
-            profile.dry_level = Property.from_json(properties['dryLevel'])
-        
-        if 'error' in properties:
-            profile.error = Property.from_json(properties['error'])
-        
-        if 'doorLock' in properties:
-            profile.door_lock = Property.from_json(properties['doorLock'])
-        
-        if 'childLock' in properties:
-            profile.child_lock = Property.from_json(properties['childLock'])
-        
-        if 'remoteStart' in properties:
-            profile.remote_start = Property.from_json(properties['remoteStart'])
-        
-        # Guardar propiedades adicionales que no conocemos
-        known_props = {
-            'state', 'course', 'smartCourse', 'initialTime_H', 'initialTime_M',
-            'remainTime_H', 'remainTime_M', 'reserveTime_H', 'reserveTime_M',
-            'currentState', 'preState', 'TCLCount', 'tempControl', 'spinSpeed',
-            'rinseOption', 'dryLevel', 'error', 'doorLock', 'childLock', 'remoteStart'
-        }
-        
-        for key, value in properties.items():
-            if key not in known_props:
-                profile.additional_properties[key] = Property.from_json(value)
+        # Una entrada por propiedad; si se repite en otra ubicación se combinan
+        parsed: Dict[str, Property] = {}
+        for block in blocks:
+            for name, prop in cls._iter_properties(block):
+                if name in parsed:
+                    parsed[name].merge(prop)
+                else:
+                    parsed[name] = prop
+        
+        for name, prop in parsed.items():
+            attr = cls.KNOWN_PROPERTIES.get(name)
+            if attr:
+                setattr(profile, attr, prop)
+            else:
+                # Guardar propiedades adicionales que no conocemos
+                profile.additional_properties[name] = prop
         
         # Parsear notificaciones
         if 'notification' in json_data:
             profile.notification = Notification.from_json(json_data['notification'])
         
         return profile
+
+    @staticmethod
+    def _iter_properties(block: Dict[str, Any]):
+        """(nombre, Property) de un bloque; las agrupadas por recurso se nombran recurso.nombre"""
+        if not isinstance(block, dict):
+            return
+        for key, value in block.items():
+            if not isinstance(value, dict):
+                continue
+            if 'type' in value:
+                yield key, Property.from_json(value)
+                continue
+            for name, nested in value.items():
+                if isinstance(nested, dict):
+                    yield f"{key}.{name}", Property.from_json(nested)
     
     def get_property(self, name: str) -> Optional[Property]:
         """
         Obtener una propiedad por nombre.
         
         Args:
-            name: Nombre de la propiedad (en formato camelCase como viene de la API)
+            name: Nombre de la propiedad (en formato camelCase como viene de la API,
+                  "recurso.nombre" si viene agrupada por recurso)
         """
-        # Mapeo de nombres
-        prop_map = {
-            'state': self.state,
-            'course': self.course,
-            'smartCourse': self.smart_course,
-            'initialTime_H': self.initial_time_h,
-            'initialTime_M': self.initial_time_m,
-            'remainTime_H': self.remain_time_h,
-            'remainTime_M': self.remain_time_m,
-            'reserveTime_H': self.reserve_time_h,
-            'reserveTime_M': self.reserve_time_m,
-            'currentState': self.current_state,
-            'preState': self.pre_state,
-            'TCLCount': self.tcl_count,
-            'tempControl': self.temp_control,
-            'spinSpeed': self.spin_speed,
-            'rinseOption': self.rinse_option,
-            'dryLevel': self.dry_level,
-            'error': self.error,
-            'doorLock': self.door_lock,
-            'childLock': self.child_lock,
-            'remoteStart': self.remote_start
-        }
-        
         # Buscar en propiedades conocidas
-        if name in prop_map:
-            return prop_map[name]
+        attr = self.KNOWN_PROPERTIES.get(name)
+        if attr:
+            return getattr(self, attr)
         
         # Buscar en propiedades adicionales
         return self.additional_properties.get(name)
@@ -443,11 +437,14 @@ class WasherState(LGDeviceState):
 # WASHER COMMAND (Comando para control)
 # ============================================================================
 
-@dataclass
+@dataclass(frozen=True)
 class WasherCommand:
     """
     Comando para enviar a la lavadora.
     Basado en el Request Schema de control.
+
+    Es inmutable (hashable) para poder memoizar el payload compilado
+    por cada par (comando, modelo).
     """
     
     # Curso
@@ -466,6 +463,11 @@ class WasherCommand:
     
     # Control remoto
     operation_mode: Optional[str] = None  # "START" o "STOP" "POWER_OFF"
+
+    # Valores por defecto cuando el perfil no declara la propiedad
+    DEFAULT_LOCATIONS = ('MAIN', 'MINI')
+    DEFAULT_OPERATION_MODES = ('START', 'STOP', 'POWER_OFF')
+    DEFAULT_RESERVE_RANGE = {'min': 0, 'max': 19, 'step': 1}
     
     def to_api_format(self) -> Dict[str, Any]:
         """
@@ -476,33 +478,73 @@ class WasherCommand:
         
         if self.location_name is not None:
             result.update({'location':{'locationName': self.location_name}})
-            
-        if self.reserve_time_h is not None:
-            result.update({'reserveTime_H': self.reserve_time_h})
         
         if self.operation_mode is not None:
             result.update({'operation':{'washerOperationMode': self.operation_mode}})
+            
+        if self.reserve_time_h is not None:
+            result.update({'timer': {'relativeHourToStart': self.reserve_time_h}})
         
         return result
     
-    #def validate(self, profile: WasherProfile) -> tuple[bool, Optional[str]]:
-    def validate(self) -> tuple[bool, Optional[str]]:
+    def validate(self, profile: Optional[WasherProfile] = None) -> tuple[bool, Optional[str]]:
         """
         Validar comando contra el perfil.
+
+        Usa los valores de escritura y rangos declarados en el perfil;
+        si el perfil no existe o no declara la propiedad se usan los valores
+        por defecto de la clase.
+
+        Args:
+            profile: Perfil de la lavadora (opcional)
         
         Returns:
             (es_válido, mensaje_error)
         """
-        # Validar location
-        if self.location_name is not None and not self.location_name not in ['MAIN', 'MINI']:
-            return False, "La ubicación debe ser 'MAIN' o 'MINI'"
+        if self.location_name is None and self.operation_mode is None and self.reserve_time_h is None:
+            return False, "El comando está vacío"
+
+        # Validar location (suele ser de solo lectura: vale cualquier ubicación declarada)
+        if self.location_name is not None:
+            locations = self._allowed_values(profile, ('location.locationName', 'locationName'),
+                                             self.DEFAULT_LOCATIONS, modes=('w', 'r'))
+            if self.location_name not in locations:
+                return False, f"La ubicación debe ser una de {list(locations)}"
         
-        if self.reserve_time_h is not None and not (0 <= self.reserve_time_h <= 19):
-            return False, "Horas de reserva entre 0 y 19"
+        # Validar modo de operación
+        if self.operation_mode is not None:
+            modes = self._allowed_values(profile, ('operation.washerOperationMode', 'washerOperationMode'),
+                                         self.DEFAULT_OPERATION_MODES)
+            if self.operation_mode not in modes:
+                return False, f"El modo de operación debe ser uno de {list(modes)}"
         
-        # Validar remote_start
-        if self.operation_mode is not None and self.operation_mode not in ['START', 'STOP', 'POWER_OFF']:
-            return False, "remote_start debe ser 'ON' o 'OFF'"
+        # Validar horas de reserva
+        if self.reserve_time_h is not None:
+            reserve_range = None
+            if profile:
+                reserve_range = (profile.get_range('timer.relativeHourToStart')
+                                 or profile.get_range('relativeHourToStart')
+                                 or profile.get_range('reserveTime_H'))
+            reserve_range = reserve_range or self.DEFAULT_RESERVE_RANGE
+
+            hours = self.reserve_time_h
+            step = reserve_range.get('step') or 1
+            if (not isinstance(hours, int)
+                    or not (reserve_range['min'] <= hours <= reserve_range['max'])
+                    or (hours - reserve_range['min']) % step != 0
+                    or hours in (reserve_range.get('except') or [])):
+                return False, f"Horas de reserva entre {reserve_range['min']} y {reserve_range['max']}"
         
         return True, None
-    
\ No newline at end of file
+
+    @staticmethod
+    def _allowed_values(profile: Optional[WasherProfile], property_names: tuple, default,
+                        modes: tuple = ('w',)) -> tuple:
+        """Valores del perfil (primer nombre y modo que los declare) o los valores por defecto"""
+        if profile:
+            for property_name in property_names:
+                for mode in modes:
+                    allowed = profile.get_allowed_values(property_name, mode=mode)
+                    if allowed:
+                        return tuple(allowed)
+        return default
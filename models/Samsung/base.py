@@ -0,0 +1,12 @@
+from models.base import BaseDevice, BaseDeviceProfile, BaseDeviceState
+class SamsungDeviceProfile(BaseDeviceProfile):
+    """Perfil específico de Samsung (componentes y capacidades SmartThings)"""
+    pass
+
+class SamsungDeviceState(BaseDeviceState):
+    """Estado específico de Samsung"""
+    pass
+
+class SamsungDevice(BaseDevice):
+    brand = "samsung"
+    # Lógica común a todos los dispositivos Samsung
@@ -0,0 +1,118 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+from models.Samsung.base import SamsungDevice, SamsungDeviceState
+
+
+class SamsungWasher(SamsungDevice):
+    device_type = "WASHER"
+
+
+# ============================================================================
+# DEVICE STATE (Snapshot del estado)
+# ============================================================================
+
+@dataclass
+class SamsungWasherState(SamsungDeviceState):
+    """
+    Estado actual de la lavadora Samsung (snapshot).
+    Usa los mismos nombres de campo que WasherState (LG) para que el resto
+    del sistema (DeviceManager, FleetStateStore, bridges) sea agnóstico.
+    """
+
+    # Estado normalizado al vocabulario LG (RUNNING, RINSING, POWER_OFF, ...)
+    state: str = "POWER_OFF"
+    remote_start: Optional[bool] = False
+    remain_time_h: Optional[int] = None
+    remain_time_m: Optional[int] = None
+    tcl_count: Optional[int] = None
+    error: Optional[str] = None
+
+    # Valores crudos de SmartThings
+    machine_state: Optional[str] = None
+    job_state: Optional[str] = None
+    completion_time: Optional[str] = None
+
+    # washerJobState (SmartThings) -> estado LG
+    JOB_STATE_MAP = {
+        'airWash': 'REFRESHING',
+        'aIRinse': 'RINSING',
+        'aISpin': 'SPINNING',
+        'aIWash': 'RUNNING',
+        'cooling': 'COOL_DOWN',
+        'delayWash': 'RESERVED',
+        'drying': 'DRYING',
+        'finish': 'END',
+        'preWash': 'PREWASH',
+        'rinse': 'RINSING',
+        'spin': 'SPINNING',
+        'wash': 'RUNNING',
+        'weightSensing': 'DETECTING',
+        'wrinklePrevent': 'RUNNING',
+        'freezeProtection': 'FROZEN_PREVENT_RUNNING',
+    }
+
+    @classmethod
+    def from_json(cls, json_data: Dict[str, Any]) -> 'SamsungWasherState':
+        """
+        Parsear estado desde el status de SmartThings.
+
+        Args:
+            json_data: {'main': {capability: {attribute: {'value': ...}}}}
+        """
+        main = json_data.get('main', {})
+
+        def value(capability: str, attribute: str):
+            return (main.get(capability, {}).get(attribute) or {}).get('value')
+
+        switch = value('switch', 'switch')
+        machine_state = value('washerOperatingState', 'machineState')
+        job_state = value('washerOperatingState', 'washerJobState')
+        completion_time = value('washerOperatingState', 'completionTime')
+        remote_control = value('remoteControlStatus', 'remoteControlEnabled')
+
+        if switch == 'off':
+            state = 'POWER_OFF'
+        elif machine_state == 'pause':
+            state = 'PAUSE'
+        elif machine_state == 'run':
+            state = cls.JOB_STATE_MAP.get(job_state, 'RUNNING')
+        elif job_state == 'finish':
+            state = 'END'
+        else:
+            state = 'INITIAL' if switch == 'on' else 'POWER_OFF'
+
+        remaining = cls._remaining_minutes(completion_time) if machine_state == 'run' else None
+
+        return cls(
+            state=state,
+            remote_start=remote_control == 'true' or remote_control is True,
+            remain_time_h=None if remaining is None else remaining // 60,
+            remain_time_m=None if remaining is None else remaining % 60,
+            tcl_count=None,
+            error=None,
+            machine_state=machine_state,
+            job_state=job_state,
+            completion_time=completion_time,
+        )
+
+    @staticmethod
+    def _remaining_minutes(completion_time: Optional[str]) -> Optional[int]:
+        """Minutos hasta completionTime (ISO 8601, UTC)"""
+        if not completion_time:
+            return None
+        try:
+            finish = datetime.fromisoformat(completion_time.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        seconds = (finish - datetime.now(timezone.utc)).total_seconds()
+        return max(0, int(seconds // 60))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertir a diccionario"""
+        return asdict(self)
+
+    def is_online(self) -> bool:
+        """Verificar si está en ejecución"""
+        return self.machine_state == 'run'
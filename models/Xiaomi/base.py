@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict
+
+from models.base import BaseDevice, BaseDeviceProfile, BaseDeviceState
+class XiaomiDeviceProfile(BaseDeviceProfile):
+    """Perfil específico de Xiaomi (miIO.info)"""
+    pass
+
+@dataclass
+class XiaomiDeviceState(BaseDeviceState):
+    """
+    Estado de un dispositivo miIO: propiedades leídas por LAN.
+    """
+    state: str = "POWER_OFF"
+    online: bool = False
+    properties: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, json_data: Dict[str, Any]) -> 'XiaomiDeviceState':
+        """
+        Parsear estado desde las propiedades del dispositivo.
+
+        Args:
+            json_data: {propiedad: valor} ({} si el dispositivo no respondió)
+        """
+        power = json_data.get('power')
+        if not json_data:
+            state = "OFFLINE"
+        elif power in (False, 'off', 0):
+            state = "POWER_OFF"
+        else:
+            state = "ON"
+        return cls(state=state, online=bool(json_data), properties=dict(json_data))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convertir a diccionario"""
+        return asdict(self)
+
+    def is_online(self) -> bool:
+        return self.online
+
+class XiaomiDevice(BaseDevice):
+    brand = "xiaomi"
+    # Lógica común a todos los dispositivos Xiaomi
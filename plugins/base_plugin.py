@@ -1,5 +1,9 @@
+import logging
 from abc import abstractmethod
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
 
 
 class BasePlugin:
@@ -7,6 +11,13 @@ class BasePlugin:
     
     brand: str = None  # "lg", "samsung", etc.
     
+    # Descubrimiento (AppManager ejecuta todos los plugins en paralelo)
+    discovery_timeout: float = 30.0  # segundos por plugin, incluyendo reintentos
+    discovery_retries: int = 2
+    
+    # Consultas concurrentes del fan-out por defecto de get_devices_state
+    state_fanout_workers: int = 8
+    
     @abstractmethod
     def get_supported_devices(self) -> List[str]:
         """Retorna tipos de dispositivos soportados: ['washer', 'tv', ...]"""
@@ -31,6 +42,35 @@ class BasePlugin:
     def get_device_state(self, device_id: str, device_type: str) -> Dict:
         pass
 
+    def get_devices_state(self, device_ids: List[str], device_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Obtener el estado de varios dispositivos.
+        Por defecto consulta get_device_state en paralelo; los plugins con API
+        masiva lo sobreescriben.
+        
+        Args:
+            device_ids: IDs de dispositivos
+            device_types: device_id -> tipo de dispositivo
+            
+        Returns:
+            device_id -> estado (se omiten los que fallaron o no devolvieron estado)
+        """
+        device_types = device_types or {}
+        if not device_ids:
+            return {}
+        
+        def fetch(device_id):
+            try:
+                return self.get_device_state(device_id=device_id, device_type=device_types.get(device_id, ''))
+            except Exception as e:
+                logger.error(f"Error al obtener estado de {device_id}: {e}")
+                return None
+        
+        workers = max(1, min(self.state_fanout_workers, len(device_ids)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"State-{self.brand}") as executor:
+            states = executor.map(fetch, device_ids)
+            return {device_id: state for device_id, state in zip(device_ids, states) if state}
+
     @abstractmethod
     def send_command(self, device_id: str, command_data: Dict[str, Any], credentials: Dict[str, Any] | None = None) -> bool:
         pass
\ No newline at end of file
@@ -1,10 +1,11 @@
 from asyncio.log import logger
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from brandconnectors.lg_client import LGThinQClient
-from models.LG.washer import LGwasher, WasherState
+from config import LGSettings, config
+from models.LG.command_compiler import InvalidCommandError, LGCommandCompiler
+from models.LG.washer import LGwasher, WasherCommand, WasherState
 from plugins.base_plugin import BasePlugin
-from configparser import ConfigParser
 
 
 class LGPlugin(BasePlugin):
@@ -12,18 +13,30 @@ class LGPlugin(BasePlugin):
 
     def __init__(self) -> None:
         super().__init__()
-        self.client: LGThinQClient
+        self.client: Optional[LGThinQClient] = None
+        self._client_settings: Optional[LGSettings] = None
+        self.device_models: Dict[str, str] = {}  # device_id -> model
+        self.command_compiler = LGCommandCompiler(
+            lambda device_id: self.client.get_device_profile(device_id)
+        )
+        # Rotación de credenciales sin reiniciar
+        config.subscribe(self._on_config_changed, sections=['LG'])
     
     def get_supported_devices(self):
         return ['washer', 'refrigerator', 'air_conditioner', 'tv']
     
     def get_api_client(self) -> LGThinQClient:
-        CONFIG_DIR = './.smarthome/'
-        CONFIG_FILE = CONFIG_DIR + 'config.conf'
-        config_parser = ConfigParser()
-        config_parser.read(CONFIG_FILE, encoding='utf-8')
-        self.client = LGThinQClient(config_parser.get('LG','base_url'), config_parser.get('LG','access_token'), config_parser.get('LG','message_id'), config_parser.get('LG','client_id'))
+        """Cliente LG; solo se reconstruye si cambian las credenciales"""
+        settings = config.lg
+        if self.client is None or settings != self._client_settings:
+            self.client = LGThinQClient(settings.base_url, settings.access_token, settings.message_id, settings.client_id)
+            self._client_settings = settings
         return self.client
+
+    def _on_config_changed(self, conf, changed):
+        if self.client is not None and conf.lg != self._client_settings:
+            logger.info("Credenciales LG actualizadas, reconstruyendo cliente")
+            self.get_api_client()
     
     def create_device(self, device_type: str, device_data: dict):
         """Factory para crear dispositivo LG según tipo"""
@@ -53,6 +66,7 @@ class LGPlugin(BasePlugin):
                 'alias': item['deviceInfo']['alias'],
                 'brand': self.brand
             })
+            self.device_models[item['deviceId']] = item['deviceInfo']['modelName']
         
         return devices
     
@@ -87,7 +101,7 @@ class LGPlugin(BasePlugin):
         Args:
             device_id: ID del dispositivo
             device_type: Tipo de dispositivo
-            command_data: Datos del comando
+            command_data: Datos del comando (dict crudo o WasherCommand)
             credentials: Credenciales
             
         Returns:
@@ -95,10 +109,15 @@ class LGPlugin(BasePlugin):
         """
         try:
             client = self.client
-            print(device_id)
-            print(command_data)
+            if isinstance(command_data, WasherCommand):
+                model = self.device_models.get(device_id, device_id)
+                command_data = self.command_compiler.compile(command_data, device_id, model)
+            logger.debug(f"Comando para {device_id}: {command_data}")
             return client.send_command(device_id, command_data)
-            
+
+        except InvalidCommandError as e:
+            logger.warning(f"Comando rechazado para {device_id}: {e}")
+            return False
         except Exception as e:
             logger.error(f"Error al enviar comando a {device_id}: {e}")
             return False
\ No newline at end of file
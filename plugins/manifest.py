@@ -0,0 +1,41 @@
+"""
+Manifiesto de plugins: marca -> módulo/clase y credenciales requeridas.
+Permite que PluginManager decida qué plugins cargar sin importarlos.
+
+Plugins externos pueden registrarse con el entry point
+'smarthomebridge.plugins' (nombre = marca, valor = 'modulo:Clase').
+"""
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import Dict, Tuple
+
+ENTRY_POINT_GROUP = 'smarthomebridge.plugins'
+
+
+@dataclass(frozen=True)
+class PluginSpec:
+    """Descripción de un plugin en el manifiesto"""
+    brand: str
+    module: str
+    class_name: str
+    config_section: str
+    required_keys: Tuple[str, ...] = ()
+
+
+PLUGIN_MANIFEST: Dict[str, PluginSpec] = {
+    'lg': PluginSpec('lg', 'plugins.lg_plugin', 'LGPlugin', 'LG', ('access_token', 'message_id', 'client_id')),
+    'samsung': PluginSpec('samsung', 'plugins.samsung_plugin', 'SamsungPlugin', 'SAMSUNG', ('access_token',)),
+    'xiaomi': PluginSpec('xiaomi', 'plugins.xiaomi_plugin', 'XiaomiPlugin', 'XIAOMI', ('devices',)),
+}
+
+
+def load_manifest() -> Dict[str, PluginSpec]:
+    """Manifiesto interno más los plugins registrados por entry points"""
+    manifest = dict(PLUGIN_MANIFEST)
+
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        module, _, class_name = ep.value.partition(':')
+        brand = ep.name.lower()
+        manifest[brand] = PluginSpec(brand, module.strip(), class_name.strip(), brand.upper())
+
+    return manifest
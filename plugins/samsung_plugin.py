@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from brandconnectors.samsung_client import SamsungSmartThingsClient
+from config import config
+from models.LG.washer import WasherCommand
+from models.Samsung.washer import SamsungWasher, SamsungWasherState
+from plugins.base_plugin import BasePlugin
+
+logger = logging.getLogger(__name__)
+
+
+class SamsungPlugin(BasePlugin):
+    """
+    Plugin para electrodomésticos Samsung vía la API de SmartThings.
+
+    El estado se obtiene en bloque: la primera consulta de un ciclo de sync
+    trae el estado de todos los dispositivos conocidos en pocas peticiones y
+    el resto de las consultas se sirven de esa instantánea (status_ttl).
+    """
+    brand = "samsung"
+
+    # WasherCommand.operation_mode (lo que envían los accesorios de lavadora) -> comando SmartThings
+    WASHER_OPERATIONS = {
+        'START': ('washerOperatingState', 'setMachineState', ['run']),
+        'STOP': ('washerOperatingState', 'setMachineState', ['pause']),
+        'POWER_OFF': ('switch', 'off', []),
+    }
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.client: Optional[SamsungSmartThingsClient] = None
+        self.device_types: Dict[str, str] = {}  # device_id -> device_type
+        self.status_ttl = 5.0  # segundos que vale una instantánea masiva
+
+        self._snapshot: Dict[str, Tuple[float, Dict[str, Any]]] = {}  # device_id -> (t, status)
+        self._snapshot_lock = threading.Lock()
+        self._client_settings: Optional[Dict[str, str]] = None
+
+        config.subscribe(self._on_config_changed, sections=['SAMSUNG'])
+
+    def get_supported_devices(self):
+        return ['washer']
+
+    def get_api_client(self) -> SamsungSmartThingsClient:
+        """Cliente SmartThings; solo se reconstruye si cambia [SAMSUNG]"""
+        settings = config.section('SAMSUNG')
+        if self.client is not None and settings == self._client_settings:
+            return self.client
+
+        self.status_ttl = config.getfloat('SAMSUNG', 'status_ttl', fallback=5.0)
+        self.client = SamsungSmartThingsClient(
+            access_token=config.get('SAMSUNG', 'access_token'),
+            base_url=config.get('SAMSUNG', 'base_url', fallback=SamsungSmartThingsClient.DEFAULT_BASE_URL),
+            bulk_size=config.getint('SAMSUNG', 'bulk_size', fallback=25),
+            pool_size=config.getint('SAMSUNG', 'pool_size', fallback=10),
+        )
+        self._client_settings = settings
+        return self.client
+
+    def _on_config_changed(self, conf, changed):
+        if self.client is not None:
+            logger.info("Configuración Samsung actualizada, reconstruyendo cliente")
+            self.get_api_client()
+
+    def create_device(self, device_type: str, device_data: dict):
+        """Factory para crear dispositivo Samsung según tipo"""
+
+        device_map = {
+            'DEVICE_WASHER': SamsungWasher,
+        }
+
+        device_class = device_map.get(device_type.upper())
+        if not device_class:
+            raise ValueError(f"Tipo de dispositivo no soportado: {device_type}")
+
+        return device_class(device_data)
+
+    def discover_devices(self) -> List[dict]:
+        """Obtener lista de dispositivos Samsung"""
+        response = self.client.get_devices_list()
+
+        devices = []
+        for item in response:
+            device_type = self._device_type(item)
+            if device_type is None:
+                continue
+            devices.append({
+                'device_id': item['deviceId'],
+                'device_type': device_type,
+                'model': (item.get('ocf') or {}).get('modelNumber') or item.get('deviceTypeName', 'Unknown'),
+                'alias': item.get('label') or item.get('name', 'Device'),
+                'brand': self.brand
+            })
+            self.device_types[item['deviceId']] = device_type
+
+        return devices
+
+    def _device_type(self, item: Dict[str, Any]) -> Optional[str]:
+        """Tipo estándar (DEVICE_WASHER, ...) a partir de la categoría SmartThings"""
+        for component in item.get('components', []):
+            for category in component.get('categories', []):
+                name = category.get('name', '').lower()
+                if name in self.get_supported_devices():
+                    return f"DEVICE_{name.upper()}"
+        return None
+
+    def get_device_state(self, device_id: str, device_type: str) -> Optional[Any]:
+        """
+        Obtener estado actual de un dispositivo.
+        Se sirve de la instantánea masiva si es reciente.
+
+        Args:
+            device_id: ID del dispositivo
+            device_type: Tipo de dispositivo
+
+        Returns:
+            Estado parseado según el tipo, o None si no hay estado (un fallo
+            de la API no se reporta como lavadora apagada)
+        """
+        try:
+            status = self._cached_status(device_id)
+            if status is None:
+                self._refresh_snapshot(set(self.device_types) | {device_id})
+                status = self._cached_status(device_id)
+            if status is None:
+                return None
+            return self._parse_state(status, device_type)
+        except Exception as e:
+            logger.error(f"Error al obtener estado de {device_id}: {e}")
+            return None
+
+    def get_devices_state(self, device_ids: List[str], device_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Obtener el estado de varios dispositivos con peticiones masivas.
+
+        Returns:
+            device_id -> estado parseado (se omiten los que no tienen estado)
+        """
+        device_types = device_types or self.device_types
+        try:
+            self._refresh_snapshot(device_ids)
+        except Exception as e:
+            logger.error(f"Error al obtener estado masivo: {e}")
+            return {}
+
+        states = {}
+        for device_id in device_ids:
+            status = self._cached_status(device_id)
+            if status is not None:
+                states[device_id] = self._parse_state(status, device_types.get(device_id, ''))
+        return states
+
+    def _cached_status(self, device_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._snapshot.get(device_id)
+        if entry and time.monotonic() - entry[0] < self.status_ttl:
+            return entry[1]
+        return None
+
+    def _refresh_snapshot(self, device_ids):
+        """Traer el estado de todos los dispositivos indicados (una sola vez a la vez)"""
+        with self._snapshot_lock:
+            # Otro hilo pudo haberla refrescado mientras esperábamos
+            missing = [device_id for device_id in device_ids if self._cached_status(device_id) is None]
+            if not missing:
+                return
+            statuses = self.client.get_devices_status(missing)
+            now = time.monotonic()
+            for device_id, status in statuses.items():
+                self._snapshot[device_id] = (now, status)
+
+    def _parse_state(self, status: Dict[str, Any], device_type: str):
+        if 'WASHER' in device_type.upper():
+            return SamsungWasherState.from_json(status)
+        logger.warning(f"Estado no parseado para tipo: {device_type}")
+        return status
+
+    def send_command(self, device_id: str, command_data: Dict[str, Any], credentials: Dict[str, Any] | None = None) -> bool:
+        """
+        Enviar comando a un dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            command_data: {'commands': [...]}, lista de comandos SmartThings o WasherCommand
+            credentials: Credenciales
+
+        Returns:
+            True si se envió correctamente
+        """
+        try:
+            if isinstance(command_data, WasherCommand):
+                command_data = self._washer_commands(command_data)
+                if not command_data:
+                    logger.warning(f"Comando sin equivalente SmartThings para {device_id}")
+                    return False
+            if isinstance(command_data, list):
+                command_data = {'commands': command_data}
+            success = self.client.send_command(device_id, command_data)
+            if success:
+                # El siguiente sync debe leer el estado real
+                self._snapshot.pop(device_id, None)
+            return success
+
+        except Exception as e:
+            logger.error(f"Error al enviar comando a {device_id}: {e}")
+            return False
+
+    def _washer_commands(self, command: WasherCommand) -> List[Dict[str, Any]]:
+        """
+        Traducir un WasherCommand a comandos SmartThings.
+
+        La ubicación no aplica (un componente 'main') y SmartThings no tiene
+        un comando estándar para el inicio diferido: reserve_time_h se ignora.
+        """
+        if command.reserve_time_h is not None:
+            logger.warning("Inicio diferido no soportado en lavadoras Samsung, se ignora")
+        operation = self.WASHER_OPERATIONS.get(command.operation_mode)
+        if operation is None:
+            return []
+        capability, name, arguments = operation
+        return [{'component': 'main', 'capability': capability, 'command': name, 'arguments': arguments}]
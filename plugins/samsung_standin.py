@@ -0,0 +1,235 @@
+"""
+Stand-in local de la API REST de SmartThings para probar SamsungPlugin
+sin la nube.
+
+Implementa lo que usa SamsungSmartThingsClient:
+    GET  /v1/devices                 (paginado con _links.next, deviceId=..., includeStatus=true)
+    GET  /v1/devices/{id}
+    GET  /v1/devices/{id}/status
+    POST /v1/devices/{id}/commands   (switch on/off, setMachineState run/pause/stop)
+
+Uso (desde la raíz del proyecto):
+    python -m plugins.samsung_standin --port 8765 --devices 3
+
+    [SAMSUNG]
+    access_token = standin
+    base_url = http://127.0.0.1:8765/v1
+"""
+import argparse
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def washer_status(switch: str = 'off', machine_state: str = 'stop', job_state: str = 'none',
+                  completion_time: Optional[str] = None) -> Dict[str, Any]:
+    """Status de una lavadora con la forma de GET /devices/{id}/status"""
+    operating = {
+        'machineState': {'value': machine_state},
+        'washerJobState': {'value': job_state},
+    }
+    if completion_time:
+        operating['completionTime'] = {'value': completion_time}
+    return {'main': {
+        'switch': {'switch': {'value': switch}},
+        'washerOperatingState': operating,
+        'remoteControlStatus': {'remoteControlEnabled': {'value': 'true'}},
+    }}
+
+
+class SmartThingsStandIn:
+    """
+    Servidor HTTP local con un puñado de dispositivos SmartThings.
+
+    Uso:
+        standin = SmartThingsStandIn(access_token='t')
+        standin.add_washer('washer-1', 'Lavadora')
+        standin.start()
+        client = SamsungSmartThingsClient('t', base_url=standin.base_url)
+        ...
+        standin.stop()
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, access_token: Optional[str] = None,
+                 page_size: int = 200):
+        """
+        Args:
+            host: Dirección de escucha
+            port: Puerto (0 = uno libre)
+            access_token: Bearer esperado (None = no se valida)
+            page_size: Dispositivos por página de GET /devices
+        """
+        self.access_token = access_token
+        self.page_size = max(1, page_size)
+        self.devices: Dict[str, Dict[str, Any]] = {}  # device_id -> descripción (sin status)
+        self.statuses: Dict[str, Optional[Dict[str, Any]]] = {}  # device_id -> status (None = sin status)
+        self.requests: List[str] = []  # "GET /v1/devices?..." en orden de llegada
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def add_washer(self, device_id: str, label: str, model: str = 'WF45T6000AW',
+                   status: Optional[Dict[str, Any]] = None, has_status: bool = True):
+        """Agregar una lavadora (has_status=False: la API no devuelve su estado)"""
+        capabilities = ['switch', 'washerOperatingState', 'remoteControlStatus']
+        with self._lock:
+            self.devices[device_id] = {
+                'deviceId': device_id,
+                'name': 'Samsung Washer',
+                'label': label,
+                'deviceTypeName': 'Samsung OCF Washer',
+                'ocf': {'modelNumber': model},
+                'components': [{
+                    'id': 'main',
+                    'categories': [{'name': 'Washer', 'categoryType': 'manufacturer'}],
+                    'capabilities': [{'id': capability, 'version': 1} for capability in capabilities],
+                }],
+            }
+            self.statuses[device_id] = (status or washer_status()) if has_status else None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="SmartThingsStandIn")
+        self._thread.start()
+        logger.info(f"Stand-in de SmartThings en {self.base_url}")
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def _list_devices(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        wanted = query.get('deviceId')
+        include_status = query.get('includeStatus', ['false'])[0] == 'true'
+        page = int(query.get('page', ['0'])[0])
+
+        with self._lock:
+            device_ids = [device_id for device_id in self.devices if not wanted or device_id in wanted]
+            chunk = device_ids[page * self.page_size:(page + 1) * self.page_size]
+            items = [self._item(device_id, include_status) for device_id in chunk]
+
+        response: Dict[str, Any] = {'items': items, '_links': {}}
+        if (page + 1) * self.page_size < len(device_ids):
+            next_query = {**query, 'page': [str(page + 1)]}
+            response['_links']['next'] = {'href': f"{self.base_url}/devices?{urlencode(next_query, doseq=True)}"}
+        return response
+
+    def _item(self, device_id: str, include_status: bool) -> Dict[str, Any]:
+        item = json.loads(json.dumps(self.devices[device_id]))
+        status = self.statuses.get(device_id)
+        if include_status and status is not None:
+            for component in item['components']:
+                for capability in component['capabilities']:
+                    capability['status'] = status.get(component['id'], {}).get(capability['id'], {})
+        return item
+
+    def _command(self, device_id: str, body: Dict[str, Any]):
+        with self._lock:
+            status = self.statuses.get(device_id)
+            if status is None:
+                raise KeyError(device_id)
+            main = status['main']
+            for command in body.get('commands', []):
+                capability, name = command.get('capability'), command.get('command')
+                arguments = command.get('arguments') or []
+                if capability == 'switch' and name in ('on', 'off'):
+                    main['switch']['switch']['value'] = name
+                    if name == 'off':
+                        main['washerOperatingState']['machineState']['value'] = 'stop'
+                        main['washerOperatingState']['washerJobState']['value'] = 'none'
+                elif capability == 'washerOperatingState' and name == 'setMachineState' and arguments:
+                    main['washerOperatingState']['machineState']['value'] = arguments[0]
+                    if arguments[0] == 'run':
+                        main['switch']['switch']['value'] = 'on'
+                        main['washerOperatingState']['washerJobState']['value'] = 'wash'
+                    elif arguments[0] == 'stop':
+                        main['washerOperatingState']['washerJobState']['value'] = 'none'
+                else:
+                    raise ValueError(f"Comando no soportado: {capability}.{name}")
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _reply(self, status: int, body: Any = None):
+                data = json.dumps(body if body is not None else {}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _route(self):
+                standin.requests.append(f"{self.command} {self.path}")
+                if standin.access_token and self.headers.get('Authorization') != f"Bearer {standin.access_token}":
+                    return self._reply(401, {'error': 'unauthorized'})
+                url = urlparse(self.path)
+                parts = [part for part in url.path.split('/') if part]
+                if parts[:2] != ['v1', 'devices']:
+                    return self._reply(404)
+                if len(parts) == 2 and self.command == 'GET':
+                    return self._reply(200, standin._list_devices(parse_qs(url.query)))
+
+                device_id = parts[2] if len(parts) > 2 else None
+                if device_id not in standin.devices:
+                    return self._reply(404, {'error': 'device not found'})
+                if len(parts) == 3 and self.command == 'GET':
+                    return self._reply(200, standin.devices[device_id])
+                if parts[3:] == ['status'] and self.command == 'GET':
+                    status = standin.statuses.get(device_id)
+                    return self._reply(200, {'components': status}) if status is not None else self._reply(404)
+                if parts[3:] == ['commands'] and self.command == 'POST':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    try:
+                        standin._command(device_id, json.loads(self.rfile.read(length) or b'{}'))
+                    except (KeyError, ValueError) as e:
+                        return self._reply(422, {'error': str(e)})
+                    return self._reply(200, {'results': [{'status': 'ACCEPTED'}]})
+                return self._reply(404)
+
+            do_GET = do_POST = _route
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--devices', type=int, default=3, help="Lavadoras simuladas")
+    parser.add_argument('--token', default=None, help="Bearer esperado (por defecto no se valida)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    standin = SmartThingsStandIn(args.host, args.port, access_token=args.token)
+    for i in range(args.devices):
+        standin.add_washer(f"washer-{i}", f"Lavadora {i}")
+    print(f"SmartThings stand-in en {standin.base_url} (Ctrl+C para salir)")
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Emulador local de un dispositivo miIO (UDP) para probar XiaomiMiIOClient
+sin hardware.
+
+Implementa el protocolo por su cuenta (no reutiliza el cliente):
+    - hello (paquete de 32 bytes con 0xff) -> ID del dispositivo y stamp
+    - paquetes cifrados con AES-128-CBC: key = md5(token), iv = md5(key + token)
+    - checksum md5(cabecera[:16] + token + datos); si no cuadra no responde
+    - miIO.info, get_properties / set_properties (MIoT) y get_prop (legado)
+
+Uso (desde la raíz del proyecto):
+    python -m plugins.xiaomi_emulator --port 54321 --token 00112233445566778899aabbccddeeff
+
+    [XIAOMI:emulador]
+    host = 127.0.0.1
+    token = 00112233445566778899aabbccddeeff
+    properties = power:2.1, mode:2.4
+"""
+import argparse
+import hashlib
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>HHIII16s')
+
+
+class MiIOEmulator:
+    """
+    Dispositivo miIO en un socket UDP local.
+
+    Uso:
+        device = MiIOEmulator(token, device_id=1234, properties={(2, 1): True})
+        device.start()
+        ... XiaomiMiIOClient([MiIODeviceConfig('x', '127.0.0.1', token, port=device.port)]) ...
+        device.stop()
+    """
+
+    def __init__(self, token: str, device_id: int = 0x1234, model: str = 'zhimi.airpurifier.ma4',
+                 properties: Optional[Dict[Tuple[int, int], Any]] = None,
+                 legacy: Optional[Dict[str, Any]] = None, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            token: Token del dispositivo (32 caracteres hex)
+            device_id: ID miIO
+            model: Modelo reportado por miIO.info
+            properties: (siid, piid) -> valor (MIoT)
+            legacy: nombre -> valor (get_prop)
+            host, port: Dirección de escucha (port 0 = uno libre)
+        """
+        self.token = bytes.fromhex(token)
+        self.key = hashlib.md5(self.token).digest()
+        self.iv = hashlib.md5(self.key + self.token).digest()
+        self.device_id = device_id
+        self.model = model
+        self.properties = dict(properties or {})
+        self.legacy = dict(legacy or {})
+        self.online = True  # False = no responde a nada (apagado o sin red)
+        self.received = 0  # paquetes recibidos
+
+        self._started = time.monotonic()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.2)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._sock.getsockname()[1]
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True, name=f"MiIOEmulator-{self.port}")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+        self._sock.close()
+
+    # ------------------------------------------------------------------
+    # Protocolo
+    # ------------------------------------------------------------------
+
+    def _stamp(self) -> int:
+        return int(time.monotonic() - self._started) + 1
+
+    def _encrypt(self, plaintext: bytes) -> bytes:
+        padder = padding.PKCS7(128).padder()
+        encryptor = Cipher(algorithms.AES(self.key), modes.CBC(self.iv)).encryptor()
+        return encryptor.update(padder.update(plaintext) + padder.finalize()) + encryptor.finalize()
+
+    def _decrypt(self, ciphertext: bytes) -> bytes:
+        decryptor = Cipher(algorithms.AES(self.key), modes.CBC(self.iv)).decryptor()
+        unpadder = padding.PKCS7(128).unpadder()
+        return unpadder.update(decryptor.update(ciphertext) + decryptor.finalize()) + unpadder.finalize()
+
+    def _packet(self, payload: Optional[Dict[str, Any]]) -> bytes:
+        data = self._encrypt(json.dumps(payload).encode()) if payload is not None else b''
+        header = HEADER.pack(0x2131, HEADER.size + len(data), 0, self.device_id, self._stamp(), b'\x00' * 16)
+        if payload is None:
+            # Respuesta a hello: el campo checksum lleva el token (como los dispositivos sin provisionar)
+            return header[:16] + self.token
+        return header[:16] + hashlib.md5(header[:16] + self.token + data).digest() + data
+
+    def _serve(self):
+        while self._running:
+            try:
+                packet, addr = self._sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.received += 1
+            if not self.online:
+                continue
+            try:
+                reply = self._handle(packet)
+            except Exception as e:
+                logger.debug(f"Paquete descartado: {e}")
+                continue
+            if reply is not None:
+                self._sock.sendto(reply, addr)
+
+    def _handle(self, packet: bytes) -> Optional[bytes]:
+        magic, length, unknown, device_id, stamp, checksum = HEADER.unpack_from(packet)
+        if magic != 0x2131:
+            return None
+        if length == HEADER.size and unknown == 0xffffffff:
+            return self._packet(None)  # hello
+
+        data = packet[HEADER.size:length]
+        if hashlib.md5(packet[:16] + self.token + data).digest() != checksum:
+            logger.debug("Checksum inválido: paquete ignorado")
+            return None
+        request = json.loads(self._decrypt(data))
+        try:
+            response = {'id': request['id'], 'result': self._call(request['method'], request.get('params') or [])}
+        except KeyError as e:
+            response = {'id': request['id'], 'error': {'code': -32601, 'message': f"Method not found: {e}"}}
+        return self._packet(response)
+
+    def _call(self, method: str, params: Any) -> Any:
+        if method == 'miIO.info':
+            return {'model': self.model, 'fw_ver': '1.0.0', 'hw_ver': 'emulator'}
+        if method == 'get_properties':
+            results = []
+            for prop in params:
+                key = (prop['siid'], prop['piid'])
+                if key in self.properties:
+                    results.append({**prop, 'code': 0, 'value': self.properties[key]})
+                else:
+                    results.append({**prop, 'code': -4003})
+            return results
+        if method == 'set_properties':
+            results = []
+            for prop in params:
+                key = (prop['siid'], prop['piid'])
+                code = 0 if key in self.properties else -4003
+                if code == 0:
+                    self.properties[key] = prop['value']
+                results.append({'did': prop.get('did'), 'siid': prop['siid'], 'piid': prop['piid'], 'code': code})
+            return results
+        if method == 'get_prop':
+            return [self.legacy.get(name) for name in params]
+        raise KeyError(method)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--token', default='00112233445566778899aabbccddeeff')
+    parser.add_argument('--device-id', type=int, default=0x1234)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    device = MiIOEmulator(args.token, args.device_id, properties={(2, 1): True, (2, 4): 0},
+                          host=args.host, port=args.port)
+    device.start()
+    print(f"Emulador miIO en {args.host}:{device.port} (ID {args.device_id}, Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        device.stop()
+
+
+if __name__ == '__main__':
+    main()
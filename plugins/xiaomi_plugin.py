@@ -0,0 +1,169 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from brandconnectors.xiaomi_client import MIIO_PORT, MiIODeviceConfig, XiaomiMiIOClient
+from config import config
+from models.Xiaomi.base import XiaomiDevice, XiaomiDeviceState
+from plugins.base_plugin import BasePlugin
+
+logger = logging.getLogger(__name__)
+
+
+class XiaomiPlugin(BasePlugin):
+    """
+    Plugin para dispositivos Xiaomi en la LAN (protocolo miIO por UDP).
+
+    Configuración:
+        [XIAOMI]
+        devices = purificador, lampara
+
+        [XIAOMI:purificador]
+        host = 192.168.1.50
+        token = <32 caracteres hex>
+        properties = power:2.1, mode:2.4    ; MIoT (siid.piid) o nombres legados
+        did = 123456789                     ; opcional: listarlo aunque no responda al arrancar
+    """
+    brand = "xiaomi"
+    discovery_timeout = 10.0  # LAN: no tiene sentido esperar como a una nube
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.client: Optional[XiaomiMiIOClient] = None
+
+        # Cambios en [XIAOMI] o [XIAOMI:<nombre>] (tokens, IPs) sin reiniciar
+        config.subscribe(self._on_config_changed, sections=['XIAOMI'])
+
+    def get_supported_devices(self):
+        return ['miio']
+
+    def get_api_client(self) -> XiaomiMiIOClient:
+        if self.client is not None:
+            return self.client
+
+        devices = []
+        for name in config.get('XIAOMI', 'devices', fallback='').split(','):
+            name = name.strip()
+            if not name:
+                continue
+            section = f'XIAOMI:{name}'
+            if not config.has_section(section):
+                logger.warning(f"Falta la sección [{section}] en config.conf")
+                continue
+            devices.append(MiIODeviceConfig(
+                name=name,
+                host=config.get(section, 'host'),
+                token=config.get(section, 'token'),
+                port=config.getint(section, 'port', fallback=MIIO_PORT),
+                model=config.get(section, 'model', fallback='Unknown'),
+                device_type=config.get(section, 'device_type', fallback='DEVICE_MIIO'),
+                did=config.get(section, 'did', fallback='').strip() or None,
+                properties=self._parse_properties(config.get(section, 'properties', fallback='power')),
+            ))
+
+        self.client = XiaomiMiIOClient(
+            devices,
+            pool_size=config.getint('XIAOMI', 'pool_size', fallback=4),
+            timeout=config.getfloat('XIAOMI', 'timeout', fallback=2.0),
+            retries=config.getint('XIAOMI', 'retries', fallback=2),
+        )
+        return self.client
+
+    def _on_config_changed(self, conf, changed):
+        """Reconstruir el cliente y repetir el handshake con la nueva configuración"""
+        old_client = self.client
+        if old_client is None:
+            return
+
+        logger.info("Configuración Xiaomi actualizada, reconstruyendo cliente")
+        self.client = None
+        self.get_api_client()
+        try:
+            self.client.get_devices_list()
+        except Exception as e:
+            logger.error(f"Error en handshake tras recargar configuración: {e}")
+        old_client.pool.close()
+
+    @staticmethod
+    def _parse_properties(value: str) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+        """'power:2.1, mode:2.4, temp' -> {'power': (2, 1), 'mode': (2, 4), 'temp': (None, None)}"""
+        properties = {}
+        for item in value.split(','):
+            item = item.strip()
+            if not item:
+                continue
+            name, _, ids = item.partition(':')
+            if ids:
+                siid, _, piid = ids.partition('.')
+                properties[name.strip()] = (int(siid), int(piid))
+            else:
+                properties[name.strip()] = (None, None)
+        return properties
+
+    def create_device(self, device_type: str, device_data: dict):
+        """Factory para crear dispositivo Xiaomi"""
+        return XiaomiDevice(device_data)
+
+    def discover_devices(self) -> List[dict]:
+        """
+        Dispositivos configurados en la LAN, respondan o no al handshake
+        (uno apagado un momento no debe retirarse de los bridges).
+        """
+        devices = []
+        for item in self.client.get_devices_list():
+            devices.append({
+                'device_id': item['device_id'],
+                'device_type': item['device_type'],
+                'model': item['model'],
+                'alias': item['name'],
+                'brand': self.brand
+            })
+        return devices
+
+    def get_device_state(self, device_id: str, device_type: str) -> Dict:
+        """
+        Obtener estado actual de un dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            device_type: Tipo de dispositivo
+
+        Returns:
+            XiaomiDeviceState
+        """
+        try:
+            return XiaomiDeviceState.from_json(self.client.get_device_state(device_id))
+        except Exception as e:
+            logger.error(f"Error al obtener estado de {device_id}: {e}")
+            return None
+
+    def get_devices_state(self, device_ids: List[str], device_types: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Leer varios dispositivos en un solo intercambio UDP.
+
+        Returns:
+            device_id -> XiaomiDeviceState
+        """
+        try:
+            statuses = self.client.get_devices_status(device_ids)
+        except Exception as e:
+            logger.error(f"Error al obtener estado masivo: {e}")
+            return {}
+        return {device_id: XiaomiDeviceState.from_json(status) for device_id, status in statuses.items()}
+
+    def send_command(self, device_id: str, command_data: Dict[str, Any], credentials: Dict[str, Any] | None = None) -> bool:
+        """
+        Enviar comando a un dispositivo.
+
+        Args:
+            device_id: ID del dispositivo
+            command_data: {'method': ..., 'params': [...]} o {'properties': {nombre: valor}}
+            credentials: Credenciales
+
+        Returns:
+            True si se envió correctamente
+        """
+        try:
+            return self.client.send_command(device_id, command_data)
+
+        except Exception as e:
+            logger.error(f"Error al enviar comando a {device_id}: {e}")
+            return False
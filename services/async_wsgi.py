@@ -0,0 +1,151 @@
+"""
+Servidor HTTP/1.1 sobre asyncio para aplicaciones WSGI (Flask).
+
+Las conexiones, el parseo (h11) y el keep-alive se manejan en el loop; solo
+la llamada a la aplicación WSGI, que es bloqueante, va al executor.
+"""
+import asyncio
+import io
+import logging
+import sys
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import unquote
+
+import h11
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class AsyncWSGIServer:
+    """Sirve una aplicación WSGI desde el loop asyncio en curso"""
+
+    def __init__(self, app: Callable, host: str, port: int, executor: Optional[Executor] = None,
+                 max_body_size: int = 1024 * 1024, keepalive_timeout: float = 30.0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.executor = executor
+        self.max_body_size = max_body_size
+        self.keepalive_timeout = keepalive_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Empezar a aceptar conexiones"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        logger.info(f"Servidor HTTP asyncio escuchando en {self.host}:{self.port}")
+
+    async def stop(self):
+        """Dejar de aceptar conexiones y cerrar el socket"""
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        conn = h11.Connection(h11.SERVER)
+        peer = writer.get_extra_info('peername') or ('', 0)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request, body = await self._read_request(conn, reader)
+                if request is None:
+                    break
+
+                if len(body) > self.max_body_size:
+                    status, headers, payload = 413, [(b'content-type', b'text/plain')], b'Request Entity Too Large'
+                else:
+                    status, headers, payload = await loop.run_in_executor(
+                        self.executor, self._call_app, request, body, peer
+                    )
+
+                headers = [(name, value) for name, value in headers
+                           if name.lower() not in (b'content-length', b'transfer-encoding', b'connection')]
+                headers.append((b'content-length', str(len(payload)).encode()))
+                writer.write(conn.send(h11.Response(status_code=status, headers=headers)))
+                if payload and request.method != b'HEAD':
+                    writer.write(conn.send(h11.Data(data=payload)))
+                writer.write(conn.send(h11.EndOfMessage()))
+                await writer.drain()
+
+                if conn.our_state is not h11.DONE or conn.their_state is not h11.DONE:
+                    break
+                conn.start_next_cycle()
+        except (h11.ProtocolError, ConnectionError, asyncio.TimeoutError) as e:
+            logger.debug(f"Conexión HTTP {peer[0]} cerrada: {e}")
+        finally:
+            writer.close()
+
+    async def _read_request(self, conn: h11.Connection, reader: asyncio.StreamReader) -> Tuple[Optional[h11.Request], bytes]:
+        request = None
+        body = bytearray()
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                data = await asyncio.wait_for(reader.read(65536), self.keepalive_timeout)
+                conn.receive_data(data)
+            elif isinstance(event, h11.Request):
+                request = event
+            elif isinstance(event, h11.Data):
+                body += event.data
+                if len(body) > self.max_body_size + 65536:
+                    raise h11.RemoteProtocolError("Cuerpo demasiado grande")
+            elif isinstance(event, h11.EndOfMessage):
+                return request, bytes(body)
+            else:  # ConnectionClosed o PAUSED
+                return None, b''
+
+    def _environ(self, request: h11.Request, body: bytes, peer) -> dict:
+        path, _, query = request.target.decode('latin-1').partition('?')
+        environ = {
+            'REQUEST_METHOD': request.method.decode('ascii'),
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': str(self.port),
+            'SERVER_PROTOCOL': f"HTTP/{request.http_version.decode('ascii')}",
+            'REMOTE_ADDR': peer[0],
+            'REMOTE_PORT': str(peer[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in request.headers:
+            key = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if key == 'CONTENT_LENGTH':
+                continue
+            if key != 'CONTENT_TYPE':
+                key = f"HTTP_{key}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    def _call_app(self, request: h11.Request, body: bytes, peer) -> Tuple[int, Headers, bytes]:
+        """Ejecutar la aplicación WSGI (corre en el executor)"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+            return lambda data: None
+
+        try:
+            result = self.app(self._environ(request, body, peer), start_response)
+            try:
+                payload = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            return response['status'], response['headers'], payload
+        except Exception as e:
+            logger.error(f"Error en la aplicación WSGI: {e}", exc_info=True)
+            return 500, [(b'content-type', b'text/plain')], b'Internal Server Error'
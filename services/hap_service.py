@@ -1,100 +1,401 @@
 """
 Servicio HAP/HomeKit que maneja el Bridge y accesorios
 """
+import asyncio
+import json
 import logging
-from typing import Dict
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from pyhap.accessory import Bridge
 from pyhap.accessory_driver import AccessoryDriver
 from zeroconf import InterfaceChoice
 from config import config
-import configparser
 
 logger = logging.getLogger(__name__)
 
+
+class BridgeShard:
+    """Un bridge HAP con su propio driver, puerto, archivo de estado y emparejamiento"""
+
+    def __init__(self, index: int, driver: AccessoryDriver, bridge: Bridge):
+        self.index = index
+        self.driver = driver
+        self.bridge = bridge
+        self.accessories: Dict[str, object] = {}  # device_id -> accessory
+        self.started = False
+        self.thread: Optional[threading.Thread] = None
+        self.config_change_handle = None
+
+
 class HAPService:
-    """Servicio HAP/HomeKit"""
-    conf_parser = configparser.ConfigParser()
-    conf_parser.read(config.CONFIG_FILE)
-    
+    """
+    Servicio HAP/HomeKit.
+
+    HomeKit admite como máximo 150 accesorios por bridge (incluido el propio
+    bridge), así que los accesorios se reparten en varios bridges ("shards"),
+    cada uno con su puerto (port + n), archivo de estado y emparejamiento.
+    La asignación dispositivo -> (bridge, AID) se guarda en disco para que
+    sea estable entre reinicios; los dispositivos nuevos van al bridge con
+    menos carga y se crea un bridge nuevo cuando todos están llenos.
+
+    Los accesorios se pueden agregar y retirar con los drivers en marcha: el
+    cambio se aplica en el loop del driver y se anuncia por mDNS con una
+    nueva versión de configuración (una sola por ráfaga de cambios).
+
+    Con initialize(loop=...) los drivers corren en ese loop (runtime
+    unificado) en lugar de un hilo con su propio loop por bridge.
+    """
+
+    # AID 1 es el bridge y pyhap evita el 7 (ver Bridge.add_accessory)
+    RESERVED_AIDS = (1, 7)
+    MAX_ACCESSORIES_PER_BRIDGE = 149
+    # Segundos para agrupar varios cambios en un solo anuncio
+    CONFIG_CHANGE_DELAY = 0.5
+
     def __init__(self):
         self.accessories: Dict[str, object] = {}  # device_id -> accessory
+        self.shards: List[BridgeShard] = []
+        self.placement: Dict[str, Tuple[int, int]] = {}  # device_id -> (bridge, AID)
+        self.placement_file: Path = None
+        self.capacity = self.MAX_ACCESSORIES_PER_BRIDGE
+        self._assigned: Dict[str, BridgeShard] = {}  # device_id -> bridge en esta sesión
+        self._started = False
+        self._lock = threading.RLock()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # None = un hilo por bridge
 
+    @property
+    def driver(self) -> Optional[AccessoryDriver]:
+        """Driver del primer bridge"""
+        return self.shards[0].driver if self.shards else None
 
-    def initialize(self):
-        """Inicializar el servicio HAP"""
+    @property
+    def bridge(self) -> Optional[Bridge]:
+        """Primer bridge"""
+        return self.shards[0].bridge if self.shards else None
+
+    def initialize(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Inicializar el servicio HAP.
+
+        Args:
+            loop: Loop compartido del runtime unificado (None = un hilo por bridge)
+        """
         logger.info("Inicializando servicio HAP...")
-        
+        self.loop = loop
+
+        hap_settings = config.hap
+        self.capacity = min(hap_settings.max_accessories_per_bridge, self.MAX_ACCESSORIES_PER_BRIDGE)
+
+        # Bridge y AID por dispositivo: HomeKit identifica cada accesorio por su AID
+        self.placement_file = Path(hap_settings.persist_file_name).with_suffix('.placement.json')
+        self.placement = self._load_placement()
+        self._check_capacity()
+
+        # El primer bridge conserva puerto, archivo y nombre de siempre
+        self._create_shard(0)
+
+    def _check_capacity(self):
+        """Avisar si la capacidad configurada quedó por debajo de la carga guardada de algún bridge"""
+        loads: Dict[int, int] = {}
+        for index, _ in self.placement.values():
+            loads[index] = loads.get(index, 0) + 1
+        for index, load in sorted(loads.items()):
+            if load > self.capacity:
+                logger.warning(f"Bridge {index}: tiene {load} accesorios y max_accessories_per_bridge es "
+                               f"{self.capacity}; se conservan en su bridge (moverlos les cambia el AID y "
+                               f"HomeKit pierde sus habitaciones y automatizaciones). Los nuevos irán a otros bridges")
+
+    def _create_shard(self, index: int) -> BridgeShard:
+        """Crear el driver y el bridge número index"""
+        hap_settings = config.hap
+        persist_file = Path(hap_settings.persist_file_name)
+        if index > 0:
+            persist_file = persist_file.with_name(f"{persist_file.stem}-{index + 1}{persist_file.suffix}")
+        bridge_name = hap_settings.bridge_name if index == 0 else f"{hap_settings.bridge_name} {index + 1}"
+        port = hap_settings.port + index
+
         # Crear driver
-        
-        self.driver = AccessoryDriver(
-            address = self.conf_parser.get('HAPCONFIG', 'address', fallback=None),
-            port= self.conf_parser.getint('HAPCONFIG', 'port', fallback=51827),
-            pincode = self.conf_parser.get('HAPCONFIG', 'pincode', fallback="031-45-154").encode(),
-            persist_file = self.conf_parser.get('HAPCONFIG', 'persist_file_name', fallback="homekit.json"),
-            listen_address = self.conf_parser.get('HAPCONFIG', 'listen_address', fallback=None),
+        driver = AccessoryDriver(
+            address = hap_settings.address,
+            port= port,
+            pincode = hap_settings.pincode.encode(),
+            persist_file = str(persist_file),
+            listen_address = hap_settings.listen_address,
             interface_choice=InterfaceChoice.Default,
+            loop=self.loop,
         )
-        
+
         # Crear bridge
-        self.bridge = Bridge(self.driver, self.conf_parser.get('HAPCONFIG', 'bridge_name', fallback="Mi Raspberry Hub"))
-        
-        logger.info(f"HAP Bridge creado: Mi Raspberry Hub")
-        logger.info(f"  Puerto: {self.conf_parser.getint('HAPCONFIG', 'port', fallback=51827)}")
-        logger.info(f"  PIN Code: {self.conf_parser.get('HAPCONFIG', 'pincode', fallback='031-45-154')}")
-    
+        shard = BridgeShard(index, driver, Bridge(driver, bridge_name))
+        self.shards.append(shard)
+
+        logger.info(f"HAP Bridge creado: {bridge_name}")
+        logger.info(f"  Puerto: {port}")
+        logger.info(f"  PIN Code: {hap_settings.pincode}")
+
+        # Bridge nuevo con el servicio ya en marcha
+        if self._started:
+            self._start_shard(shard)
+        return shard
+
+    def _get_shard(self, index: int) -> BridgeShard:
+        while len(self.shards) <= index:
+            self._create_shard(len(self.shards))
+        return self.shards[index]
+
+    # ------------------------------------------------------------------
+    # Asignación estable dispositivo -> (bridge, AID)
+    # ------------------------------------------------------------------
+
+    def _load_placement(self) -> Dict[str, Tuple[int, int]]:
+        try:
+            with open(self.placement_file, 'r') as f:
+                return {device_id: (int(shard), int(aid)) for device_id, (shard, aid) in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Error leyendo {self.placement_file}: {e}")
+            return {}
+
+    def _save_placement(self):
+        tmp_file = f"{self.placement_file}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(self.placement, f)
+            os.replace(tmp_file, self.placement_file)
+        except OSError as e:
+            logger.error(f"Error guardando {self.placement_file}: {e}")
+
+    def _load(self, shard: BridgeShard) -> int:
+        return sum(1 for assigned in self._assigned.values() if assigned is shard)
+
+    def _place(self, device_id: str) -> BridgeShard:
+        """Bridge del dispositivo: el de siempre (aunque se haya reducido la capacidad), si no el menos cargado"""
+        with self._lock:
+            shard = self._assigned.get(device_id)
+            if shard is not None:
+                return shard
+
+            placed = self.placement.get(device_id)
+            if placed is not None:
+                shard = self._get_shard(placed[0])
+                # Solo se reubica si el bridge llegó al límite de HAP: cambiar de AID es otro accesorio para HomeKit
+                if self._load(shard) >= self.MAX_ACCESSORIES_PER_BRIDGE:
+                    shard = None
+
+            if shard is None:
+                free = [s for s in self.shards if self._load(s) < self.capacity]
+                shard = min(free, key=self._load) if free else self._create_shard(len(self.shards))
+
+            if placed is None or placed[0] != shard.index:
+                used = {aid for s, aid in self.placement.values() if s == shard.index} | set(self.RESERVED_AIDS)
+                aid = next(candidate for candidate in range(2, len(used) + 3) if candidate not in used)
+                self.placement[device_id] = (shard.index, aid)
+                self._save_placement()
+                if placed is not None:
+                    logger.warning(f"{device_id}: el bridge {placed[0]} está lleno; se mueve de bridge {placed[0]} "
+                                   f"AID {placed[1]} a bridge {shard.index} AID {aid}. HomeKit lo verá como un "
+                                   f"accesorio nuevo (hay que volver a asignarle habitación y automatizaciones)")
+
+            self._assigned[device_id] = shard
+            return shard
+
+    def driver_for(self, device_id: str) -> AccessoryDriver:
+        """
+        Driver con el que se debe construir el accesorio del dispositivo.
+
+        Args:
+            device_id: ID único del dispositivo
+        """
+        return self._place(device_id).driver
+
+    # ------------------------------------------------------------------
+    # Accesorios
+    # ------------------------------------------------------------------
+
     def add_accessory(self, device_id: str, accessory):
         """
         Agregar un accesorio al bridge.
-        
+
         Args:
             device_id: ID único del dispositivo
-            accessory: Objeto accesorio HAP
+            accessory: Objeto accesorio HAP (construido con driver_for(device_id))
         """
-        if device_id in self.accessories:
-            logger.warning(f"Accesorio ya existe en hap service: {device_id}")
-            return False
-        
-        self.bridge.add_accessory(accessory)
-        self.accessories[device_id] = accessory
-        
-        logger.info(f"Accesorio agregado a hap service: {accessory.display_name}")
+        with self._lock:
+            if device_id in self.accessories:
+                logger.warning(f"Accesorio ya existe en hap service: {device_id}")
+                return False
+
+            shard = self._place(device_id)
+            if accessory.driver is not shard.driver:
+                logger.error(f"Accesorio {accessory.display_name} no fue creado con el driver de su bridge")
+                return False
+
+            accessory.aid = self.placement[device_id][1]
+            self.accessories[device_id] = accessory
+            shard.accessories[device_id] = accessory
+
+        if shard.started:
+            # En caliente: el bridge solo se toca desde el loop de su driver
+            self._call_in_loop(shard, self._async_add_accessory, shard, accessory)
+        else:
+            shard.bridge.add_accessory(accessory)
+
+        logger.info(f"Accesorio agregado a hap service: {accessory.display_name} (bridge {shard.index + 1})")
         return True
-    
+
     def remove_accessory(self, device_id: str):
-        """Remover un accesorio del bridge"""
-        if device_id not in self.accessories:
+        """Remover un accesorio del bridge (también con el driver en marcha)"""
+        with self._lock:
+            accessory = self.accessories.pop(device_id, None)
+            shard = self._assigned.pop(device_id, None)
+            if shard is not None:
+                shard.accessories.pop(device_id, None)
+        if accessory is None or shard is None:
             logger.warning(f"Accesorio no encontrado: {device_id}")
             return False
-        
-        # HAP no soporta remover accesorios dinámicamente
-        # Necesitarías reiniciar el servicio
-        logger.warning("Remover accesorios requiere reiniciar el servicio")
-        return False
-    
+
+        if shard.started:
+            self._call_in_loop(shard, self._async_remove_accessory, shard, accessory)
+        else:
+            shard.bridge.accessories.pop(accessory.aid, None)
+
+        logger.info(f"Accesorio retirado de hap service: {accessory.display_name}")
+        return True
+
+    @staticmethod
+    def _call_in_loop(shard: BridgeShard, callback, *args):
+        try:
+            shard.driver.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError as e:
+            logger.warning(f"Bridge {shard.index + 1} detenido, cambio ignorado: {e}")
+
+    def _async_add_accessory(self, shard: BridgeShard, accessory):
+        """Agregar al bridge en marcha (corre en el loop del driver)"""
+        shard.bridge.add_accessory(accessory)
+        shard.driver.async_add_job(accessory.run)
+        self._schedule_config_changed(shard)
+
+    def _async_remove_accessory(self, shard: BridgeShard, accessory):
+        """Retirar del bridge en marcha (corre en el loop del driver)"""
+        shard.bridge.accessories.pop(accessory.aid, None)
+
+        # Olvidar las suscripciones de eventos de sus características
+        prefix = f"{accessory.aid}."
+        for topic in [topic for topic in shard.driver.topics if topic.startswith(prefix)]:
+            del shard.driver.topics[topic]
+
+        shard.driver.async_add_job(accessory.stop)
+        self._schedule_config_changed(shard)
+
+    def _schedule_config_changed(self, shard: BridgeShard):
+        """Agrupar cambios: una sola versión nueva y un solo anuncio mDNS"""
+        if shard.config_change_handle is not None:
+            shard.config_change_handle.cancel()
+        shard.config_change_handle = shard.driver.loop.call_later(
+            self.CONFIG_CHANGE_DELAY, self._async_config_changed, shard
+        )
+
+    def _async_config_changed(self, shard: BridgeShard):
+        shard.config_change_handle = None
+        shard.driver.state.increment_config_version()
+        shard.driver.async_persist()
+        shard.driver.async_update_advertisement()
+        logger.info(f"Configuración HAP del bridge {shard.index + 1} actualizada "
+                    f"(versión {shard.driver.state.config_version}, {len(shard.bridge.accessories)} accesorios)")
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def _start_shard(self, shard: BridgeShard):
+        """Iniciar un bridge adicional en su propio hilo (o en el loop compartido)"""
+        shard.driver.add_accessory(accessory=shard.bridge)
+        shard.started = True
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self._async_start_driver(shard), self.loop)
+            return
+        shard.thread = threading.Thread(
+            target=self._run_driver, args=(shard,), daemon=True, name=f"HomeKit-{shard.index + 1}"
+        )
+        shard.thread.start()
+
+    @staticmethod
+    def _run_driver(shard: BridgeShard):
+        # pyhap decide si publica directo o vía loop comparando con tid
+        shard.driver.tid = threading.current_thread()
+        shard.driver.start()
+
+    @staticmethod
+    async def _async_start_driver(shard: BridgeShard):
+        # Corre en el loop compartido: publicar desde él no necesita salto de hilo
+        shard.driver.tid = threading.current_thread()
+        try:
+            await shard.driver.async_start()
+        except Exception as e:
+            logger.error(f"Error iniciando bridge {shard.index + 1}: {e}", exc_info=True)
+
     def start(self):
         """Iniciar el servidor HAP"""
-        if not self.driver or not self.bridge:
-            raise RuntimeError("Servicio HAP no inicializado. Llama a initialize() primero")        
+        if not self.shards:
+            raise RuntimeError("Servicio HAP no inicializado. Llama a initialize() primero")
         logger.info("=" * 60)
         logger.info("Iniciando servidor HAP...")
-        logger.info(f"Accesorios registrados: {len(self.accessories)}")
+        logger.info(f"Accesorios registrados: {len(self.accessories)} en {len(self.shards)} bridges")
         logger.info("=" * 60)
-        
-        # Agregar bridge al driver
-        self.driver.add_accessory(accessory=self.bridge)
-        
+
+        with self._lock:
+            self._started = True
+            # Bridges adicionales en sus propios hilos
+            for shard in self.shards[1:]:
+                self._start_shard(shard)
+
+            # Agregar el primer bridge a su driver
+            first = self.shards[0]
+            first.driver.add_accessory(accessory=first.bridge)
+            first.started = True
+
         # Configurar signal handler
         #signal.signal(signal.SIGTERM, self.driver.signal_handler)
-        
+
         # Iniciar servidor (bloqueante)
         logger.info("Servidor HAP en ejecución...")
-        logger.info(f"Escanea el código QR en la app Home con PIN: {self.conf_parser.get('HAPCONFIG', 'pincode', fallback='031-45-154')}")
-        
-        self.driver.start()
-    
+        logger.info(f"Escanea el código QR en la app Home con PIN: {config.hap.pincode}")
+
+        self._run_driver(first)
+
+    async def async_start(self):
+        """Iniciar todos los bridges en el loop compartido (runtime unificado)"""
+        if not self.shards or self.loop is None:
+            raise RuntimeError("Servicio HAP no inicializado con loop. Llama a initialize(loop=...) primero")
+        logger.info(f"Iniciando servidor HAP: {len(self.accessories)} accesorios en {len(self.shards)} bridges")
+
+        with self._lock:
+            self._started = True
+            shards = list(self.shards)
+            for shard in shards:
+                shard.driver.add_accessory(accessory=shard.bridge)
+                shard.started = True
+
+        await asyncio.gather(*(self._async_start_driver(shard) for shard in shards))
+        logger.info(f"Escanea el código QR en la app Home con PIN: {config.hap.pincode}")
+
+    async def async_stop(self):
+        """Detener todos los bridges (runtime unificado)"""
+        started = [shard for shard in self.shards if shard.started]
+        results = await asyncio.gather(*(shard.driver.async_stop() for shard in started), return_exceptions=True)
+        for shard, result in zip(started, results):
+            shard.started = False
+            if isinstance(result, Exception):
+                logger.error(f"Error deteniendo bridge {shard.index + 1}: {result}")
+        logger.info("Servidor HAP detenido")
+
     def stop(self):
         """Detener el servidor HAP"""
-        if self.driver:
-            logger.info("Deteniendo servidor HAP...")
-            self.driver.stop()
-            logger.info("Servidor HAP detenido")
\ No newline at end of file
+        for shard in self.shards:
+            if shard.started:
+                logger.info(f"Deteniendo servidor HAP (bridge {shard.index + 1})...")
+                shard.driver.stop()
+        logger.info("Servidor HAP detenido")
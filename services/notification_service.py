@@ -0,0 +1,204 @@
+"""
+Servicio de notificaciones (Telegram y otros canales)
+"""
+import logging
+import queue
+import threading
+import time
+from abc import abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from core.http_transport import get_transport
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Notification:
+    """Aviso pendiente de enviar"""
+    device_id: str
+    event: str
+    text: str
+    created: float = field(default_factory=time.time)
+
+
+class NotificationChannel:
+    """Canal de salida para notificaciones"""
+
+    name: str = None
+
+    def is_configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    def send(self, notification: Notification):
+        """Enviar el aviso; lanza excepción si falla (se reintenta)"""
+        pass
+
+
+class TelegramChannel(NotificationChannel):
+    """Avisos por el webhook de Telegram configurado en [TELEGRAM]"""
+
+    name = "telegram"
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self.http = get_transport()
+
+    def is_configured(self) -> bool:
+        return bool(config.telegram.base_url)
+
+    def send(self, notification: Notification):
+        # Se lee en cada envío para tomar cambios de config.conf sin reiniciar
+        telegram = config.telegram
+        response = self.http.get(
+            telegram.base_url,
+            json={"chat_id": telegram.chat_id, "text": notification.text},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+# Estados que generan aviso: (tipo de dispositivo, estado) -> texto
+WASHER_EVENTS: Dict[Tuple[str, str], str] = {
+    ('WASHER', 'RINSING'): "La lavadora termino de lavar y ahora va a enjuagar",
+}
+
+
+class NotificationService:
+    """
+    Despachador de notificaciones.
+
+    notify() solo encola (nunca bloquea el pipeline de estados); un hilo en
+    segundo plano envía a todos los canales con reintentos y límite de
+    envíos por minuto. Los avisos se deduplican por dispositivo y evento.
+    """
+
+    def __init__(self, max_queue: int = 100, max_retries: int = 3, retry_backoff: float = 2.0,
+                 rate_per_minute: int = 20, dedup_window: float = 300.0):
+        self.channels: List[NotificationChannel] = []
+        self.events: Dict[Tuple[str, str], str] = dict(WASHER_EVENTS)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.rate_per_minute = rate_per_minute
+        self.dedup_window = dedup_window
+
+        self._queue: "queue.Queue[Optional[Notification]]" = queue.Queue(maxsize=max_queue)
+        self._active: Dict[str, str] = {}  # device_id -> evento vigente (ya avisado)
+        self._last_sent: Dict[Tuple[str, str], float] = {}  # (device_id, evento) -> t
+        self._sent_times: List[float] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_channel(self, channel: NotificationChannel):
+        """Registrar un canal de salida"""
+        self.channels.append(channel)
+        logger.info(f"Canal de notificaciones registrado: {channel.name}")
+
+    # ------------------------------------------------------------------
+    # Entrada
+    # ------------------------------------------------------------------
+
+    def watch_device(self, device_manager, device_id: str):
+        """Avisar de los eventos de un dispositivo del DeviceManager"""
+        device_manager.subscribe_to_device(device_id, self._on_device_state)
+
+    def _on_device_state(self, device_state):
+        """Callback de DeviceManager (corre bajo su lock: solo encola)"""
+        if 'state' not in device_state.changed_fields:
+            return
+
+        state = device_state.state.get('state')
+        device_type = device_state.device_type.upper().replace('DEVICE_', '')
+        text = self.events.get((device_type, state))
+        if text is None:
+            # Salió del evento: el próximo vuelve a avisar
+            with self._lock:
+                self._active.pop(device_state.device_id, None)
+            return
+
+        self.notify(device_state.device_id, state, f"{device_state.name}: {text}")
+
+    def notify(self, device_id: str, event: str, text: str) -> bool:
+        """
+        Encolar un aviso sin bloquear.
+
+        Returns:
+            True si se encoló; False si es duplicado o la cola está llena
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._active.get(device_id) == event:
+                return False
+            last = self._last_sent.get((device_id, event))
+            if last is not None and now - last < self.dedup_window:
+                logger.debug(f"Aviso duplicado descartado: {device_id} {event}")
+                return False
+            self._active[device_id] = event
+            self._last_sent[(device_id, event)] = now
+
+        try:
+            self._queue.put_nowait(Notification(device_id, event, text))
+            return True
+        except queue.Full:
+            logger.warning(f"Cola de notificaciones llena, aviso descartado: {text}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Iniciar el hilo de envío"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._sender_loop, daemon=True, name="Notifications")
+        self._thread.start()
+        logger.info(f"Servicio de notificaciones iniciado ({len(self.channels)} canales)")
+
+    def stop(self, timeout: float = 5.0):
+        """Detener el hilo de envío (los avisos en cola se envían antes)"""
+        if not self._thread:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _sender_loop(self):
+        while True:
+            notification = self._queue.get()
+            if notification is None:
+                break
+            self._wait_rate_limit()
+            for channel in self.channels:
+                if channel.is_configured():
+                    self._send_with_retry(channel, notification)
+
+    def _wait_rate_limit(self):
+        """Como máximo rate_per_minute envíos en cualquier ventana de 60 s"""
+        now = time.monotonic()
+        self._sent_times = [t for t in self._sent_times if now - t < 60]
+        if len(self._sent_times) >= self.rate_per_minute:
+            delay = 60 - (now - self._sent_times[0])
+            logger.info(f"Límite de notificaciones alcanzado, esperando {delay:.0f}s")
+            time.sleep(delay)
+        self._sent_times.append(time.monotonic())
+
+    def _send_with_retry(self, channel: NotificationChannel, notification: Notification):
+        for attempt in range(self.max_retries + 1):
+            try:
+                channel.send(notification)
+                logger.info(f"Aviso enviado por {channel.name}: {notification.text}")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"No se pudo enviar aviso por {channel.name}: {e}")
+                    return
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"Error enviando aviso por {channel.name} ({e}), reintento en {delay:.0f}s")
+                time.sleep(delay)
@@ -1,43 +1,71 @@
 """
 Servicio SmartThings que maneja el Bridge y accesorios
 """
-from flask import Flask, request, render_template_string, redirect, jsonify
+from flask import Flask, Response, request, render_template_string, redirect, jsonify
 from authlib.integrations.flask_client import OAuth
 from authlib.oauth2.rfc6749 import grants
 import secrets
-from requests import post as send_req
 from json import dumps, loads, JSONDecodeError
+import orjson
 from uuid import uuid4
-import configparser
 import os
 import logging
-from typing import Dict, List
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+from werkzeug.serving import make_server
 from config import config
+from core.http_transport import get_transport
+from services.async_wsgi import AsyncWSGIServer
+from services.smartthings_tokens import SmartThingsTokenManager, write_json_atomic
+
+try:
+    from waitress import create_server
+except ImportError:  # waitress es opcional: se usa el servidor de werkzeug
+    create_server = None
 
 logger = logging.getLogger(__name__)
 
 class SmartThingsService:
     """Servicio SmartThings"""
-    config_parser = configparser.ConfigParser()
-    config_parser.read(config.CONFIG_FILE)
+
+    # stateCallback agrupados: ventana en segundos y límites por petición
+    STATE_CALLBACK_WINDOW = 1.0
+    MAX_DEVICES_PER_CALLBACK = 100
+    MAX_CALLBACK_BYTES = 256 * 1024
+    # commandRequest: dispositivos en paralelo y tiempo máximo antes de responder
+    # (SmartThings corta el webhook a los ~10 s)
+    COMMAND_WORKERS = 8
+    COMMAND_DEADLINE = 7.0
     
     def __init__(self):
         self.app = Flask(__name__)
         self.accessories: Dict[str, object] = {}  # device_id -> accessory
+        self._by_external_id: Dict[str, object] = {}  # externalDeviceId -> accessory
+        self._command_executor = ThreadPoolExecutor(max_workers=self.COMMAND_WORKERS, thread_name_prefix="STCommand")
         self.code = ""
         self.callbackUrlsoauthToken = ""
         self.callbackUrlsstateCallback = ""
-        self.token_from_smartthings = ""
-        self.refresh_token_sesion_smartthings = ""
-        self.my_client_id = self.config_parser.get("SMARTTHINGS", "my_client_id")
-        self.my_client_secret = self.config_parser.get("SMARTTHINGS", "my_client_secret")
-        self.Endpoint_App_Id = self.config_parser.get("SMARTTHINGS", "Endpoint_App_Id")
-        self.St_Client_Id = self.config_parser.get("SMARTTHINGS", "St_Client_Id")
-        self.St_Client_Secret = self.config_parser.get("SMARTTHINGS", "St_Client_Secret")
-        self.host = self.config_parser.get("SMARTTHINGS", "host")
-        self.port = self.config_parser.getint("SMARTTHINGS", "port")
-        self.credentials_file = self.config_parser.get('SMARTTHINGS', 'credentials_file')
-        self.devies_config_file = self.config_parser.get('SMARTTHINGS', 'devies_conmfig_file', fallback="./.smarthome/smartthingsDevices.json")
+        self._http_server = None
+        self._server = None
+        self._server_thread: Optional[threading.Thread] = None
+        # Estados por enviar: externalDeviceId -> accesorio
+        self._pending_status: Dict[str, object] = {}
+        # Último valor enviado: externalDeviceId -> {(component, capability, attribute): valor}
+        self._last_status: Dict[str, Dict[Tuple[str, str, str], object]] = {}
+        self._status_timer: Optional[threading.Timer] = None
+        self._status_lock = threading.Lock()
+        self.http = get_transport()
+        # Token de los callbacks: se renueva solo antes de expirar
+        self.tokens = SmartThingsTokenManager(self.http)
+        self._apply_settings(config)
+        # host/port solo se leen al arrancar el servidor
+        self.host = config.smartthings.host
+        self.port = config.smartthings.port
+        # Credenciales y archivos se actualizan sin reiniciar
+        config.subscribe(self._apply_settings, sections=['SMARTTHINGS'])
 
         # Registrar rutas
         self.app.add_url_rule('/', 'health', self.health_check, methods=['GET'])
@@ -45,27 +73,36 @@ class SmartThingsService:
         self.app.add_url_rule('/oauth/token', 'token', self.token, methods=['POST'])
         self.app.add_url_rule('/target-endpoint', 'target_endpoint', self.target_endpoint, methods=['GET', 'POST'])
 
+    def _apply_settings(self, conf, changed=None):
+        """Tomar credenciales y rutas de [SMARTTHINGS]"""
+        settings = conf.smartthings
+        self.my_client_id = settings.my_client_id
+        self.my_client_secret = settings.my_client_secret
+        self.Endpoint_App_Id = settings.endpoint_app_id
+        self.St_Client_Id = settings.st_client_id
+        self.St_Client_Secret = settings.st_client_secret
+        self.credentials_file = settings.credentials_file
+        self.devies_config_file = settings.devices_config_file
+        self.tokens.configure(self.credentials_file, self.St_Client_Id, self.St_Client_Secret)
+        if changed:
+            logger.info("Credenciales SmartThings actualizadas")
+
     def initialize(self):
         """Inicializar el servicio SmartThings"""
         logger.info("Inicializando servicio SmartThings...")
         
         if os.path.exists(self.credentials_file):
             self.read_conf_file()
-            try:
-                self.discovery_callback()
-            except Exception as e:
-                logger.error(f"Error in discovery_callback: {e}")
-                try:
-                    self.refresh_token()
-                except Exception as e2:
-                    logger.error(f"Error refreshing token: {e2}")
+            self.tokens.start()
+            self.discovery_callback()
 
     def health_check(self):
         """Health check endpoint para nginx y monitoreo"""
         return jsonify({
             "status": "ok",
             "service": "SmartThings",
-            "accessories": len(self.accessories)
+            "accessories": len(self.accessories),
+            "http": self.http.stats()
         }), 200
 
     def add_accessory(self, device_id: str, accessory):
@@ -74,33 +111,137 @@ class SmartThingsService:
             return False
         
         self.accessories[device_id] = accessory
+        self._by_external_id[accessory.external_device_id] = accessory
         logger.info(f"Accesorio agregado a smartthings service: {accessory.external_device_id}")
         return True
 
+    def remove_accessory(self, device_id: str):
+        accessory = self.accessories.pop(device_id, None)
+        if not accessory:
+            logger.warning(f"Accesorio no encontrado en smartthings service: {device_id}")
+            return False
+        
+        self._by_external_id.pop(accessory.external_device_id, None)
+        with self._status_lock:
+            self._pending_status.pop(accessory.external_device_id, None)
+            self._last_status.pop(accessory.external_device_id, None)
+        logger.info(f"Accesorio retirado de smartthings service: {accessory.external_device_id}")
+        return True
+
     def save_shake(self, data):
-        with open(self.credentials_file, "w+") as file:
-            file.write(dumps(data, indent=2))
+        write_json_atomic(self.credentials_file, data)
 
-    def save_new_token(self, access_token, refresh_token, expieres):
-        try:
-            with open(self.credentials_file, "r") as file:
-                d = loads(file.read())
-                d[3]["accessToken"] = access_token
-                d[3]["refreshToken"] = refresh_token
-                d[3]["expiresIn"] = expieres
-                with open(self.credentials_file, "w+") as file:
-                    file.write(dumps(d, indent=2))
-        except (FileNotFoundError, JSONDecodeError, KeyError, IndexError) as e:
-            logger.error(f"Error saving new token: {e}")
+    def _create_server(self):
+        """Servidor WSGI de producción (waitress) o werkzeug con hilos si no está instalado"""
+        settings = config.smartthings
+        if create_server is not None:
+            return create_server(
+                self.app,
+                host=self.host,
+                port=self.port,
+                threads=settings.threads,
+                connection_limit=settings.connection_limit,
+                channel_timeout=settings.keepalive_timeout,
+                cleanup_interval=max(1, min(30, settings.keepalive_timeout // 2)),
+                max_request_body_size=settings.max_request_body_size,
+                ident="smarthomebridge",
+            )
+
+        logger.warning("waitress no está instalado, se usa el servidor de werkzeug")
+        return make_server(self.host, self.port, self.app, threaded=True)
 
     def start(self):
         """Iniciar el servidor smartthings (bloqueante)"""
-        logger.info("Servidor smartthings en ejecución...")
-        self.app.run(host=self.host, port=self.port)
+        self._server = self._create_server()
+        settings = config.smartthings
+        logger.info(f"Servidor smartthings en ejecución en {self.host}:{self.port} "
+                    f"({settings.threads} hilos, {settings.connection_limit} conexiones)...")
+        self._server_thread = threading.current_thread()
+        if create_server is not None:
+            # run() termina cuando el loop de waitress se queda sin sockets (ver stop())
+            self._server.run()
+        else:
+            self._server.serve_forever()
 
     def stop(self):
-        """Detener el servidor smartthings"""
-        return
+        """
+        Detener el servidor smartthings.
+        Deja de aceptar conexiones y espera (hasta shutdown_timeout) a que
+        terminen las peticiones en curso.
+        """
+        # Estados que quedaron en la ventana de agrupación
+        with self._status_lock:
+            if self._status_timer is not None:
+                self._status_timer.cancel()
+        self.flush_device_status()
+        self.tokens.stop()
+        self._command_executor.shutdown(wait=False)
+
+        server, self._server = self._server, None
+        if server is None:
+            return
+
+        timeout = config.smartthings.shutdown_timeout
+        logger.info("Deteniendo servidor smartthings...")
+        if create_server is None:
+            server.shutdown()
+            server.server_close()
+            return
+
+        # Los sockets solo se tocan desde el hilo del loop de waitress: los
+        # pasos que los cierran se le envían con trigger.pull_trigger(thunk)
+        server.trigger.pull_trigger(lambda: self._stop_accepting(server))
+        # Los hilos terminan la petición que atienden y se retiran
+        server.task_dispatcher.shutdown(cancel_pending=False, timeout=timeout)
+        server.trigger.pull_trigger(lambda: self._close_connections(server))
+
+        thread, self._server_thread = self._server_thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("El servidor smartthings no terminó a tiempo")
+                return
+        logger.info("Servidor smartthings detenido")
+
+    @staticmethod
+    def _stop_accepting(server):
+        """(Hilo de waitress) No aceptar conexiones nuevas y cerrar las inactivas"""
+        server.accepting = False
+        for channel in list(server.active_channels.values()):
+            if not channel.requests:
+                channel.will_close = True
+
+    @staticmethod
+    def _close_connections(server):
+        """(Hilo de waitress) Cerrar cada conexión al terminar de enviar, y el socket de escucha"""
+        for channel in list(server.active_channels.values()):
+            channel.close_when_flushed = True
+        # Cierra el socket de escucha y el trigger: sin sockets, run() termina
+        server.close()
+
+    async def async_start(self, executor=None):
+        """
+        Servir la app en el loop en curso (runtime unificado).
+
+        Args:
+            executor: Executor donde corren los handlers de Flask
+        """
+        settings = config.smartthings
+        self._http_server = AsyncWSGIServer(
+            self.app, self.host, self.port, executor=executor,
+            max_body_size=settings.max_request_body_size,
+            keepalive_timeout=settings.keepalive_timeout
+        )
+        await self._http_server.start()
+        logger.info("Servidor smartthings en ejecución (asyncio)...")
+
+    async def async_stop(self):
+        """Detener el servidor asyncio"""
+        if self._http_server:
+            await self._http_server.stop()
+            self._http_server = None
+        self.tokens.stop()
+        self._command_executor.shutdown(wait=False)
 
     def read_conf_file(self):
         try:
@@ -109,16 +250,13 @@ class SmartThingsService:
                 self.code = d[1].get("code", "")
                 self.callbackUrlsoauthToken = d[2].get("oauthToken", "")
                 self.callbackUrlsstateCallback = d[2].get("stateCallback", "")
-                self.token_from_smartthings = d[3].get("accessToken", "")
-                self.refresh_token_sesion_smartthings = d[3].get("refreshToken", "")
+            self.tokens.load(d)
         except (FileNotFoundError, JSONDecodeError, KeyError, IndexError) as e:
             logger.error(f"Error reading config file: {e}")
             # Reset to defaults
             self.code = ""
             self.callbackUrlsoauthToken = ""
             self.callbackUrlsstateCallback = ""
-            self.token_from_smartthings = ""
-            self.refresh_token_sesion_smartthings = ""
 
     def authorize(self):
         if request.method == 'GET':
@@ -190,7 +328,7 @@ class SmartThingsService:
         if operatin_type == "discoveryRequest":
             respuesta = self.handle_device_discovered(request_id)
         elif operatin_type == "stateRefreshRequest":
-            respuesta = self.state_refresh_request(request_id)
+            respuesta = self.state_refresh_request(request_id, data.get("devices"))
         elif operatin_type == "commandRequest":
             logger.info("-"*10 + f" Respuesta recibida para {operatin_type} " + "-"*10)
             logger.info("data recibida del server de autorization " + str(request.authorization))
@@ -207,57 +345,145 @@ class SmartThingsService:
             if status == 200:
                 datos = [data.get("authentication"), data.get("callbackAuthentication"), data.get("callbackUrls"), rr.get("callbackAuthentication")]
                 self.save_shake(datos)
+                self.tokens.update(self.callbackUrlsoauthToken, rr.get("callbackAuthentication"))
+                self.tokens.start()
             logger.info("-"*50)
         return respuesta, 200
     
+    @staticmethod
+    def _fragments_response(envelope: Dict, key: str, fragments: List[bytes]) -> Response:
+        """
+        Respuesta JSON armada con fragmentos ya codificados.
+
+        Args:
+            envelope: Campos fijos de la respuesta (headers, ...)
+            key: Nombre de la lista que forman los fragmentos
+            fragments: Un objeto JSON (bytes) por dispositivo
+        """
+        body = b''.join((
+            orjson.dumps(envelope)[:-1],
+            b',"', key.encode(), b'":[', b','.join(fragments), b']}',
+        ))
+        return Response(body, mimetype='application/json')
+
     def handle_device_discovered(self, request_id):
-        result = {
-            "headers": {
-                "schema": "st-schema",
-                "version": "1.0",
-                "interactionType": "discoveryResponse",
-                "requestId": request_id
+        return self._fragments_response(
+            {
+                "headers": {
+                    "schema": "st-schema",
+                    "version": "1.0",
+                    "interactionType": "discoveryResponse",
+                    "requestId": request_id
+                },
+                "requestGrantCallbackAccess": True,
             },
-            "requestGrantCallbackAccess": True,
-            "devices": [
-                i.to_discovery_dict() for i in self.accessories.values()
-            ]
-        }
-        return result
+            "devices",
+            [i.discovery_fragment() for i in list(self.accessories.values())]
+        )
 
-    def state_refresh_request(self, request_id):
-        result = {
-            "headers": {
-                "schema": "st-schema",
-                "version": "1.0",
-                "interactionType": "stateRefreshResponse",
-                "requestId": request_id
+    @staticmethod
+    def _device_error(external_device_id: str, error_enum: str, detail: str) -> bytes:
+        """Entrada deviceError (formato ST Schema) ya codificada"""
+        return orjson.dumps({
+            "externalDeviceId": external_device_id,
+            "deviceError": [{"errorEnum": error_enum, "detail": detail}]
+        })
+
+    def _state_fragments(self, external_device_ids: List[str]) -> List[bytes]:
+        """Estado cacheado de los dispositivos pedidos (deviceError si no existen)"""
+        fragments = []
+        for external_device_id in external_device_ids:
+            accessory = self._by_external_id.get(external_device_id)
+            if accessory is None:
+                fragments.append(self._device_error(external_device_id, "DEVICE-DELETED", "Dispositivo desconocido"))
+            else:
+                fragments.append(accessory.state_fragment())
+        return fragments
+
+    def state_refresh_request(self, request_id, devices: Optional[List[Dict]] = None):
+        """
+        stateRefreshResponse con el último estado conocido.
+
+        Args:
+            request_id: requestId de la petición
+            devices: Dispositivos pedidos por SmartThings (todos si es None)
+        """
+        if devices is None:
+            fragments = [i.state_fragment() for i in list(self.accessories.values())]
+        else:
+            fragments = self._state_fragments([device.get("externalDeviceId") for device in devices])
+        return self._fragments_response(
+            {
+                "headers": {
+                    "schema": "st-schema",
+                    "version": "1.0",
+                    "interactionType": "stateRefreshResponse",
+                    "requestId": request_id
+                },
             },
-            "deviceState": [
-                i.state_refresh_request() for i in self.accessories.values()
-            ]
-        }
-        return result
+            "deviceState",
+            fragments
+        )
 
     def command_request(self, request_id, commands=None):
-        if commands:
-            for command in commands:
-                device_id = command.get("externalDeviceId")
-                accessory = self.accessories.get(device_id)
-                if accessory:
-                    accessory.handle_smartthings_command(command)
-        result = {
-            "headers": {
-                "schema": "st-schema",
-                "version": "1.0",
-                "interactionType": "commandResponse",
-                "requestId": request_id
+        """
+        Ejecutar los comandos y responder con el estado cacheado.
+
+        Los dispositivos se atienden en paralelo (los comandos de un mismo
+        dispositivo, en orden). Se espera hasta COMMAND_DEADLINE: lo que no
+        haya terminado se reporta como DEVICE-UNAVAILABLE y sigue en segundo
+        plano; el resultado real llega después por stateCallback. La
+        respuesta no espera la resincronización con la marca.
+        """
+        by_device: Dict[str, List[Dict]] = defaultdict(list)
+        for command in commands or []:
+            by_device[command.get("externalDeviceId")].append(command)
+
+        futures = {}
+        errors: Dict[str, Tuple[str, str]] = {}
+        for external_device_id, device_commands in by_device.items():
+            accessory = self._by_external_id.get(external_device_id)
+            if accessory is None:
+                errors[external_device_id] = ("DEVICE-DELETED", "Dispositivo desconocido")
+                continue
+            futures[external_device_id] = self._command_executor.submit(
+                self._run_device_commands, accessory, device_commands
+            )
+
+        done, pending = wait(futures.values(), timeout=self.COMMAND_DEADLINE)
+        if pending:
+            logger.warning(f"{len(pending)} dispositivos no terminaron sus comandos en {self.COMMAND_DEADLINE}s")
+        for external_device_id, future in futures.items():
+            if future not in done:
+                errors[external_device_id] = ("DEVICE-UNAVAILABLE", "El comando no terminó a tiempo")
+            elif not future.result():
+                errors[external_device_id] = ("DEVICE-UNAVAILABLE", "No se pudo ejecutar el comando")
+
+        fragments = [
+            self._device_error(external_device_id, *errors[external_device_id]) if external_device_id in errors
+            else self._by_external_id[external_device_id].state_fragment()
+            for external_device_id in by_device
+        ]
+        return self._fragments_response(
+            {
+                "headers": {
+                    "schema": "st-schema",
+                    "version": "1.0",
+                    "interactionType": "commandResponse",
+                    "requestId": request_id
+                },
             },
-            "deviceState": [
-                i.state_refresh_request() for i in self.accessories.values()
-            ]
-        }
-        return result
+            "deviceState",
+            fragments
+        )
+
+    @staticmethod
+    def _run_device_commands(accessory, commands: List[Dict]) -> bool:
+        """Comandos de un dispositivo, en orden (corre en el executor)"""
+        ok = True
+        for command in commands:
+            ok = bool(accessory.handle_smartthings_command(command)) and ok
+        return ok
 
     def send_token_request(self):
         message = {
@@ -275,41 +501,115 @@ class SmartThingsService:
             }
         }
         logger.info("-"*50 + " Aqui inicia el [accesTokenRequest] " + "-"*50)
-        result = send_req(self.callbackUrlsoauthToken, json=message)
+        result = self.http.post(self.callbackUrlsoauthToken, json=message)
         logger.info(result.json())
         logger.info("-"*50)
         return result.json(), result.status_code
 
-    def refresh_token(self):
-        message = {
-            "headers": {
-                "schema": "st-schema",
-                "version": "1.0",
-                "interactionType": "refreshAccessTokens",
-                "requestId": str(uuid4())
-            },
-            "callbackAuthentication": {
-                "grantType": "refresh_token",
-                "refreshToken": self.refresh_token_sesion_smartthings,
-                "clientId": self.St_Client_Id,
-                "clientSecret": self.St_Client_Secret
-            }
-        }
-        result = send_req(self.callbackUrlsoauthToken, json=message)
-        logger.info("Refresh token")
-        rr = result.json()
-        logger.info(rr)
-        if result.status_code == 200:
-            self.token_from_smartthings = rr.get("callbackAuthentication").get("accessToken")
-            self.refresh_token_sesion_smartthings = rr.get("callbackAuthentication").get("refreshToken")
-            self.save_new_token(rr.get("callbackAuthentication").get("accessToken"), rr.get("callbackAuthentication").get("refreshToken"), rr.get("callbackAuthentication").get("expiresIn"))
-        logger.info("-"*50)
-        return rr, result.status_code
+    def queue_device_status(self, accessory):
+        """
+        Agregar el estado de un accesorio al próximo stateCallback (no bloquea).
 
-    def send_device_status(self, devices_list=None):
-        if devices_list is None:
-            devices_list = list(self.accessories.values())
-            result = None
+        Los estados que llegan durante STATE_CALLBACK_WINDOW se envían juntos;
+        si un dispositivo cambia varias veces se envía solo su último estado.
+        """
+        with self._status_lock:
+            self._pending_status[accessory.external_device_id] = accessory
+            if self._status_timer is None:
+                self._status_timer = threading.Timer(self.STATE_CALLBACK_WINDOW, self.flush_device_status)
+                self._status_timer.daemon = True
+                self._status_timer.start()
+
+    def flush_device_status(self) -> int:
+        """
+        Enviar los estados acumulados en el menor número de stateCallback.
+
+        Returns:
+            Número de dispositivos enviados
+        """
+        with self._status_lock:
+            pending, self._pending_status = self._pending_status, {}
+            self._status_timer = None
+            last_status = {device_id: self._last_status.get(device_id, {}) for device_id in pending}
+
+        timestamp = int(time.time() * 1000)
+        entries = []
+        values = {}
+        for device_id, accessory in pending.items():
+            entry, values[device_id] = self._changed_device_state(accessory, last_status[device_id], timestamp)
+            if entry:
+                entries.append(entry)
+
+        sent = 0
+        for chunk in self._chunk_device_states(entries):
+            _, status = self._post_state_callback(chunk)
+            if status is None or not 200 <= status < 300:
+                # Sin actualizar _last_status: se vuelven a marcar como cambiados
+                continue
+            with self._status_lock:
+                for entry in chunk:
+                    self._last_status[entry["externalDeviceId"]] = values[entry["externalDeviceId"]]
+            sent += len(chunk)
+
+        if entries:
+            logger.debug(f"stateCallback: {sent}/{len(entries)} dispositivos enviados")
+        return sent
+
+    @staticmethod
+    def _changed_device_state(accessory, previous: Dict, timestamp: int):
+        """
+        deviceState de un accesorio con stateChange solo en lo que cambió.
+
+        Returns:
+            (entrada o None si nada cambió, valores actuales)
+        """
+        values = {}
+        states = []
+        changed = False
+        for state in accessory.state_refresh_request()["states"]:
+            key = (state["component"], state["capability"], state["attribute"])
+            values[key] = state["value"]
+            entry = {**state, "timestamp": timestamp}
+            if key not in previous or previous[key] != state["value"]:
+                entry["stateChange"] = "Y"
+                changed = True
+            states.append(entry)
+
+        if not changed:
+            return None, values
+        return {"externalDeviceId": accessory.external_device_id, "states": states}, values
+
+    def _chunk_device_states(self, entries: List[Dict]):
+        """Partir en lotes que respeten MAX_DEVICES_PER_CALLBACK y MAX_CALLBACK_BYTES"""
+        chunk, size = [], 0
+        for entry in entries:
+            entry_size = len(dumps(entry))
+            if chunk and (len(chunk) >= self.MAX_DEVICES_PER_CALLBACK or size + entry_size > self.MAX_CALLBACK_BYTES):
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(entry)
+            size += entry_size
+        if chunk:
+            yield chunk
+
+    def _post_callback(self, message: Dict) -> int:
+        """
+        Enviar un callback con el token vigente.
+
+        Si SmartThings responde 401 (token revocado antes de expirar) se
+        renueva una vez y se reintenta.
+
+        Returns:
+            Código HTTP de la respuesta
+        """
+        message["authentication"] = {"tokenType": "Bearer", "token": self.tokens.get_token()}
+        result = self.http.post(self.callbackUrlsstateCallback, json=message)
+        if result.status_code == 401 and self.tokens.refresh():
+            message["authentication"]["token"] = self.tokens.get_token()
+            result = self.http.post(self.callbackUrlsstateCallback, json=message)
+        return result.status_code
+
+    def _post_state_callback(self, device_states: List[Dict]):
         try:
             message = {
                 "headers": {
@@ -318,25 +618,36 @@ class SmartThingsService:
                     "interactionType": "stateCallback",
                     "requestId": str(uuid4())
                 },
-                "authentication": {
-                    "tokenType": "Bearer",
-                    "token": self.token_from_smartthings
-                },
-                "deviceState": [
-                    i.send_device_status() for i in devices_list
-                ]
+                "deviceState": device_states
             }
-            print("Este es el mensaje que se va a enviar a SmartThings en send_device_status: " + str(message))
-            result = send_req(self.callbackUrlsstateCallback, json=message)
-            return {}, result.status_code
+            return {}, self._post_callback(message)
         except Exception as e:
             logger.error(f"Error in send_device_status: {e}")
-            try:
-                self.refresh_token()
-            except Exception as e2:
-                logger.error(f"Error refreshing token: {e2}")
             return None, 500
 
+    def notify_devices_deleted(self, external_device_ids: List[str]):
+        """
+        Avisar a SmartThings que los dispositivos ya no existen.
+
+        ST Schema elimina el dispositivo de la app al recibir un
+        stateCallback con deviceError DEVICE-DELETED.
+        """
+        if not external_device_ids:
+            return {}, 200
+        return self._post_state_callback([
+            {
+                "externalDeviceId": external_device_id,
+                "deviceError": [{"errorEnum": "DEVICE-DELETED", "detail": "Dispositivo retirado de la cuenta"}]
+            }
+            for external_device_id in external_device_ids
+        ])
+
+    def send_device_status(self, devices_list=None):
+        """Enviar de inmediato el estado completo (todos los atributos con stateChange)"""
+        if devices_list is None:
+            devices_list = list(self.accessories.values())
+        return self._post_state_callback([i.send_device_status() for i in devices_list])
+
     def discovery_callback(self, devices_list=None):
         if devices_list is None:
             devices_list = list(self.accessories.values())
@@ -348,20 +659,11 @@ class SmartThingsService:
                     "interactionType": "discoveryCallback",
                     "requestId": str(uuid4())
                 },
-                "authentication": {
-                    "tokenType": "Bearer",
-                    "token": self.token_from_smartthings
-                },
                 "devices": [
                     i.to_discovery_dict() for i in devices_list
                 ]
             }
-            result = send_req(self.callbackUrlsstateCallback, json=message)
-            return {}, result.status_code
+            return {}, self._post_callback(message)
         except Exception as e:
             logger.error(f"Error in discovery_callback: {e}")
-            try:
-                self.refresh_token()
-            except Exception as e2:
-                logger.error(f"Error refreshing token: {e2}")
             return None, 500
@@ -0,0 +1,273 @@
+"""
+Ciclo de vida del token de callbacks de SmartThings.
+
+SmartThingsTokenManager guarda el accessToken/refreshToken que SmartThings
+entrega en grantCallbackAccess y lo renueva antes de que expire (según
+expiresIn) en un hilo de fondo. Solo hay una renovación en vuelo: quien la
+necesite mientras tanto espera su resultado. Las credenciales se escriben
+de forma atómica (archivo temporal + os.replace).
+"""
+import logging
+import os
+import threading
+import time
+from json import JSONDecodeError, dumps, loads
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+
+def write_json_atomic(path: str, data):
+    """Escribir JSON sin dejar nunca el archivo a medias"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        file.write(dumps(data, indent=2))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class SmartThingsTokenManager:
+    """
+    Token de callbacks (stateCallback/discoveryCallback) de SmartThings.
+
+    Uso:
+        tokens = SmartThingsTokenManager(http)
+        tokens.configure(credentials_file, client_id, client_secret)
+        tokens.load()
+        tokens.start()
+        token = tokens.get_token()
+    """
+
+    # Renovar cuando falte esto para expirar (acotado a REFRESH_MARGIN_MIN/MAX)
+    REFRESH_MARGIN_RATIO = 0.2
+    REFRESH_MARGIN_MIN = 60.0
+    REFRESH_MARGIN_MAX = 600.0
+    # Reintentos si la renovación falla
+    RETRY_MIN = 30.0
+    RETRY_MAX = 300.0
+    # Espera máxima por una renovación en vuelo
+    REFRESH_WAIT = 30.0
+
+    def __init__(self, http):
+        self.http = http
+        self.credentials_file = ""
+        self.client_id = ""
+        self.client_secret = ""
+        self.oauth_url = ""
+        self.access_token = ""
+        self.refresh_token = ""
+        self.expires_at: Optional[float] = None  # time.time() en que expira
+        self.lifetime: Optional[float] = None  # expiresIn del token vigente
+
+        self._lock = threading.Lock()
+        self._refresh_done = threading.Condition(self._lock)
+        self._refreshing = False
+        self._last_refresh_ok = False
+        self._retry_delay = self.RETRY_MIN
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, credentials_file: str, client_id: str, client_secret: str):
+        """Archivo de credenciales y clientId/clientSecret de SmartThings"""
+        self.credentials_file = credentials_file
+        self.client_id = client_id
+        self.client_secret = client_secret
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def load(self, credentials: Optional[List[Dict]] = None):
+        """
+        Tomar los tokens del archivo de credenciales.
+
+        expiresIn es relativo a la emisión; como el archivo se reescribe
+        cada vez que llega un token, su fecha de modificación marca la emisión.
+
+        Args:
+            credentials: Contenido ya leído del archivo (se lee si es None)
+        """
+        try:
+            if credentials is None:
+                with open(self.credentials_file, "r") as file:
+                    credentials = loads(file.read())
+            issued_at = os.path.getmtime(self.credentials_file)
+            callback_urls, tokens = credentials[2], credentials[3]
+        except (OSError, JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.error(f"Error leyendo tokens de SmartThings: {e}")
+            return
+
+        with self._lock:
+            self.oauth_url = callback_urls.get("oauthToken", "")
+            self.access_token = tokens.get("accessToken", "")
+            self.refresh_token = tokens.get("refreshToken", "")
+            self._set_expiry(tokens.get("expiresIn"), issued_at)
+        self._wakeup.set()
+
+    def update(self, oauth_url: str, callback_authentication: Dict):
+        """
+        Tokens recién emitidos (grantCallbackAccess); el llamador los persiste.
+
+        Args:
+            oauth_url: callbackUrls.oauthToken
+            callback_authentication: accessToken, refreshToken, expiresIn
+        """
+        with self._lock:
+            self.oauth_url = oauth_url
+            self._set_tokens(callback_authentication)
+        self._wakeup.set()
+
+    def _set_expiry(self, expires_in, issued_at: float):
+        try:
+            self.lifetime = float(expires_in)
+            self.expires_at = issued_at + self.lifetime
+        except (TypeError, ValueError):
+            self.lifetime = self.expires_at = None
+
+    def _set_tokens(self, callback_authentication: Dict):
+        self.access_token = callback_authentication.get("accessToken", "")
+        self.refresh_token = callback_authentication.get("refreshToken", self.refresh_token)
+        self._set_expiry(callback_authentication.get("expiresIn"), time.time())
+
+    def _refresh_due(self) -> Optional[float]:
+        """time.time() en que conviene renovar (None si no se sabe cuándo expira)"""
+        if self.expires_at is None:
+            return None
+        margin = self.lifetime * self.REFRESH_MARGIN_RATIO
+        margin = min(self.REFRESH_MARGIN_MAX, max(self.REFRESH_MARGIN_MIN, margin))
+        # Tokens de vida muy corta: nunca renovar antes de la mitad de su vida
+        margin = min(margin, self.lifetime / 2)
+        return self.expires_at - margin
+
+    def get_token(self) -> str:
+        """
+        Token vigente para un callback.
+
+        Solo bloquea si el token ya expiró (p. ej. al arrancar tras mucho
+        tiempo apagado); si está por expirar lo renueva el hilo de fondo.
+        """
+        with self._lock:
+            expired = self.expires_at is not None and time.time() >= self.expires_at
+        if expired:
+            self.refresh()
+        with self._lock:
+            return self.access_token
+
+    # ------------------------------------------------------------------
+    # Renovación
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """
+        Renovar el token (una sola renovación en vuelo).
+
+        Si ya hay una renovación en curso espera su resultado en vez de
+        lanzar otra.
+
+        Returns:
+            True si el token quedó renovado
+        """
+        with self._lock:
+            if self._refreshing:
+                self._refresh_done.wait_for(lambda: not self._refreshing, timeout=self.REFRESH_WAIT)
+                return self._last_refresh_ok
+            self._refreshing = True
+            oauth_url, refresh_token = self.oauth_url, self.refresh_token
+
+        ok = False
+        try:
+            ok = self._request_refresh(oauth_url, refresh_token)
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._last_refresh_ok = ok
+                self._retry_delay = self.RETRY_MIN if ok else min(self._retry_delay * 2, self.RETRY_MAX)
+                self._refresh_done.notify_all()
+        return ok
+
+    def _request_refresh(self, oauth_url: str, refresh_token: str) -> bool:
+        if not oauth_url or not refresh_token:
+            logger.warning("Sin refreshToken de SmartThings: no se puede renovar el token")
+            return False
+
+        message = {
+            "headers": {
+                "schema": "st-schema",
+                "version": "1.0",
+                "interactionType": "refreshAccessTokens",
+                "requestId": str(uuid4())
+            },
+            "callbackAuthentication": {
+                "grantType": "refresh_token",
+                "refreshToken": refresh_token,
+                "clientId": self.client_id,
+                "clientSecret": self.client_secret
+            }
+        }
+        try:
+            result = self.http.post(oauth_url, json=message)
+            callback_authentication = result.json().get("callbackAuthentication") if result.status_code == 200 else None
+        except Exception as e:
+            logger.error(f"Error renovando el token de SmartThings: {e}")
+            return False
+
+        if not callback_authentication or not callback_authentication.get("accessToken"):
+            logger.error(f"SmartThings rechazó la renovación del token (HTTP {result.status_code})")
+            return False
+
+        with self._lock:
+            self._set_tokens(callback_authentication)
+        self._persist(callback_authentication)
+        logger.info("Token de SmartThings renovado")
+        return True
+
+    def _persist(self, callback_authentication: Dict):
+        try:
+            with open(self.credentials_file, "r") as file:
+                credentials = loads(file.read())
+            credentials[3]["accessToken"] = callback_authentication.get("accessToken")
+            credentials[3]["refreshToken"] = callback_authentication.get("refreshToken")
+            credentials[3]["expiresIn"] = callback_authentication.get("expiresIn")
+            write_json_atomic(self.credentials_file, credentials)
+        except (OSError, JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            logger.error(f"Error guardando el token de SmartThings: {e}")
+
+    # ------------------------------------------------------------------
+    # Hilo de fondo
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Renovar en segundo plano antes de cada expiración"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True, name="SmartThingsToken")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _refresh_loop(self):
+        while self._running:
+            with self._lock:
+                due = self._refresh_due()
+            wait = None if due is None else max(0.0, due - time.time())
+
+            if wait is None or wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue  # recalcular: pudo llegar un token nuevo o stop()
+
+            if not self.refresh():
+                with self._lock:
+                    delay = self._retry_delay
+                logger.warning(f"Se reintentará renovar el token de SmartThings en {delay:.0f} s")
+                self._wakeup.wait(delay)
+                self._wakeup.clear()
@@ -0,0 +1,70 @@
+"""
+Validación de comandos LG contra un perfil con la forma real de ThinQ Connect
+(propiedades agrupadas por recurso y "property" como lista por ubicación).
+"""
+import unittest
+
+from models.LG.command_compiler import InvalidCommandError, LGCommandCompiler
+from models.LG.washer import WasherCommand, WasherProfile
+
+
+def _location(name):
+    return {
+        "location": {"locationName": {"type": "enum", "mode": ["r"], "value": {"r": [name]}}},
+        "runState": {"currentState": {"type": "enum", "mode": ["r"], "value": {"r": ["POWER_OFF", "RUNNING"]}}},
+        "operation": {"washerOperationMode": {"type": "enum", "mode": ["w"], "value": {"w": ["START", "STOP"]}}},
+        "timer": {
+            "remainHour": {"type": "number", "mode": ["r"]},
+            "relativeHourToStart": {"type": "range", "mode": ["r", "w"],
+                                    "value": {"r": {"min": 3, "max": 5, "step": 1},
+                                              "w": {"min": 3, "max": 5, "step": 1}}},
+        },
+    }
+
+
+PROFILE = {"property": [_location("MAIN"), _location("MINI")]}
+
+
+class WasherProfileTest(unittest.TestCase):
+
+    def test_nested_properties(self):
+        profile = WasherProfile.from_json(PROFILE)
+        self.assertEqual(profile.get_allowed_values('operation.washerOperationMode', mode='w'), ['START', 'STOP'])
+        self.assertEqual(profile.get_allowed_values('location.locationName'), ['MAIN', 'MINI'])
+        self.assertEqual(profile.get_range('timer.relativeHourToStart'), {'min': 3, 'max': 5, 'step': 1})
+
+    def test_flat_property(self):
+        profile = WasherProfile.from_json({"property": {"state": {"type": "enum", "value": {"r": [{"label": ["WASH"]}]}}}})
+        self.assertEqual(profile.get_allowed_values('state'), ['WASH'])
+
+
+class LGCommandCompilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fetches = 0
+
+        def loader(device_id):
+            self.fetches += 1
+            return PROFILE
+
+        self.compiler = LGCommandCompiler(loader)
+
+    def test_rejects_out_of_profile_commands(self):
+        for command in (WasherCommand(operation_mode='POWER_OFF'),
+                        WasherCommand(reserve_time_h=19),
+                        WasherCommand(reserve_time_h=2),
+                        WasherCommand(location_name='TOP')):
+            with self.subTest(command=command), self.assertRaises(InvalidCommandError):
+                self.compiler.compile(command, 'device-1', 'F4V5')
+        self.assertEqual(self.fetches, 1)
+
+    def test_accepts_profile_commands(self):
+        payload = self.compiler.compile(WasherCommand(location_name='MINI', operation_mode='START', reserve_time_h=4),
+                                        'device-1', 'F4V5')
+        self.assertEqual(payload, {'location': {'locationName': 'MINI'},
+                                   'operation': {'washerOperationMode': 'START'},
+                                   'timer': {'relativeHourToStart': 4}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+SamsungPlugin contra el stand-in local de la API de SmartThings
+(plugins.samsung_standin).
+"""
+import unittest
+
+from brandconnectors.samsung_client import SamsungSmartThingsClient
+from bridges.device_mappings import DEVICE_MAPPINGS
+from models.LG.washer import WasherCommand
+from plugins.samsung_plugin import SamsungPlugin
+from plugins.samsung_standin import SmartThingsStandIn, washer_status
+
+
+class SamsungPluginTest(unittest.TestCase):
+
+    def setUp(self):
+        self.standin = SmartThingsStandIn(access_token='token', page_size=2)
+        self.standin.add_washer('washer-1', 'Lavadora')
+        self.standin.add_washer('washer-2', 'Lavadora 2', status=washer_status('on', 'run', 'rinse'))
+        self.standin.add_washer('washer-3', 'Sin estado', has_status=False)
+        self.standin.start()
+        self.addCleanup(self.standin.stop)
+
+        self.plugin = SamsungPlugin()
+        self.plugin.client = SamsungSmartThingsClient('token', base_url=self.standin.base_url)
+        self.addCleanup(self.plugin.client.session.close)
+
+    def test_discover_follows_pagination(self):
+        devices = self.plugin.discover_devices()
+        self.assertEqual([d['device_id'] for d in devices], ['washer-1', 'washer-2', 'washer-3'])
+        self.assertTrue(all(d['device_type'] == 'DEVICE_WASHER' and d['brand'] == 'samsung' for d in devices))
+        self.assertEqual(devices[0]['model'], 'WF45T6000AW')
+
+    def test_bulk_state_omits_devices_without_status(self):
+        self.plugin.discover_devices()
+        self.standin.requests.clear()
+
+        states = self.plugin.get_devices_state(['washer-1', 'washer-2', 'washer-3'])
+        self.assertEqual(states['washer-1'].state, 'POWER_OFF')
+        self.assertEqual(states['washer-2'].state, 'RINSING')
+        self.assertNotIn('washer-3', states)
+        # Un GET masivo y el /status individual del que no trajo estado
+        self.assertEqual(len(self.standin.requests), 2)
+        self.assertIsNone(self.plugin.get_device_state('washer-3', 'DEVICE_WASHER'))
+
+    def test_washer_command(self):
+        self.plugin.discover_devices()
+        self.assertTrue(self.plugin.send_command('washer-1', WasherCommand(location_name='MAIN', operation_mode='START')))
+        self.assertEqual(self.plugin.get_device_state('washer-1', 'DEVICE_WASHER').state, 'RUNNING')
+
+        self.assertTrue(self.plugin.send_command('washer-1', WasherCommand(operation_mode='POWER_OFF')))
+        self.assertEqual(self.plugin.get_device_state('washer-1', 'DEVICE_WASHER').state, 'POWER_OFF')
+        self.assertFalse(self.plugin.send_command('washer-1', WasherCommand(reserve_time_h=3)))
+
+    def test_washer_is_bridged(self):
+        mapping = DEVICE_MAPPINGS.resolve('samsung', 'DEVICE_WASHER')
+        self.assertIsNotNone(mapping)
+        self.assertIsNotNone(mapping.hap_factory)
+        self.assertIsNotNone(mapping.smartthings_factory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+XiaomiMiIOClient contra el emulador miIO local (plugins.xiaomi_emulator).
+"""
+import unittest
+
+from brandconnectors.xiaomi_client import MiIODeviceConfig, XiaomiMiIOClient
+from plugins.xiaomi_emulator import MiIOEmulator
+
+TOKEN_A = '00112233445566778899aabbccddeeff'
+TOKEN_B = 'ffeeddccbbaa99887766554433221100'
+
+
+class XiaomiMiIOClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.purifier = MiIOEmulator(TOKEN_A, device_id=1001, properties={(2, 1): True, (2, 4): 1})
+        self.lamp = MiIOEmulator(TOKEN_B, device_id=1002, model='yeelink.light.lamp1', legacy={'power': 'on', 'bright': 80})
+        for device in (self.purifier, self.lamp):
+            device.start()
+            self.addCleanup(device.stop)
+
+        self.client = XiaomiMiIOClient([
+            MiIODeviceConfig('purificador', 'localhost', TOKEN_A, port=self.purifier.port,
+                             properties={'power': (2, 1), 'mode': (2, 4)}),
+            MiIODeviceConfig('lampara', '127.0.0.1', TOKEN_B, port=self.lamp.port,
+                             properties={'power': (None, None), 'bright': (None, None)}),
+        ], pool_size=2, timeout=0.3, retries=1)
+        self.addCleanup(self.client.pool.close)
+
+    def test_round_trip(self):
+        devices = {d['device_id']: d for d in self.client.get_devices_list()}
+        self.assertEqual(devices['1001']['model'], 'zhimi.airpurifier.ma4')
+        self.assertEqual(devices['1002']['model'], 'yeelink.light.lamp1')
+        self.assertTrue(all(d['reachable'] for d in devices.values()))
+
+        status = self.client.get_devices_status(['1001', '1002'])
+        self.assertEqual(status, {'1001': {'power': True, 'mode': 1}, '1002': {'power': 'on', 'bright': 80}})
+
+        self.assertTrue(self.client.send_command('1001', {'properties': {'power': False}}))
+        self.assertEqual(self.purifier.properties[(2, 1)], False)
+        self.assertEqual(self.client.get_device_state('1001'), {'power': False, 'mode': 1})
+
+    def test_offline_device_stays_listed(self):
+        self.client.get_devices_list()
+        self.lamp.online = False
+
+        devices = {d['device_id']: d for d in self.client.get_devices_list()}
+        self.assertFalse(devices['1002']['reachable'])
+        self.assertTrue(devices['1001']['reachable'])
+        self.assertEqual(self.client.get_devices_status(['1002']), {'1002': {}})
+
+        self.lamp.online = True
+        self.assertEqual(self.client.get_device_state('1002'), {'power': 'on', 'bright': 80})
+
+    def test_wrong_token_is_ignored(self):
+        client = XiaomiMiIOClient([MiIODeviceConfig('x', '127.0.0.1', TOKEN_B, port=self.purifier.port,
+                                                    properties={'power': (2, 1)})], timeout=0.2, retries=0)
+        self.addCleanup(client.pool.close)
+        client.get_devices_list()
+        # El emulador descarta el paquete (checksum con otro token): no hay estado
+        self.assertEqual(client.get_devices_status(['1001']), {'1001': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()